@@ -16,6 +16,7 @@ from ichimoku_strategy import IchimokuStrategy
 from parabolic_sar_strategy import ParabolicSARStrategy
 from keltner_channel_strategy import KeltnerChannelStrategy
 from vwap_strategy import VWAPStrategy
+from ensemble_strategy import EnsembleStrategy
 
 __all__ = [
     'BaseStrategy',
@@ -30,5 +31,6 @@ __all__ = [
     'IchimokuStrategy',
     'ParabolicSARStrategy',
     'KeltnerChannelStrategy',
-    'VWAPStrategy'
+    'VWAPStrategy',
+    'EnsembleStrategy'
 ] 
\ No newline at end of file
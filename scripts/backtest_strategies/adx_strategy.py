@@ -1,8 +1,12 @@
 import pandas as pd
-import numpy as np
-from base_strategy import BaseStrategy
+from base_strategy import BaseStrategy, ema_warmup
+from indicator_kernels import adx_di, ADX_SMOOTHING
+from streaming_indicators import RollingMean, WilderSmoothing, divide
+from signal_kernels import signal_column, as_array
 
 class ADXStrategy(BaseStrategy):
+    indicator_columns = ['adx', 'di_plus', 'di_minus']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -11,55 +15,52 @@ class ADXStrategy(BaseStrategy):
         self.di_period = int(self.strategy_config.get('di_period', 14))
         self.adx_threshold = float(self.strategy_config.get('adx_threshold', 25))
         self.trend_strength = float(self.strategy_config.get('trend_strength', 30))
+        # 'sma': rolling mean như trước; 'wilder': Wilder smoothing (RMA) chuẩn của ADX
+        self.smoothing = self.strategy_config.get('smoothing', 'sma')
+        if self.smoothing not in ADX_SMOOTHING:
+            raise ValueError(f"Unknown ADX smoothing '{self.smoothing}', expected one of {ADX_SMOOTHING}")
     
+    @property
+    def warmup_bars(self) -> int:
+        if self.smoothing == 'wilder':
+            # Wilder smoothing với period p là EMA với span 2p - 1
+            return 1 + ema_warmup(2 * self.di_period - 1) + ema_warmup(2 * self.adx_period - 1)
+        # True range/DM cần close/high/low bar trước, DI rolling di_period, ADX rolling adx_period
+        return self.di_period + self.adx_period - 1
+
     def calculate_adx(self, data):
-        """Calculate ADX, +DI, and -DI"""
-        high = data['high']
-        low = data['low']
-        close = data['close']
-        
-        # Calculate True Range
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # Calculate Directional Movement
-        dm_plus = high - high.shift(1)
-        dm_minus = low.shift(1) - low
-        
-        # Filter directional movement
-        dm_plus = np.where((dm_plus > dm_minus) & (dm_plus > 0), dm_plus, 0)
-        dm_minus = np.where((dm_minus > dm_plus) & (dm_minus > 0), dm_minus, 0)
-        
-        # Smooth the values
-        tr_smooth = tr.rolling(window=self.di_period).mean()
-        dm_plus_smooth = pd.Series(dm_plus).rolling(window=self.di_period).mean()
-        dm_minus_smooth = pd.Series(dm_minus).rolling(window=self.di_period).mean()
-        
-        # Calculate +DI and -DI
-        di_plus = 100 * (dm_plus_smooth / tr_smooth)
-        di_minus = 100 * (dm_minus_smooth / tr_smooth)
-        
-        # Calculate ADX
-        dx = 100 * abs(di_plus - di_minus) / (di_plus + di_minus)
-        adx = dx.rolling(window=self.adx_period).mean()
-        
-        return adx, di_plus, di_minus
+        """Calculate ADX, +DI, and -DI (kernel một lượt trên mảng NumPy)"""
+        values = adx_di(data['high'].to_numpy(), data['low'].to_numpy(), data['close'].to_numpy(),
+                        self.di_period, self.adx_period, self.smoothing)
+        return tuple(pd.Series(series, index=data.index) for series in values)
     
     def generate_signals(self, data):
         """Generate trading signals based on ADX"""
         signals = data.copy()
         
         # Calculate ADX
-        adx, di_plus, di_minus = self.calculate_adx(data)
+        adx, di_plus, di_minus = self.cached_indicator(
+            data, ('adx', self.adx_period, self.di_period, self.smoothing),
+            lambda: self.calculate_adx(data)
+        )
         signals['adx'] = adx
         signals['di_plus'] = di_plus
         signals['di_minus'] = di_minus
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(adx, di_plus, di_minus))
         
+        return signals
+    
+    def signal_array(self, data):
+        return signal_column(*self.signal_rules(*self.cached_indicator(
+            data, ('adx', self.adx_period, self.di_period, self.smoothing),
+            lambda: self.calculate_adx(data)
+        )))
+    
+    def signal_rules(self, adx, di_plus, di_minus):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        adx, di_plus, di_minus = as_array(adx), as_array(di_plus), as_array(di_minus)
         # Generate buy signals
         # Buy when ADX > threshold, +DI > -DI, and trend is strong
         buy_condition = (
@@ -67,7 +68,6 @@ class ADXStrategy(BaseStrategy):
             (di_plus > di_minus) & 
             (adx > self.trend_strength)
         )
-        signals.loc[buy_condition, 'signal'] = 1
         
         # Generate sell signals
         # Sell when ADX > threshold, -DI > +DI, and trend is strong
@@ -76,6 +76,46 @@ class ADXStrategy(BaseStrategy):
             (di_minus > di_plus) & 
             (adx > self.trend_strength)
         )
-        signals.loc[sell_condition, 'signal'] = -1
+        return buy_condition, sell_condition
+    
+    def _init_stream(self):
+        self._prev_bar = None
+        smoother = WilderSmoothing if self.smoothing == 'wilder' else RollingMean
+        self._tr_smooth = smoother(self.di_period)
+        self._dm_plus_smooth = smoother(self.di_period)
+        self._dm_minus_smooth = smoother(self.di_period)
+        self._adx = smoother(self.adx_period)
+    
+    def _on_bar(self, bar):
+        """Incremental ADX signal for one bar"""
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
         
-        return signals
+        if self._prev_bar is None:
+            if self.smoothing == 'wilder':
+                # Wilder smoothing bắt đầu từ bar thứ hai (cần bar trước)
+                self._prev_bar = (high, low, close)
+                return 0
+            # Bar đầu tiên: chỉ có high - low, directional movement bằng 0
+            tr = high - low
+            dm_plus = dm_minus = 0.0
+        else:
+            prev_high, prev_low, prev_close = self._prev_bar
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            dm_plus = high - prev_high
+            dm_minus = prev_low - low
+            dm_plus = dm_plus if (dm_plus > dm_minus and dm_plus > 0) else 0.0
+            dm_minus = dm_minus if (dm_minus > dm_plus and dm_minus > 0) else 0.0
+        self._prev_bar = (high, low, close)
+        
+        tr_smooth = self._tr_smooth.update(tr)
+        di_plus = 100 * divide(self._dm_plus_smooth.update(dm_plus), tr_smooth)
+        di_minus = 100 * divide(self._dm_minus_smooth.update(dm_minus), tr_smooth)
+        dx = divide(100 * abs(di_plus - di_minus), di_plus + di_minus)
+        adx = self._adx.update(dx)
+        
+        signal = 0
+        if adx > self.adx_threshold and di_plus > di_minus and adx > self.trend_strength:
+            signal = 1
+        if adx > self.adx_threshold and di_minus > di_plus and adx > self.trend_strength:
+            signal = -1
+        return signal
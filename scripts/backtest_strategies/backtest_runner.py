@@ -1,111 +1,38 @@
 import pandas as pd
-import numpy as np
 import json
 import os
 import sys
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 import argparse
-from supabase import create_client, Client
+from contextlib import redirect_stdout
 
 # Add parent directory to Python path để có thể import các module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import các strategy
-from backtest_strategies.ma_crossover_strategy import MACrossoverStrategy
-from backtest_strategies.rsi_strategy import RSIStrategy
-from backtest_strategies.macd_strategy import MACDStrategy
-from backtest_strategies.bollinger_bands_strategy import BollingerBandsStrategy
-from backtest_strategies.breakout_strategy import BreakoutStrategy
-from backtest_strategies.stochastic_strategy import StochasticStrategy
-from backtest_strategies.williams_r_strategy import WilliamsRStrategy
-from backtest_strategies.adx_strategy import ADXStrategy
-from backtest_strategies.ichimoku_strategy import IchimokuStrategy
-from backtest_strategies.parabolic_sar_strategy import ParabolicSARStrategy
-from backtest_strategies.keltner_channel_strategy import KeltnerChannelStrategy
-from backtest_strategies.vwap_strategy import VWAPStrategy
-
-# Khởi tạo Supabase client (chỉ khi cần thiết)
-supabase: Client = None
-
-def get_supabase_client():
-    """Lazy initialization of Supabase client"""
-    global supabase
-    if supabase is None:
-        supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-        if not supabase_url or not supabase_key:
-            raise ValueError("Missing Supabase environment variables")
-        supabase = create_client(supabase_url, supabase_key)
-    return supabase
+# Strategy được tra qua registry dùng chung (patch runner, sweep, ensemble)
+from backtest_strategies.strategy_registry import get_strategy_class
+from backtest_strategies.market_data import ohlcv_table_name
+from backtest_strategies.ohlcv_cache import load_ohlcv
+from backtest_strategies.result_cache import ResultCache
+from backtest_strategies.performance_metrics import downsample_equity
+from backtest_strategies.ndjson_output import NDJSONWriter, DEFAULT_CHUNK_SIZE
+from backtest_strategies.serialization import json_record, dumps, chart_payload, CHART_FORMATS
+from backtest_strategies.indicator_export import decimate_indicators
+from backtest_strategies.indicator_store import IndicatorStore
 
 def load_data(symbol: str, timeframe: str, start_date: str, end_date: str) -> pd.DataFrame:
     """Load historical price data for backtesting from Supabase"""
     try:
-        # Dựa trên thông tin từ người dùng, dữ liệu OHLCV nằm trong bảng cụ thể cho mỗi symbol.
-        # Ví dụ: 'OHLCV_BTC_USDT_1m'.
-        # Xây dựng tên bảng một cách động từ symbol, giả sử timeframe cơ sở là 1m.
-        table_name = f"OHLCV_BTC_USDT_1m"
+        # Dữ liệu OHLCV 1m nằm trong bảng riêng cho mỗi symbol, ví dụ 'OHLCV_BTC_USDT_1m'
+        table_name = ohlcv_table_name(symbol)
         print(f"INFO: Attempting to load data from table '{table_name}'")
 
-        # Lấy Supabase client
-        supabase_client = get_supabase_client()
-
-        # Lấy dữ liệu từ bảng được xây dựng động
-        response = supabase_client.table(table_name) \
-            .select('*') \
-            .gte('open_time', start_date) \
-            .lte('open_time', end_date) \
-            .order('open_time', desc=False) \
-            .execute()
-        
-        if not response.data:
+        # Đọc từ local cache; chỉ phần còn thiếu được fetch từ Supabase (theo trang,
+        # song song, chỉ các cột OHLCV), rồi resample theo timeframe
+        df = load_ohlcv(symbol, start_date, end_date, timeframe)
+        if len(df) == 0:
             raise ValueError(f"No data found for symbol {symbol} in table {table_name} between {start_date} and {end_date}")
-
-        # Convert to DataFrame
-        df = pd.DataFrame(response.data)
-
-        # Đảm bảo các cột đúng chuẩn OHLCV
-        # Nếu cần, có thể rename cho đồng nhất
-        # Ở đây giả sử các cột đã đúng: open, high, low, close, volume
-
-        # Chuyển đổi open_time thành datetime index
-        df['open_time'] = pd.to_datetime(df['open_time'])
-        df.set_index('open_time', inplace=True)
-
-        # Resample data theo timeframe
-        if timeframe != '1m':  # Nếu không phải 1 phút thì cần resample
-            # Map timeframe to pandas offset string
-            timeframe_map = {
-                '1m': '1T',
-                '3m': '3T',
-                '5m': '5T',
-                '15m': '15T',
-                '30m': '30T',
-                '1h': 'H',
-                '2h': '2H',
-                '4h': '4H',
-                '6h': '6H',
-                '8h': '8H',
-                '12h': '12H',
-                '1d': 'D',
-                '3d': '3D',
-                '1w': 'W',
-                '1M': 'M'
-            }
-            
-            rule = timeframe_map.get(timeframe)
-            if not rule:
-                raise ValueError(f"Invalid timeframe: {timeframe}")
-            
-            # Resample OHLCV data
-            df = df.resample(rule).agg({
-                'open': 'first',
-                'high': 'max',
-                'low': 'min',
-                'close': 'last',
-                'volume': 'sum'
-            }).dropna()
         
         return df
 
@@ -113,12 +40,30 @@ def load_data(symbol: str, timeframe: str, start_date: str, end_date: str) -> pd
         print(f"Error loading data: {str(e)}")
         raise
 
-def run_backtest(config: Dict[str, Any], experiment_id: str) -> Dict[str, Any]:
+def run_backtest(config: Dict[str, Any], experiment_id: str, use_cache: bool = True) -> Dict[str, Any]:
     """Run backtest with specified strategy and parameters"""
     # Create results directory if it doesn't exist
     results_dir = os.path.join('results', 'backtests', experiment_id)
     os.makedirs(results_dir, exist_ok=True)
 
+    # Cùng symbol/khoảng dữ liệu/tham số/phí/risk -> dùng lại kết quả đã lưu
+    cache_info = {'enabled': use_cache, 'hit': False}
+    if use_cache:
+        cache = ResultCache.from_env()
+        results, hit = cache.get_or_compute(config, lambda: compute_backtest(config))
+        cache_info.update({'hit': hit, **cache.stats()})
+    else:
+        results = compute_backtest(config)
+
+    # Save results
+    save_results(results, results_dir, config['strategy']['type'])
+
+    results = dict(results)
+    results['cache'] = cache_info
+    return results
+
+def compute_backtest(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Load data, run the strategy and collect indicator data for the chart"""
     # Load data
     symbol = config['trading']['symbol']
     timeframe = config['trading']['timeframe']
@@ -127,90 +72,20 @@ def run_backtest(config: Dict[str, Any], experiment_id: str) -> Dict[str, Any]:
     
     data = load_data(symbol, timeframe, start_date, end_date)
 
-    # Strategy mapping
-    strategy_map = {
-        'ma_crossover': MACrossoverStrategy,
-        'rsi': RSIStrategy,
-        'macd': MACDStrategy,
-        'bollinger_bands': BollingerBandsStrategy,
-        'breakout': BreakoutStrategy,
-        'stochastic': StochasticStrategy,
-        'williams_r': WilliamsRStrategy,
-        'adx': ADXStrategy,
-        'ichimoku': IchimokuStrategy,
-        'parabolic_sar': ParabolicSARStrategy,
-        'keltner_channel': KeltnerChannelStrategy,
-        'vwap': VWAPStrategy
-    }
-
     # Get strategy class
-    strategy_type = config['strategy']['type']
-    if strategy_type not in strategy_map:
-        raise ValueError(f"Strategy type '{strategy_type}' not supported")
-
-    StrategyClass = strategy_map[strategy_type]
+    StrategyClass = get_strategy_class(config['strategy']['type'])
 
-    # Initialize strategy
+    # Initialize strategy; backtest và phần indicator cho chart dùng chung indicator đã tính
+    # (với ensemble, mọi member cũng dùng chung store này)
     strategy = StrategyClass(config)
+    strategy.indicator_store = IndicatorStore(data)
 
     # Run backtest
     results = strategy.run_backtest(data)
     
-    # Lấy dữ liệu indicator từ strategy
+    # Lấy dữ liệu indicator từ strategy: các cột strategy khai báo, dạng mảng
     signals_data = strategy.generate_signals(data)
-    
-    # Chuẩn bị dữ liệu indicator cho chart
-    indicators_data = {
-        'timestamps': (signals_data.index.astype(np.int64) // 10**6).tolist(),  # Convert to milliseconds
-        'close_prices': signals_data['close'].tolist(),
-        'indicators': {}
-    }
-    
-    # Thêm các indicator tùy theo loại strategy
-    if strategy_type == 'rsi':
-        indicators_data['indicators']['rsi'] = [convert_datetime(x) for x in signals_data['rsi'].tolist()]
-    elif strategy_type == 'macd':
-        indicators_data['indicators']['macd'] = [convert_datetime(x) for x in signals_data['macd'].tolist()]
-        indicators_data['indicators']['signal'] = [convert_datetime(x) for x in signals_data['signal'].tolist()]
-        indicators_data['indicators']['histogram'] = [convert_datetime(x) for x in signals_data['histogram'].tolist()]
-    elif strategy_type == 'ma_crossover':
-        indicators_data['indicators']['fast_ma'] = [convert_datetime(x) for x in signals_data['fast_ma'].tolist()]
-        indicators_data['indicators']['slow_ma'] = [convert_datetime(x) for x in signals_data['slow_ma'].tolist()]
-    elif strategy_type == 'bollinger_bands':
-        indicators_data['indicators']['upper'] = [convert_datetime(x) for x in signals_data['upper'].tolist()]
-        indicators_data['indicators']['middle'] = [convert_datetime(x) for x in signals_data['middle'].tolist()]
-        indicators_data['indicators']['lower'] = [convert_datetime(x) for x in signals_data['lower'].tolist()]
-    elif strategy_type == 'stochastic':
-        indicators_data['indicators']['stoch_k'] = [convert_datetime(x) for x in signals_data['stoch_k'].tolist()]
-        indicators_data['indicators']['stoch_d'] = [convert_datetime(x) for x in signals_data['stoch_d'].tolist()]
-    elif strategy_type == 'williams_r':
-        indicators_data['indicators']['williams_r'] = [convert_datetime(x) for x in signals_data['williams_r'].tolist()]
-    elif strategy_type == 'adx':
-        indicators_data['indicators']['adx'] = [convert_datetime(x) for x in signals_data['adx'].tolist()]
-        indicators_data['indicators']['di_plus'] = [convert_datetime(x) for x in signals_data['di_plus'].tolist()]
-        indicators_data['indicators']['di_minus'] = [convert_datetime(x) for x in signals_data['di_minus'].tolist()]
-    elif strategy_type == 'ichimoku':
-        indicators_data['indicators']['tenkan'] = [convert_datetime(x) for x in signals_data['tenkan'].tolist()]
-        indicators_data['indicators']['kijun'] = [convert_datetime(x) for x in signals_data['kijun'].tolist()]
-        indicators_data['indicators']['senkou_span_a'] = [convert_datetime(x) for x in signals_data['senkou_span_a'].tolist()]
-        indicators_data['indicators']['senkou_span_b'] = [convert_datetime(x) for x in signals_data['senkou_span_b'].tolist()]
-        indicators_data['indicators']['chikou'] = [convert_datetime(x) for x in signals_data['chikou'].tolist()]
-    elif strategy_type == 'parabolic_sar':
-        indicators_data['indicators']['parabolic_sar'] = [convert_datetime(x) for x in signals_data['parabolic_sar'].tolist()]
-        indicators_data['indicators']['trend'] = [convert_datetime(x) for x in signals_data['trend'].tolist()]
-    elif strategy_type == 'keltner_channel':
-        indicators_data['indicators']['keltner_ema'] = [convert_datetime(x) for x in signals_data['keltner_ema'].tolist()]
-        indicators_data['indicators']['keltner_upper'] = [convert_datetime(x) for x in signals_data['keltner_upper'].tolist()]
-        indicators_data['indicators']['keltner_lower'] = [convert_datetime(x) for x in signals_data['keltner_lower'].tolist()]
-        indicators_data['indicators']['keltner_atr'] = [convert_datetime(x) for x in signals_data['keltner_atr'].tolist()]
-    elif strategy_type == 'vwap':
-        indicators_data['indicators']['vwap'] = [convert_datetime(x) for x in signals_data['vwap'].tolist()]
-        indicators_data['indicators']['vwap_upper'] = [convert_datetime(x) for x in signals_data['vwap_upper'].tolist()]
-        indicators_data['indicators']['vwap_lower'] = [convert_datetime(x) for x in signals_data['vwap_lower'].tolist()]
-        indicators_data['indicators']['vwap_std'] = [convert_datetime(x) for x in signals_data['vwap_std'].tolist()]
-
-    # Save results
-    save_results(results, results_dir, strategy_type)
+    indicators_data = strategy.export_indicators(signals_data)
 
     # Thêm indicators data vào results
     results['indicators'] = indicators_data
@@ -240,68 +115,94 @@ def save_results(results: Dict[str, Any], results_dir: str, strategy_type: str):
 
     print(f"Results saved to {results_dir}/{filename}_*")
 
-def convert_datetime(obj):
-    """Convert various data types to JSON serializable format"""
-    if isinstance(obj, (pd.Timestamp, datetime)):
-        return obj.isoformat()
-    if isinstance(obj, np.integer):
-        return int(obj)
-    if isinstance(obj, (np.floating, float)):
-        # Xử lý NaN values
-        if pd.isna(obj) or np.isnan(obj):
-            return None
-        return float(obj)
-    if isinstance(obj, np.ndarray):
-        # Xử lý numpy arrays với NaN values
-        return [None if pd.isna(x) or np.isnan(x) else float(x) for x in obj.tolist()]
-    if isinstance(obj, pd.Series):
-        # Xử lý pandas Series với NaN values
-        return [None if pd.isna(x) or np.isnan(x) else float(x) for x in obj.tolist()]
-    if isinstance(obj, dict):
-        # Xử lý nested dictionaries
-        return {k: convert_datetime(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        # Xử lý lists
-        return [convert_datetime(item) for item in obj]
-    if isinstance(obj, (str, int, bool, type(None))):
-        # Các kiểu dữ liệu cơ bản đã JSON serializable
-        return obj
-    # Xử lý các kiểu numpy khác
-    if hasattr(obj, 'item'):
-        try:
-            return obj.item()
-        except:
-            pass
-    # Nếu không xử lý được, chuyển thành string
-    return str(obj)
-
-if __name__ == '__main__':
+def downsample_equity_curve(results: Dict[str, Any], n_points: int) -> Dict[str, Any]:
+    """Equity curve giảm còn tối đa n_points điểm (LTTB) cho chart"""
+    equity_curve = results.get('equity_curve', [])
+    bars, equity = downsample_equity(equity_curve, n_points)
+    output = {'bars': bars.tolist(), 'equity': equity.tolist(), 'total_points': len(equity_curve)}
+    # equity[i] là vốn sau bar i nên dùng chung timestamps với dữ liệu indicator
+    timestamps = results.get('indicators', {}).get('timestamps')
+    if timestamps is not None and len(timestamps) == len(equity_curve):
+        output['timestamps'] = [timestamps[i] for i in output['bars']]
+    return output
+
+def write_ndjson_results(writer: NDJSONWriter, results: Dict[str, Any], experiment_id: str, equity_points: int = 0,
+                         chart_decimation: int = 1):
+    """
+    Output dạng NDJSON: dòng 'summary' (performance và cache), các khối 'trades' và
+    'indicators' (mỗi bar thứ chart_decimation), dòng 'equity_curve' nếu equity_points > 0,
+    cuối cùng là dòng 'end'
+    """
+    writer.write('summary', success=True, experiment_id=experiment_id,
+                 performance=json_record(results.get('performance', {})),
+                 cache=json_record(results.get('cache', {})))
+    trades = results.get('trades', [])
+    writer.write_trades(trades)
+    if 'indicators' in results:
+        writer.write_indicators(decimate_indicators(results['indicators'], chart_decimation))
+    if equity_points > 0:
+        writer.write('equity_curve', **downsample_equity_curve(results, equity_points))
+    writer.end(success=True, experiment_id=experiment_id, trades=len(trades))
+
+def main(argv: List[str] = None):
+    """CLI entry point; argv mặc định là sys.argv (worker_service gọi trực tiếp với argv của job)"""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Run backtest strategy')
     parser.add_argument('--experiment_id', type=str, required=True, help='Experiment ID')
     parser.add_argument('--config', type=str, required=True, help='Backtest configuration in JSON format')
-    args = parser.parse_args()
+    parser.add_argument('--no_cache', action='store_true', help='Bỏ qua result cache và luôn chạy lại backtest')
+    parser.add_argument('--equity_points', type=int, default=0,
+                        help='In thêm equity curve đã downsample (LTTB) còn tối đa N điểm; 0 = không in')
+    parser.add_argument('--output', choices=['json', 'ndjson'], default='json',
+                        help='json: các dòng trades/summary/indicators như cũ; ndjson: summary rồi từng khối theo dòng')
+    parser.add_argument('--chunk_size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Số trade/bar tối đa trong mỗi dòng của output ndjson')
+    parser.add_argument('--chart_format', choices=CHART_FORMATS, default='json',
+                        help='json: indicator là list số (NaN -> null); float32: buffer nhị phân base64')
+    parser.add_argument('--chart_decimation', type=int, default=1,
+                        help='Chỉ xuất mỗi bar thứ N của indicator cho chart (1 = mọi bar)')
+    args = parser.parse_args(argv)
 
     # Parse config from JSON string
     config = json.loads(args.config)
 
     try:
+        if args.output == 'ndjson':
+            # Log (load data, save results) sang stderr để stdout chỉ có các dòng NDJSON
+            with redirect_stdout(sys.stderr):
+                results = run_backtest(config, args.experiment_id, use_cache=not args.no_cache)
+            if not results:
+                raise ValueError('No results returned from backtest')
+            write_ndjson_results(NDJSONWriter(sys.stdout, args.chunk_size, args.chart_format), results,
+                                 args.experiment_id, args.equity_points, args.chart_decimation)
+            return
+
         # Run backtest
-        results = run_backtest(config, args.experiment_id)
+        results = run_backtest(config, args.experiment_id, use_cache=not args.no_cache)
 
         # In riêng từng phần cho API/backend dễ lấy
         if results:
-            print(json.dumps({"trades": results.get("trades", [])}, default=convert_datetime))  # Dành cho cột trades
-            print(json.dumps(results.get("performance", {}), default=convert_datetime))           # Dành cho cột results (summary)
+            print(dumps({"trades": results.get("trades", [])}))  # Dành cho cột trades
+            print(dumps(results.get("performance", {})))           # Dành cho cột results (summary)
             # In dữ liệu indicator cho chart
             if "indicators" in results:
-                print(json.dumps({"indicators": results["indicators"]}, default=convert_datetime))
+                chart = decimate_indicators(results["indicators"], args.chart_decimation)
+                print(dumps({"indicators": chart_payload(chart, args.chart_format)}))
+            # Thống kê result cache (dòng JSON thứ tư)
+            print(dumps({"cache": results.get("cache", {})}))
+            # Equity curve rút gọn cho chart (dòng JSON thứ năm, chỉ khi được yêu cầu)
+            if args.equity_points > 0:
+                print(dumps({"equity_curve": downsample_equity_curve(results, args.equity_points)}))
             # Nếu muốn in full để debug:
-            # print(json.dumps(results, default=convert_datetime))
+            # print(dumps(results))
         else:
             print(json.dumps({'error': 'No results returned from backtest'}))
 
-        exit(0)
+        return
     except Exception as e:
-        print(json.dumps({'error': f'Error running backtest: {str(e)}'}))
-        exit(1) 
\ No newline at end of file
+        error = {'error': f'Error running backtest: {str(e)}'}
+        print(json.dumps({'type': 'error', 'success': False, **error} if args.output == 'ndjson' else error))
+        exit(1) 
+
+if __name__ == '__main__':
+    main()
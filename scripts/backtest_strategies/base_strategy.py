@@ -1,9 +1,78 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
+from indicator_store import IndicatorStore
+from indicator_export import NON_INDICATOR_COLUMNS, export_indicators
+from signal_grid import empty_signal_grid
+from signal_kernels import signal_column
+import performance_metrics
+
+# Các trường OHLCV của một panel nhiều symbol (mỗi trường là frame bars × symbols)
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# EMA/SAR có trí nhớ vô hạn: warm-up là số span để trọng số của phần lịch sử bị bỏ
+# qua còn (1 - 2/(span+1))^(EMA_WARMUP_SPANS*span) ~ e^-10
+EMA_WARMUP_SPANS = 5
+
+def ema_warmup(span: int) -> int:
+    """Warm-up bars after which an EMA of this span no longer depends on where the data starts"""
+    return EMA_WARMUP_SPANS * int(span)
+
+class IndicatorSnapshots:
+    """
+    Precomputed indicator values for trade records.
+    Tập cột indicator và mảng giá trị được trích xuất một lần; last_valid_index
+    là chỉ số hàng hợp lệ gần nhất (khác NaN và khác 0) đã forward-fill theo
+    từng cột, nên snapshot tại bất kỳ bar nào chỉ là một phép gather.
+    """
+    
+    def __init__(self, signals: pd.DataFrame):
+        self.columns = [col for col in signals.columns if col not in NON_INDICATOR_COLUMNS]
+        positions = [signals.columns.get_loc(col) for col in self.columns]
+        
+        # iloc[i] trả về hàng với dtype chung của cả frame; dùng cùng dtype đó
+        # để giá trị trong trade record giống hệt vòng lặp reference
+        row_dtype = signals.iloc[:1].to_numpy().dtype
+        self.values = signals.iloc[:, positions].to_numpy(dtype=row_dtype)
+        
+        n = len(signals)
+        valid = ~pd.isna(self.values) & (self.values != 0)
+        row_index = np.where(valid, np.arange(n)[:, None], -1)
+        self.last_valid_index = np.maximum.accumulate(row_index, axis=0) if n > 0 else row_index
+    
+    def at(self, i: int) -> Dict[str, Any]:
+        """Indicator values at bar i"""
+        return dict(zip(self.columns, self.values[i]))
+    
+    def last_valid_at(self, i: int) -> Dict[str, Any]:
+        """Last valid (non-NaN, non-zero) value of each indicator up to bar i, 0 if none"""
+        snapshot = {}
+        for k, (col, j) in enumerate(zip(self.columns, self.last_valid_index[i])):
+            snapshot[col] = self.values[j, k] if j >= 0 else 0
+        return snapshot
+
+class TradePlan:
+    """
+    Capital-independent part of a backtest.
+    Điểm vào/ra lệnh chỉ phụ thuộc giá và signal (stoploss/take profit tính theo
+    giá vào), không phụ thuộc vốn. Mỗi lệnh là (bar vào, bar ra hoặc None nếu đóng
+    cuối backtest, thời gian vào/ra, giá vào/ra, lý do, indicator snapshots).
+    """
+    
+    def __init__(self, n_bars: int, trades: List[tuple]):
+        self.n_bars = n_bars
+        self.trades = trades
+    
+    def __len__(self) -> int:
+        return len(self.trades)
 
 class BaseStrategy(ABC):
+    # Cột indicator xuất cho chart (None: mọi cột indicator của signal frame) và
+    # tên key trong output nếu khác tên cột
+    indicator_columns: Optional[List[str]] = None
+    indicator_labels: Dict[str, str] = {}
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.trading_config = config.get('trading', {})
@@ -36,7 +105,172 @@ class BaseStrategy(ABC):
         self.positions = []
         self.trades = []
         self.equity_curve = [self.initial_capital]
-    
+        
+        # Indicator store dùng chung giữa nhiều strategy/bộ tham số trên cùng một
+        # dataset (parameter sweep gán store; mặc định mỗi lần tính tạo store riêng)
+        self.indicator_store = None
+
+        # Streaming state: update(bar) trả về signal của bar cách bar mới nhất
+        # signal_lag bar (strategy nhìn trước tương lai như Ichimoku có lag > 0)
+        self.signal_lag = 0
+        self._stream_ready = False
+
+    @property
+    def warmup_bars(self) -> int:
+        """
+        Số bar lịch sử cần có trước bar đầu tiên để indicator và signal của bar đó
+        giống như khi tính trên toàn bộ lịch sử. Mỗi strategy khai báo theo tham số
+        của nó (rolling window, shift, displacement); 0 nếu không cần lịch sử.
+        """
+        return 0
+
+    def warmup_signals(self, data: pd.DataFrame, warmup: int = 0) -> pd.DataFrame:
+        """
+        generate_signals trên data có warmup bar đầu là lịch sử (ví dụ warmup_bars
+        bar trước một patch); trả về signals của các bar sau phần lịch sử.
+        """
+        signals = self.generate_signals(data)
+        return signals.iloc[warmup:] if warmup > 0 else signals
+
+    def export_indicators(self, signals: pd.DataFrame, decimation: int = 1) -> Dict[str, Any]:
+        """Chart data (timestamps, close_prices, indicators) of the declared indicator columns"""
+        return export_indicators(signals, self.indicator_columns, self.indicator_labels, decimation)
+
+    def indicators(self, data) -> IndicatorStore:
+        """Shared store if it was built for this data, otherwise a fresh store for this call"""
+        store = self.indicator_store
+        if store is not None and store.covers(data):
+            return store
+        return IndicatorStore(data)
+
+    @classmethod
+    def prefill_indicators(cls, store: IndicatorStore, strategies: List['BaseStrategy']):
+        """
+        Tính trước vào store indicator của nhiều bộ tham số cùng lúc (parameter sweep),
+        bằng batched kernel trên cả vector period. Mặc định không làm gì.
+        """
+
+    @classmethod
+    def signal_grid(cls, store: IndicatorStore, strategies: List['BaseStrategy']) -> np.ndarray:
+        """
+        Signals of many parameter sets on store.data as an int8 matrix bars × combinations
+        (cột j ứng với strategies[j]). Indicator được prefill một lần cho cả grid và
+        mỗi cột chỉ tạo mảng int8 qua signal_array, không copy OHLCV frame.
+        """
+        cls.prefill_indicators(store, strategies)
+        signals = empty_signal_grid(len(store.data), len(strategies))
+        for j, strategy in enumerate(strategies):
+            strategy.indicator_store = store
+            signals[:, j] = strategy.signal_array(store.data)
+        return signals
+
+    def signal_array(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Cột 'signal' của generate_signals dạng int8. Strategy có signal_rules override
+        để tính thẳng từ indicator mà không dựng signal frame.
+        """
+        return self.generate_signals(data)['signal'].to_numpy(dtype=np.int8)
+
+    def cached_indicator(self, data: pd.DataFrame, key: tuple, compute):
+        """
+        Return the cached indicator for key on data, computing it on first use.
+        Key phải chứa đủ mọi tham số ảnh hưởng tới kết quả; chỉ dùng store khi store
+        được tạo cho đúng data này (như indicators), nếu không tính lại.
+        """
+        store = self.indicator_store
+        if store is None or not store.covers(data):
+            return compute()
+        return store.memo(key, compute)
+
+    def signal_matrix(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Signals for many symbols at once. panel maps 'open'/'high'/'low'/'close'/'volume'
+        to bars × symbols frames on a shared index; kết quả là frame signal cùng shape.
+        Mỗi symbol được tính trên các bar có dữ liệu của riêng nó (như generate_signals
+        trên frame của symbol đó): các symbol có cùng tập bar hợp lệ được gom thành một
+        panel không có NaN và đưa vào panel_signals; bar thiếu dữ liệu có signal 0.
+        """
+        close = panel['close']
+        signals = pd.DataFrame(0, index=close.index, columns=close.columns, dtype=np.int8)
+        fields = [field for field in PANEL_FIELDS if field in panel]
+        valid = np.logical_and.reduce([panel[field].notna().to_numpy() for field in fields])
+
+        groups: Dict[bytes, List[int]] = {}
+        for j in range(valid.shape[1]):
+            groups.setdefault(valid[:, j].tobytes(), []).append(j)
+        for columns in groups.values():
+            rows = np.flatnonzero(valid[:, columns[0]])
+            if len(rows) == 0:
+                continue
+            if len(rows) == len(close) and len(columns) == close.shape[1]:
+                # Trường hợp thường gặp: mọi symbol có đủ bar -> dùng nguyên panel
+                group = panel
+            else:
+                group = {field: panel[field].iloc[rows, columns] for field in fields}
+            signals.iloc[rows, columns] = self.panel_signals(group).to_numpy()
+        return signals
+
+    def panel_signals(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Signals của một panel không có bar thiếu (mọi cột hợp lệ trên mọi bar).
+        Mặc định chạy generate_signals cho từng cột; strategy có indicator tính được
+        theo cột override bằng phép tính vector hóa.
+        """
+        close = panel['close']
+        signals = pd.DataFrame(0, index=close.index, columns=close.columns, dtype=np.int8)
+        # Key trong indicator store không chứa symbol nên tắt store khi chạy từng cột
+        indicator_store, self.indicator_store = self.indicator_store, None
+        try:
+            for j, symbol in enumerate(close.columns):
+                frame = pd.DataFrame({field: panel[field][symbol] for field in PANEL_FIELDS if field in panel})
+                signals.iloc[:, j] = self.generate_signals(frame)['signal'].to_numpy()
+        finally:
+            self.indicator_store = indicator_store
+        return signals
+
+    @staticmethod
+    def combine_signals(like: pd.DataFrame, buy: np.ndarray, sell: np.ndarray) -> pd.DataFrame:
+        """int8 frame cùng index/columns với like: 1 where buy, -1 where sell (sell ghi đè buy), else 0"""
+        return pd.DataFrame(signal_column(buy, sell), index=like.index, columns=like.columns)
+
+    def reset_stream(self):
+        """Reset incremental indicator state before feeding a new bar sequence"""
+        self._init_stream()
+        self._stream_ready = True
+
+    def _init_stream(self):
+        """Create the per-bar indicator state used by _on_bar"""
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming updates")
+
+    def _on_bar(self, bar: Dict[str, float]) -> int:
+        """Advance the indicator state by one bar and return the signal"""
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming updates")
+
+    def update(self, bar: Dict[str, float]) -> int:
+        """
+        Process one closed candle (dict với open/high/low/close/volume) and return
+        its signal: 1 buy, -1 sell, 0 none. Chi phí mỗi bar là O(1), kết quả khớp
+        với cột 'signal' của generate_signals trên cùng chuỗi bar.
+        """
+        if not self._stream_ready:
+            self.reset_stream()
+        return self._on_bar(bar)
+
+    def stream_signals(self, data: pd.DataFrame) -> pd.Series:
+        """
+        Feed data bar by bar through update() and return the signals aligned
+        with data.index (dùng để đối chiếu với generate_signals).
+        """
+        self.reset_stream()
+        signals = np.zeros(len(data), dtype=np.int8)
+        columns = [col for col in ['open', 'high', 'low', 'close', 'volume'] if col in data.columns]
+        rows = zip(*(data[col].to_numpy(dtype=np.float64).tolist() for col in columns))
+        for i, values in enumerate(rows):
+            signal = self.update(dict(zip(columns, values)))
+            if i >= self.signal_lag:
+                signals[i - self.signal_lag] = signal
+        return pd.Series(signals, index=data.index, name='signal')
+
     @abstractmethod
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -45,20 +279,35 @@ class BaseStrategy(ABC):
         """
         pass
     
-    def run_backtest(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def run_backtest(self, data: pd.DataFrame, engine: str = 'array') -> Dict[str, Any]:
         """
         Run backtest with the given data and strategy parameters.
         Returns backtest results including trades and performance metrics.
+
+        engine='array' chạy state machine trên các mảng NumPy trích xuất một lần,
+        engine='reference' giữ vòng lặp iloc gốc để đối chiếu kết quả trong test.
         """
         # Generate signals
         signals = self.generate_signals(data)
         
+        if engine == 'array':
+            simulation = self._simulate_arrays(signals)
+        elif engine == 'reference':
+            simulation = self._simulate_reference(signals)
+        else:
+            raise ValueError(f"Unknown backtest engine '{engine}'")
+        
+        return self._build_results(*simulation)
+    
+    def _simulate_reference(self, signals: pd.DataFrame) -> tuple:
+        """
+        Reference execution loop (row-by-row iloc access).
+        Returns (trades, equity, final_capital, total_fee).
+        """
         # Initialize results
         trades = []
         equity = [self.initial_capital]
         current_capital = self.initial_capital
-        max_capital = self.initial_capital
-        max_drawdown = 0
         total_fee = 0
         entry_fee_last_trade = 0
         
@@ -211,12 +460,6 @@ class BaseStrategy(ABC):
             
             # Update equity curve
             equity.append(current_capital)
-            
-            # Update max drawdown
-            if current_capital > max_capital:
-                max_capital = current_capital
-            drawdown = (max_capital - current_capital) / max_capital
-            max_drawdown = max(max_drawdown, drawdown)
         
         # Close any remaining position at the end
         if in_position:
@@ -266,86 +509,171 @@ class BaseStrategy(ABC):
             current_capital += pnl - exit_fee
             total_fee += exit_fee
         
-        # Calculate performance metrics
-        total_trades = len(trades)
-        winning_trades = len([t for t in trades if t['pnl'] > 0])
-        losing_trades = total_trades - winning_trades
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
         
-        avg_win = np.mean([t['pnl'] for t in trades if t['pnl'] > 0]) if winning_trades > 0 else 0
-        avg_loss = np.mean([t['pnl'] for t in trades if t['pnl'] < 0]) if losing_trades > 0 else 0
+        return trades, equity, current_capital, total_fee
+    
+    def _simulate_arrays(self, signals: pd.DataFrame) -> tuple:
+        """
+        Array-backed execution loop. Close, signal và indicator columns được
+        trích xuất một lần, sau đó chạy cùng state machine với _simulate_reference.
+        Returns (trades, equity, final_capital, total_fee).
+        """
+        return self.execute_plan(self.plan_trades(signals))
+    
+    def plan_trades(self, signals: pd.DataFrame) -> TradePlan:
+        """
+        Capital-independent half of the array engine: quyết định vào/ra lệnh
+        (stoploss -> sell signal -> take profit) và indicator snapshots.
+        """
+        n = len(signals)
+        index = signals.index
+        
+        # Trích xuất dữ liệu một lần thay vì gọi signals.iloc[i] cho từng bar
+        close = signals['close'].to_numpy(dtype=np.float64).tolist()
+        signal_values = signals['signal'].to_numpy().tolist()
+        
+        # Indicator snapshots (entry/exit) là phép gather O(1) trên mảng tính sẵn
+        snapshots = IndicatorSnapshots(signals)
         
-        # Tính toán tỷ lệ lãi net trung bình và tỷ lệ lỗ net trung bình
-        avg_win_net = 0
-        avg_loss_net = 0
+        check_stoploss = self.prioritize_stoploss
+        check_take_profit = self.prioritize_stoploss and self.use_take_profit
         
-        if total_trades > 0:
-            # Tính tỷ lệ lợi nhuận cho từng giao dịch
-            for trade in trades:
-                entry_value = trade['entry_price'] * trade['size']
-                net_pnl = trade['pnl']  # Đã trừ phí
-                
-                # Tính tỷ lệ lợi nhuận NET dựa trên pnl thực tế (đã trừ phí)
-                if entry_value > 0:
-                    # profit_ratio = (net_pnl / entry_value) * 100
-                    # net_pnl đã trừ phí, entry_value = entry_price * size
-                    trade['profit_ratio'] = (net_pnl / entry_value) * 100
-                else:
-                    trade['profit_ratio'] = 0
-            
-            # Tính tỷ lệ lãi net trung bình = avg tỷ lệ lợi nhuận các giao dịch lãi
-            winning_trade_ratios = [t['profit_ratio'] for t in trades if t['pnl'] > 0]
-            avg_win_net = np.mean(winning_trade_ratios) if winning_trade_ratios else 0
-            
-            # Tính tỷ lệ lỗ net trung bình = avg tỷ lệ lợi nhuận các giao dịch lỗ
-            losing_trade_ratios = [t['profit_ratio'] for t in trades if t['pnl'] < 0]
-            avg_loss_net = np.mean(losing_trade_ratios) if losing_trade_ratios else 0
+        trades = []
+        
+        # Track positions
+        in_position = False
+        entry_price = 0
+        entry_index = 0
+        entry_indicators = {}
+        stoploss_price = 0
+        take_profit_price = 0
+        current_price = 0
+        
+        for i in range(1, n):
+            current_price = close[i]
+            signal = signal_values[i]
             
-            # Debug: in ra để kiểm tra (commented out to avoid JSON parsing issues)
-            # print(f"Debug - Total trades: {total_trades}")
-            # print(f"Debug - Winning trades: {winning_trades}")
-            # print(f"Debug - Losing trades: {losing_trades}")
-            # print(f"Debug - Win rate: {win_rate * 100:.2f}%")
-            # print(f"Debug - Avg win net: {avg_win_net:.4f}%")
-            # print(f"Debug - Avg loss net: {avg_loss_net:.4f}%")
+            if in_position:
+                # Thứ tự ưu tiên: stoploss -> sell signal -> take profit
+                exit_reason = None
+                if check_stoploss and current_price <= stoploss_price:
+                    exit_reason = 'stoploss'
+                elif signal == -1:
+                    exit_reason = 'signal'
+                elif check_take_profit and current_price >= take_profit_price:
+                    exit_reason = 'take_profit'
+                
+                if exit_reason is not None:
+                    trades.append((entry_index, i, index[entry_index], index[i], entry_price, current_price,
+                                   exit_reason, entry_indicators, snapshots.at(i)))
+                    in_position = False
             
-            # In ra chi tiết từng trade để kiểm tra (commented out to avoid JSON parsing issues)
-            # print("\n=== DEBUG TRADES ===")
-            # for i, trade in enumerate(trades[:5]):  # Chỉ in 5 trades đầu
-            #     entry_value = trade['entry_price'] * trade['size']
-            #     net_pnl = trade['pnl']
-            #     profit_ratio = trade['profit_ratio']
-            #     print(f"Trade {i+1}: entry_price={trade['entry_price']:.2f}, exit_price={trade['exit_price']:.2f}, size={trade['size']:.6f}")
-            #     print(f"  entry_value={entry_value:.2f}, net_pnl={net_pnl:.4f}, profit_ratio={profit_ratio:.4f}%")
-            #     print(f"  pnl_pct={trade['pnl_pct']:.6f}, pnl_pct%={trade['pnl_pct']*100:.4f}%")
-            #     print(f"  Check: profit_ratio = ({net_pnl:.4f} / {entry_value:.2f}) * 100 = {profit_ratio:.4f}%")
-            #     print("---")
+            elif signal == 1:
+                entry_price = current_price
+                entry_index = i
+                in_position = True
+                entry_indicators = snapshots.at(i)
+                stoploss_price = entry_price * (1 - self.stop_loss)
+                take_profit_price = entry_price * (1 + self.take_profit)
+        
+        # Close any remaining position at the end
+        if in_position:
+            # Giá trị indicator hợp lệ gần nhất (khác NaN và khác 0) cho từng cột
+            trades.append((entry_index, None, index[entry_index], index[-1], entry_price, current_price,
+                           'end_of_backtest', entry_indicators, snapshots.last_valid_at(n - 1)))
+        
+        return TradePlan(n, trades)
+    
+    def execute_plan(self, plan: TradePlan) -> tuple:
+        """
+        Apply initial_capital to a trade plan: size, phí, pnl và equity curve theo
+        đúng thứ tự phép tính của vòng lặp, O(số lệnh) thay vì O(số bar).
+        Returns (trades, equity, final_capital, total_fee).
+        """
+        # Equity curve cấp phát trước, equity[i] là vốn sau bar i; vốn chỉ đổi ở bar vào/ra lệnh
+        equity = np.empty(max(plan.n_bars, 1), dtype=np.float64)
+        trades = []
+        current_capital = self.initial_capital
+        total_fee = 0
+        filled = 0
+        
+        for entry_index, exit_index, entry_time, exit_time, entry_price, exit_price, exit_reason, \
+                entry_indicators, exit_indicators in plan.trades:
+            equity[filled:entry_index] = current_capital
+            position_size = (current_capital * self.position_size) / entry_price
+            # Taker fee khi vào lệnh
+            entry_fee = entry_price * position_size * self.taker_fee
+            current_capital -= entry_fee
+            total_fee += entry_fee
+            filled = entry_index
             
-            # if len(trades) > 5:
-            #     print(f"... và {len(trades)-5} trades khác")
+            pnl = (exit_price - entry_price) * position_size
+            pnl_pct = (exit_price - entry_price) / entry_price
+            exit_fee = exit_price * position_size * self.maker_fee
+            trades.append(self._make_trade_record(
+                entry_time, exit_time, entry_price, exit_price, position_size,
+                pnl, pnl_pct, exit_reason, entry_fee, exit_fee,
+                entry_indicators, exit_indicators
+            ))
+            if exit_index is not None:
+                equity[filled:exit_index] = current_capital
+                filled = exit_index
+            else:
+                # Lệnh đóng cuối backtest không thay đổi equity curve
+                equity[filled:] = current_capital
+                filled = len(equity)
+            current_capital += pnl - exit_fee
+            total_fee += exit_fee
         
-        total_return = (current_capital - self.initial_capital) / self.initial_capital * 100
+        equity[filled:] = current_capital
+        return trades, equity, current_capital, total_fee
+    
+    def run_plan(self, plan: TradePlan) -> Dict[str, Any]:
+        """Backtest results of a precomputed trade plan at this strategy's initial_capital"""
+        return self._build_results(*self.execute_plan(plan))
+    
+    @staticmethod
+    def _make_trade_record(entry_time, exit_time, entry_price: float, exit_price: float, size: float,
+                           pnl: float, pnl_pct: float, exit_reason: str, entry_fee: float, exit_fee: float,
+                           entry_indicators: Dict[str, Any], exit_indicators: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a trade record with the same layout as the reference loop"""
+        trade_record = {
+            'entry_time': entry_time,
+            'exit_time': exit_time,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'size': size,
+            'pnl': pnl - entry_fee - exit_fee,
+            'pnl_pct': pnl_pct,
+            'type': 'long',
+            'exit_reason': exit_reason,
+            'entry_fee': entry_fee,
+            'exit_fee': exit_fee
+        }
+        for key, value in entry_indicators.items():
+            trade_record[f'entry_{key}'] = value
+        for key, value in exit_indicators.items():
+            trade_record[f'exit_{key}'] = value
+        return trade_record
+    
+    def _build_results(self, trades: List[Dict[str, Any]], equity, current_capital: float,
+                       total_fee: float) -> Dict[str, Any]:
+        """
+        Calculate performance metrics from a finished simulation.
+        Drawdown và các tỷ lệ rủi ro được tính vector hóa trên toàn bộ equity curve.
+        """
+        equity = np.asarray(equity, dtype=np.float64)
+        trade_pnl = np.array([t['pnl'] for t in trades], dtype=np.float64)
+        trade_value = np.array([t['entry_price'] * t['size'] for t in trades], dtype=np.float64)
         
-        # Calculate Sharpe Ratio (assuming risk-free rate = 0)
-        returns = pd.Series(equity).pct_change().dropna()
-        sharpe_ratio = np.sqrt(252) * (returns.mean() / returns.std()) if len(returns) > 0 else 0
+        # Tỷ lệ lợi nhuận NET của từng giao dịch: pnl đã trừ phí / (entry_price * size)
+        for trade, net_pnl, entry_value in zip(trades, trade_pnl.tolist(), trade_value.tolist()):
+            trade['profit_ratio'] = (net_pnl / entry_value) * 100 if entry_value > 0 else 0
         
         return {
             'trades': trades,
-            'equity_curve': equity,
-            'performance': {
-                'total_return': total_return,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown * 100,
-                'total_trades': total_trades,
-                'winning_trades': winning_trades,
-                'losing_trades': losing_trades,
-                'win_rate': win_rate * 100,
-                'average_win': avg_win,
-                'average_loss': avg_loss,
-                'avg_win_net': avg_win_net,
-                'avg_loss_net': avg_loss_net,
-                'final_capital': current_capital,
-                'total_fee': total_fee
-            }
-        } 
\ No newline at end of file
+            'equity_curve': equity.tolist(),
+            'performance': performance_metrics.performance_summary(
+                trade_pnl, trade_value, equity, self.initial_capital, current_capital, total_fee
+            )
+        }
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Batched multi-period indicator kernels cho parameter sweep.
+
+Thay vì gọi rolling(window=p) riêng cho từng p, mỗi kernel tính cả vector window
+trong một lượt và trả về mảng 2-D (bars × periods), cột j ứng với windows[j]:
+
+- rolling sum/mean: một mảng cumulative sum, mỗi window chỉ là một phép trừ.
+  Các trường hợp đặc biệt của pandas được giữ (NaN/inf trong window -> NaN, window
+  toàn giá trị bằng nhau -> đúng giá trị đó, kẹp dấu theo số phần tử âm); phần còn
+  lại khác kết quả Kahan summation của pandas ở mức sai số làm tròn (~1e-12 tương đối).
+- rolling max/min: sparse table theo lũy thừa 2, mỗi window là max/min của hai
+  khối chồng nhau; giống hệt bit-for-bit Series.rolling(window).max()/min().
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+def _windows(windows: Sequence[int]) -> np.ndarray:
+    windows = np.asarray(windows, dtype=np.int64).ravel()
+    if (windows < 1).any():
+        raise ValueError("Rolling windows must be at least 1")
+    return windows
+
+def _clean(values) -> np.ndarray:
+    """Pandas coi inf là NaN trong các phép rolling"""
+    values = np.array(values, dtype=np.float64)
+    values[np.isinf(values)] = np.nan
+    return values
+
+# Bên trong kernel làm việc trên mảng periods × bars và xử lý từng window (một hàng
+# liền nhau, vừa cache) đến kết quả cuối trước khi sang window tiếp theo; kết quả
+# trả về là view chuyển vị bars × periods.
+
+def _empty_rows(windows: np.ndarray, n: int) -> np.ndarray:
+    """periods × bars, các bar chưa đủ window là NaN (phần còn lại được ghi sau)"""
+    out = np.empty((len(windows), n))
+    for j, window in enumerate(windows):
+        out[j, :min(window - 1, n)] = np.nan
+    return out
+
+class _RollingWindows:
+    """Phần tính chung cho mọi window: cumulative sum, đếm NaN/số âm, độ dài chuỗi bằng nhau"""
+
+    def __init__(self, values: np.ndarray):
+        n = len(values)
+        missing = np.isnan(values)
+        self.n = n
+        self.values = values
+        self.sums = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values))))
+        self.missing_counts = np.concatenate(([0], np.cumsum(missing, dtype=np.int64))) if missing.any() else None
+        # Độ dài chuỗi giá trị bằng nhau kết thúc tại mỗi bar (NaN cắt chuỗi)
+        same = np.zeros(n, dtype=bool)
+        same[1:] = values[1:] == values[:-1]
+        starts = np.where(same, 0, np.arange(n))
+        self.run_length = np.arange(n) - np.maximum.accumulate(starts) + 1 if n else np.zeros(0, dtype=np.int64)
+        self.longest_run = self.run_length.max() if n else 0
+        # Không có giá trị âm thật sự (chỉ có thể có -0.0): mean âm chỉ là sai số làm tròn
+        self.nonnegative = not (values < 0).any()
+        if not self.nonnegative:
+            negative = np.signbit(values) & ~missing
+            self.negative_counts = np.concatenate(([0], np.cumsum(negative, dtype=np.int64)))
+
+    def _counts(self, counts: np.ndarray, window: int) -> np.ndarray:
+        return counts[window:] - counts[:self.n - window + 1]
+
+    def _constant(self, window: int) -> np.ndarray:
+        return self.run_length[window - 1:] >= window
+
+    def sum_into(self, window: int, row: np.ndarray):
+        """Rolling sum của window vào row (các bar từ window - 1)"""
+        np.subtract(self.sums[window:], self.sums[:self.n - window + 1], out=row)
+        if self.missing_counts is not None:
+            row[self._counts(self.missing_counts, window) != 0] = np.nan
+        if self.longest_run >= window:
+            # Window toàn giá trị bằng nhau: value * window như pandas
+            constant = self._constant(window)
+            row[constant] = self.values[window - 1:][constant] * window
+
+    def mean_into(self, window: int, row: np.ndarray):
+        """Rolling mean của window vào row (các bar từ window - 1)"""
+        np.subtract(self.sums[window:], self.sums[:self.n - window + 1], out=row)
+        row /= window
+        if self.missing_counts is not None:
+            row[self._counts(self.missing_counts, window) != 0] = np.nan
+        # Kẹp dấu như pandas: không có phần tử âm thì mean không âm, toàn âm thì không dương
+        if self.nonnegative:
+            np.maximum(row, 0.0, out=row)
+        else:
+            negatives = self._counts(self.negative_counts, window)
+            row[(negatives == 0) & (row < 0)] = 0.0
+            row[(negatives == window) & (row > 0)] = 0.0
+        if self.longest_run >= window:
+            # Window toàn giá trị bằng nhau: đúng giá trị đó
+            constant = self._constant(window)
+            row[constant] = self.values[window - 1:][constant]
+
+def rolling_sum_batch(values, windows: Sequence[int]) -> np.ndarray:
+    """Rolling sums (min_periods = window) cho nhiều window từ một cumulative sum, bars × periods"""
+    windows = _windows(windows)
+    context = _RollingWindows(_clean(values))
+    out = _empty_rows(windows, context.n)
+    for j, window in enumerate(windows):
+        if window <= context.n:
+            context.sum_into(window, out[j, window - 1:])
+    return out.T
+
+def rolling_mean_batch(values, windows: Sequence[int]) -> np.ndarray:
+    """
+    Rolling means (min_periods = window) cho nhiều window, bars × periods.
+    Window mà mọi giá trị bằng nhau trả về đúng giá trị đó (như pandas), nên ví dụ
+    window toàn 0 cho đúng 0 thay vì sai số của phép trừ cumulative sum.
+    """
+    windows = _windows(windows)
+    context = _RollingWindows(_clean(values))
+    out = _empty_rows(windows, context.n)
+    for j, window in enumerate(windows):
+        if window <= context.n:
+            context.mean_into(window, out[j, window - 1:])
+    return out.T
+
+def _rolling_extreme_batch(values, windows: Sequence[int], pick) -> np.ndarray:
+    windows = _windows(windows)
+    values = _clean(values)
+    n = len(values)
+    out = np.full((len(windows), n), np.nan)
+    # level[i] = extreme của values[i - 2^k + 1 .. i]; NaN lan truyền (min_periods = window)
+    level, size = values, 1
+    levels = np.floor(np.log2(windows)).astype(np.int64)
+    for k in range(int(levels.max()) + 1 if len(windows) else 0):
+        if k > 0:
+            previous = level
+            level = np.full(n, np.nan)
+            level[size * 2 - 1:] = pick(previous[size * 2 - 1:], previous[size - 1:n - size])
+            size *= 2
+        for j in np.flatnonzero(levels == k):
+            window = windows[j]
+            if window <= n:
+                # Hai khối độ dài 2^k: kết thúc tại i và bắt đầu tại i - window + 1
+                out[j, window - 1:] = pick(level[window - 1:], level[size - 1:n - window + size])
+    return out.T
+
+def rolling_max_batch(values, windows: Sequence[int]) -> np.ndarray:
+    """Rolling max (min_periods = window) cho nhiều window, bars × periods"""
+    return _rolling_extreme_batch(values, windows, np.maximum)
+
+def rolling_min_batch(values, windows: Sequence[int]) -> np.ndarray:
+    """Rolling min (min_periods = window) cho nhiều window, bars × periods"""
+    return _rolling_extreme_batch(values, windows, np.minimum)
+
+def rsi_batch(close, periods: Sequence[int]) -> np.ndarray:
+    """
+    RSI (SMA của gain/loss, như RSIStrategy.calculate_rsi) cho nhiều period, bars × periods.
+    Gain/loss và cumulative sum chỉ được tính một lần; mỗi period thêm vài phép tính trên một hàng.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    delta = np.full(n, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    # Giống delta.where(delta > 0, 0) và -delta.where(delta < 0, 0) (bar đầu là 0)
+    gain = _RollingWindows(_clean(np.where(delta > 0, delta, 0.0)))
+    loss = _RollingWindows(_clean(-np.where(delta < 0, delta, 0.0)))
+    periods = _windows(periods)
+    out = _empty_rows(periods, n)
+    buffer = np.empty(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for j, period in enumerate(periods):
+            if period > n:
+                continue
+            row, loss_row = out[j, period - 1:], buffer[period - 1:]
+            gain.mean_into(period, row)
+            loss.mean_into(period, loss_row)
+            # 100 - (100 / (1 + gain / loss)), tại chỗ
+            row /= loss_row
+            row += 1
+            np.divide(100, row, out=row)
+            np.subtract(100, row, out=row)
+    return out.T
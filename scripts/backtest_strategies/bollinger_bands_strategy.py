@@ -1,19 +1,30 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import RollingMean, RollingStd
+from signal_kernels import signal_column, as_array
 
 class BollingerBandsStrategy(BaseStrategy):
+    indicator_columns = ['upper', 'middle', 'lower']
+    
     def __init__(self, config):
         super().__init__(config)
         self.period = self.strategy_config['parameters'].get('period', 20)
         self.std_dev = self.strategy_config['parameters'].get('stdDev', 2)
     
-    def calculate_bollinger_bands(self, data: pd.Series) -> tuple:
+    @property
+    def warmup_bars(self) -> int:
+        # SMA/std rolling period
+        return self.period - 1
+
+    def calculate_bollinger_bands(self, data: pd.DataFrame) -> tuple:
+        store = self.indicators(data)
+        
         # Calculate middle band (SMA)
-        middle_band = data.rolling(window=self.period).mean()
+        middle_band = store.sma('close', self.period)
         
         # Calculate standard deviation
-        std = data.rolling(window=self.period).std()
+        std = store.rolling_std('close', self.period)
         
         # Calculate upper and lower bands
         upper_band = middle_band + (std * self.std_dev)
@@ -25,13 +36,50 @@ class BollingerBandsStrategy(BaseStrategy):
         df = data.copy()
         
         # Calculate Bollinger Bands
-        df['upper'], df['middle'], df['lower'] = self.calculate_bollinger_bands(df['close'])
+        df['upper'], df['middle'], df['lower'] = self.cached_indicator(
+            data, ('bollinger_bands', self.period, self.std_dev),
+            lambda: self.calculate_bollinger_bands(data)
+        )
         
         # Generate signals
-        df['signal'] = 0
+        df['signal'] = signal_column(*self.signal_rules(df['close'], df['upper'], df['lower']))
+        
+        return df
+    
+    def signal_array(self, data):
+        upper, _, lower = self.cached_indicator(
+            data, ('bollinger_bands', self.period, self.std_dev),
+            lambda: self.calculate_bollinger_bands(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], upper, lower))
+    
+    def signal_rules(self, close, upper, lower):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        close, upper, lower = as_array(close), as_array(upper), as_array(lower)
         # Buy when price crosses below lower band
-        df.loc[df['close'] < df['lower'], 'signal'] = 1
+        buy = close < lower
         # Sell when price crosses above upper band
-        df.loc[df['close'] > df['upper'], 'signal'] = -1
+        sell = close > upper
+        return buy, sell
+    
+    def panel_signals(self, panel):
+        upper, _, lower = self.calculate_bollinger_bands(panel)
+        return self.combine_signals(panel['close'], *self.signal_rules(panel['close'], upper, lower))
+    
+    def _init_stream(self):
+        self._middle = RollingMean(self.period)
+        self._std = RollingStd(self.period)
+    
+    def _on_bar(self, bar) -> int:
+        close = float(bar['close'])
+        middle = self._middle.update(close)
+        std = self._std.update(close)
+        upper = middle + (std * self.std_dev)
+        lower = middle - (std * self.std_dev)
         
-        return df 
\ No newline at end of file
+        signal = 0
+        if close < lower:
+            signal = 1
+        if close > upper:
+            signal = -1
+        return signal
\ No newline at end of file
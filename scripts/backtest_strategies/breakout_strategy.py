@@ -1,17 +1,28 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import RollingMax, RollingMin
+from signal_kernels import signal_column, as_array
 
 class BreakoutStrategy(BaseStrategy):
+    indicator_columns = ['upper_channel', 'lower_channel']
+    
     def __init__(self, config):
         super().__init__(config)
         self.channel_period = self.strategy_config['parameters'].get('channelPeriod', 20)
         self.multiplier = self.strategy_config['parameters'].get('multiplier', 2)
     
-    def calculate_channels(self, data: pd.Series) -> tuple:
-        # Calculate rolling high and low
-        rolling_high = data.rolling(window=self.channel_period).max()
-        rolling_low = data.rolling(window=self.channel_period).min()
+    @property
+    def warmup_bars(self) -> int:
+        # Rolling max/min của close
+        return self.channel_period - 1
+
+    def calculate_channels(self, data: pd.DataFrame) -> tuple:
+        store = self.indicators(data)
+        
+        # Calculate rolling high and low (của giá close)
+        rolling_high = store.rolling_max('close', self.channel_period)
+        rolling_low = store.rolling_min('close', self.channel_period)
         
         # Calculate channel middle and width
         channel_middle = (rolling_high + rolling_low) / 2
@@ -23,17 +34,63 @@ class BreakoutStrategy(BaseStrategy):
         
         return upper_channel, lower_channel
     
+    @classmethod
+    def prefill_indicators(cls, store, strategies):
+        """Rolling max/min của close cho mọi channel_period trong sweep (sparse table)"""
+        periods = [s.channel_period for s in strategies]
+        store.prefill('rolling_max', 'close', periods)
+        store.prefill('rolling_min', 'close', periods)
+    
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         df = data.copy()
         
         # Calculate channels
-        df['upper_channel'], df['lower_channel'] = self.calculate_channels(df['close'])
+        df['upper_channel'], df['lower_channel'] = self.cached_indicator(
+            data, ('breakout_channels', self.channel_period, self.multiplier),
+            lambda: self.calculate_channels(data)
+        )
         
         # Generate signals
-        df['signal'] = 0
+        df['signal'] = signal_column(*self.signal_rules(df['close'], df['upper_channel'], df['lower_channel']))
+        
+        return df
+    
+    def signal_array(self, data):
+        upper_channel, lower_channel = self.cached_indicator(
+            data, ('breakout_channels', self.channel_period, self.multiplier),
+            lambda: self.calculate_channels(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], upper_channel, lower_channel))
+    
+    def signal_rules(self, close, upper_channel, lower_channel):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        close, upper_channel, lower_channel = as_array(close), as_array(upper_channel), as_array(lower_channel)
         # Buy when price breaks above upper channel
-        df.loc[df['close'] > df['upper_channel'], 'signal'] = 1
+        buy = close > upper_channel
         # Sell when price breaks below lower channel
-        df.loc[df['close'] < df['lower_channel'], 'signal'] = -1
+        sell = close < lower_channel
+        return buy, sell
+    
+    def panel_signals(self, panel):
+        upper_channel, lower_channel = self.calculate_channels(panel)
+        return self.combine_signals(panel['close'], *self.signal_rules(panel['close'], upper_channel, lower_channel))
+    
+    def _init_stream(self):
+        self._high = RollingMax(self.channel_period)
+        self._low = RollingMin(self.channel_period)
+    
+    def _on_bar(self, bar) -> int:
+        close = float(bar['close'])
+        rolling_high = self._high.update(close)
+        rolling_low = self._low.update(close)
+        channel_middle = (rolling_high + rolling_low) / 2
+        channel_width = rolling_high - rolling_low
+        upper_channel = channel_middle + (channel_width * self.multiplier)
+        lower_channel = channel_middle - (channel_width * self.multiplier)
         
-        return df 
\ No newline at end of file
+        signal = 0
+        if close > upper_channel:
+            signal = 1
+        if close < lower_channel:
+            signal = -1
+        return signal
\ No newline at end of file
@@ -2,6 +2,10 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Tuple
 from base_strategy import BaseStrategy
+from resample_pyramid import resample_levels
+
+# Timeframe hỗ trợ cho multi-timeframe analysis (timeframe khác dùng nguyên data)
+MULTI_TIMEFRAMES = ['1m', '5m', '15m', '30m', '1h', '4h', '1d', '1w']
 
 class EnhancedStrategy(BaseStrategy):
     """
@@ -88,9 +92,12 @@ class EnhancedStrategy(BaseStrategy):
         """
         signals = {}
         
+        # Resample một lần cho mọi timeframe: timeframe lớn được gộp từ timeframe nhỏ hơn
+        resampled = self._resample_levels(data)
+        
         for i, timeframe in enumerate(self.timeframes):
             # Resample data to timeframe
-            resampled_data = self._resample_data(data, timeframe)
+            resampled_data = resampled[timeframe]
             
             # Generate signals for this timeframe
             timeframe_signals = self._generate_single_timeframe_signals(resampled_data)
@@ -102,28 +109,22 @@ class EnhancedStrategy(BaseStrategy):
         
         return signals
     
+    def _resample_levels(self, data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Resample OHLCV data to every configured timeframe (memoize theo data)
+        """
+        supported = [timeframe for timeframe in self.timeframes if timeframe in MULTI_TIMEFRAMES]
+        levels = self.cached_indicator(data, ('resample_levels', tuple(supported)),
+                                       lambda: resample_levels(data, supported))
+        return {timeframe: levels.get(timeframe, data) for timeframe in self.timeframes}
+    
     def _resample_data(self, data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
         """
         Resample OHLCV data to different timeframe
         """
-        timeframe_map = {
-            '1m': '1T', '5m': '5T', '15m': '15T', '30m': '30T',
-            '1h': 'H', '4h': '4H', '1d': 'D', '1w': 'W'
-        }
-        
-        rule = timeframe_map.get(timeframe)
-        if not rule:
+        if timeframe not in MULTI_TIMEFRAMES:
             return data
-        
-        resampled = data.resample(rule).agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).dropna()
-        
-        return resampled
+        return resample_levels(data, [timeframe])[timeframe]
     
     def _resample_signals_back(self, signals: pd.DataFrame, target_index: pd.DatetimeIndex) -> pd.DataFrame:
         """
@@ -0,0 +1,178 @@
+import pandas as pd
+import numpy as np
+from collections import deque
+from base_strategy import BaseStrategy
+
+# Cách gộp signal: 'vote' (số member đồng ý) hoặc 'weighted' (trung bình có trọng số)
+ENSEMBLE_METHODS = ['vote', 'weighted']
+# 'vote': member tham gia bỏ phiếu; 'filter': chỉ cho phép vào lệnh khi member đang ở trạng thái buy
+MEMBER_ROLES = ['vote', 'filter']
+
+DEFAULT_MEMBERS = [{'type': 'rsi'}, {'type': 'macd'}, {'type': 'adx', 'role': 'filter'}]
+
+class EnsembleStrategy(BaseStrategy):
+    """
+    Nhiều strategy trên cùng một dataset, signal được gộp theo voting hoặc trọng số.
+
+    Mỗi member là {'type', 'parameters', 'weight', 'role', 'name'}; trading và risk
+    settings lấy từ config của ensemble. Signal buy/sell của một member được giữ trong
+    holdBars bar (hoặc tới signal ngược chiều) để các member không cần phát signal
+    đúng cùng một bar. Ensemble phát buy/sell khi trạng thái gộp chuyển sang 1/-1.
+    Các member dùng chung một IndicatorStore nên indicator chung chỉ tính một lần.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        # strategy_registry import module này nên chỉ import khi khởi tạo
+        from strategy_registry import get_strategy_class, build_strategy_config
+
+        # Tham số None (ví dụ từ config phẳng của patch runner) dùng giá trị mặc định
+        parameters = {k: v for k, v in self.strategy_config['parameters'].items() if v is not None}
+        self.method = parameters.get('method', 'vote')
+        self.hold_bars = int(parameters.get('holdBars', 10))
+        self.threshold = float(parameters.get('threshold', 0.5))
+        if self.method not in ENSEMBLE_METHODS:
+            raise ValueError(f"Unknown ensemble method '{self.method}', expected one of {ENSEMBLE_METHODS}")
+        if self.hold_bars < 1:
+            raise ValueError("holdBars must be at least 1")
+
+        self.members, self.member_names, roles, weights = [], [], [], []
+        member_config = {**config, 'strategy': {}}
+        for spec in parameters.get('members') or DEFAULT_MEMBERS:
+            member_type = spec['type']
+            if member_type == 'ensemble':
+                raise ValueError("Ensemble members cannot be ensembles")
+            role = spec.get('role', 'vote')
+            if role not in MEMBER_ROLES:
+                raise ValueError(f"Unknown member role '{role}', expected one of {MEMBER_ROLES}")
+            name = spec.get('name', member_type)
+            if name in self.member_names:
+                name = f"{name}_{len(self.member_names) + 1}"
+            self.members.append(get_strategy_class(member_type)(
+                build_strategy_config(member_config, member_type, spec.get('parameters', {}))))
+            self.member_names.append(name)
+            roles.append(role)
+            weights.append(float(spec.get('weight', 1.0)))
+
+        self.voters = [j for j, role in enumerate(roles) if role == 'vote']
+        self.filters = [j for j, role in enumerate(roles) if role == 'filter']
+        if not self.voters:
+            raise ValueError("Ensemble needs at least one voting member")
+        self.weights = [weights[j] for j in self.voters]
+        self.total_weight = sum(abs(w) for w in self.weights)
+        # Mặc định đa số các member bỏ phiếu
+        self.min_votes = int(parameters.get('minVotes', len(self.voters) // 2 + 1))
+
+        # Cột indicator của member có tiền tố tên member (ví dụ 'rsi_rsi', 'macd_macd')
+        self.indicator_columns, self.indicator_labels = [], {}
+        for name, member in zip(self.member_names, self.members):
+            for col in member.indicator_columns or []:
+                self.indicator_columns.append(f'{name}_{col}')
+                if col in member.indicator_labels:
+                    self.indicator_labels[f'{name}_{col}'] = f'{name}_{member.indicator_labels[col]}'
+        self.indicator_columns.append('ensemble_score')
+
+        self.signal_lag = max(member.signal_lag for member in self.members)
+
+    @property
+    def warmup_bars(self) -> int:
+        # Signal của member cần warm-up riêng, trạng thái giữ holdBars bar, so sánh với bar trước
+        return max(member.warmup_bars for member in self.members) + self.hold_bars
+
+    def _share_store(self, data):
+        store = self.indicators(data)
+        for member in self.members:
+            member.indicator_store = store
+
+    def held_states(self, signals: np.ndarray) -> np.ndarray:
+        """Signal member (bars × members) -> signal khác 0 gần nhất trong holdBars bar, else 0"""
+        positions = np.arange(len(signals))[:, None]
+        last = np.maximum.accumulate(np.where(signals != 0, positions, -1), axis=0)
+        states = np.take_along_axis(signals, np.maximum(last, 0), axis=0)
+        states[(last < 0) | (positions - last >= self.hold_bars)] = 0
+        return states
+
+    def combine_states(self, states: np.ndarray) -> tuple:
+        """
+        Trạng thái member (bars × members) -> (score, trạng thái gộp 1/-1/0).
+        vote: score = số phiếu buy - sell; weighted: trung bình có trọng số trong [-1, 1].
+        """
+        votes = states[:, self.voters]
+        if self.method == 'vote':
+            buys = (votes == 1).sum(axis=1)
+            sells = (votes == -1).sum(axis=1)
+            score = (buys - sells).astype(np.float64)
+            combined = np.where((buys >= self.min_votes) & (buys > sells), 1,
+                                np.where((sells >= self.min_votes) & (sells > buys), -1, 0))
+        else:
+            score = np.zeros(len(states))
+            for k, weight in enumerate(self.weights):
+                score = score + weight * votes[:, k]
+            score = score / self.total_weight if self.total_weight > 0 else score
+            combined = np.where(score > self.threshold, 1, np.where(score < -self.threshold, -1, 0))
+        if self.filters:
+            # Filter chỉ chặn lệnh vào; lệnh ra luôn được phép
+            combined[(combined == 1) & ~(states[:, self.filters] == 1).all(axis=1)] = 0
+        return score, combined
+
+    def combine_member_signals(self, signals: np.ndarray) -> tuple:
+        """Signal member (bars × members) -> (score, int8 signal khi trạng thái gộp đổi sang 1/-1)"""
+        score, combined = self.combine_states(self.held_states(signals))
+        previous = np.zeros_like(combined)
+        previous[1:] = combined[:-1]
+        signal = np.where((combined != 0) & (combined != previous), combined, 0).astype(np.int8)
+        if self.signal_lag > 0:
+            # Member có lag (Ichimoku) chưa có signal cuối cùng cho signal_lag bar cuối
+            signal[max(len(signal) - self.signal_lag, 0):] = 0
+        return score, signal
+
+    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        df = data.copy()
+        self._share_store(data)
+
+        signals = np.empty((len(data), len(self.members)), dtype=np.int8)
+        for j, (name, member) in enumerate(zip(self.member_names, self.members)):
+            frame = member.generate_signals(data)
+            signals[:, j] = frame['signal'].to_numpy()
+            for col in member.indicator_columns or []:
+                df[f'{name}_{col}'] = frame[col]
+
+        score, signal = self.combine_member_signals(signals)
+        df['ensemble_score'] = score
+        df['signal'] = signal
+        return df
+
+    def signal_array(self, data):
+        self._share_store(data)
+        signals = np.column_stack([member.signal_array(data) for member in self.members])
+        return self.combine_member_signals(signals)[1]
+
+    def _init_stream(self):
+        for member in self.members:
+            member.reset_stream()
+        # Output của member j tại bar t là signal của bar t - lag_j; ensemble phát signal
+        # của bar t - signal_lag nên giữ signal_lag - lag_j + 1 output gần nhất
+        self._pending = [deque(maxlen=self.signal_lag - member.signal_lag + 1) for member in self.members]
+        self._last_signal = [0] * len(self.members)
+        self._last_bar = [None] * len(self.members)
+        self._bar_count = 0
+        self._prev_combined = 0
+
+    def _on_bar(self, bar) -> int:
+        for member, pending in zip(self.members, self._pending):
+            pending.append(member.update(bar))
+        i = self._bar_count - self.signal_lag
+        self._bar_count += 1
+        if i < 0:
+            return 0
+
+        states = np.zeros((1, len(self.members)), dtype=np.int8)
+        for j, pending in enumerate(self._pending):
+            if pending[0] != 0:
+                self._last_signal[j], self._last_bar[j] = pending[0], i
+            if self._last_bar[j] is not None and i - self._last_bar[j] < self.hold_bars:
+                states[0, j] = self._last_signal[j]
+        _, combined = self.combine_states(states)
+        combined = int(combined[0])
+        previous, self._prev_combined = self._prev_combined, combined
+        return combined if combined != 0 and combined != previous else 0
@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
+from collections import deque
 from base_strategy import BaseStrategy
+from streaming_indicators import NaN, RollingMax, RollingMin
+from signal_kernels import signal_column, as_array, crosses_above, crosses_below, shift
 
 class IchimokuStrategy(BaseStrategy):
+    indicator_columns = ['tenkan', 'kijun', 'senkou_span_a', 'senkou_span_b', 'chikou']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -12,27 +17,35 @@ class IchimokuStrategy(BaseStrategy):
         self.senkou_span_b_period = int(self.strategy_config.get('senkou_span_b_period', 52))
         self.displacement = int(self.strategy_config.get('displacement', 26))
         self.confirmation_periods = int(self.strategy_config.get('confirmation_periods', 2))
+        
+        # Chikou = close.shift(-displacement) nhìn trước displacement bar, nên khi
+        # streaming signal của bar i chỉ xác định được khi bar i + displacement đóng
+        self.signal_lag = self.displacement
     
+    @property
+    def warmup_bars(self) -> int:
+        # Span dài nhất (senkou B) dịch đi displacement bar
+        return max(self.tenkan_period, self.kijun_period, self.senkou_span_b_period) - 1 + self.displacement
+
     def calculate_ichimoku(self, data):
         """Calculate Ichimoku Cloud components"""
-        high = data['high']
-        low = data['low']
+        store = self.indicators(data)
         close = data['close']
         
         # Tenkan-sen (Conversion Line)
-        tenkan = (high.rolling(window=self.tenkan_period).max() + 
-                  low.rolling(window=self.tenkan_period).min()) / 2
+        tenkan = (store.rolling_max('high', self.tenkan_period) + 
+                  store.rolling_min('low', self.tenkan_period)) / 2
         
         # Kijun-sen (Base Line)
-        kijun = (high.rolling(window=self.kijun_period).max() + 
-                low.rolling(window=self.kijun_period).min()) / 2
+        kijun = (store.rolling_max('high', self.kijun_period) + 
+                store.rolling_min('low', self.kijun_period)) / 2
         
         # Senkou Span A (Leading Span A)
         senkou_span_a = ((tenkan + kijun) / 2).shift(self.displacement)
         
         # Senkou Span B (Leading Span B)
-        senkou_span_b = ((high.rolling(window=self.senkou_span_b_period).max() + 
-                          low.rolling(window=self.senkou_span_b_period).min()) / 2).shift(self.displacement)
+        senkou_span_b = ((store.rolling_max('high', self.senkou_span_b_period) + 
+                          store.rolling_min('low', self.senkou_span_b_period)) / 2).shift(self.displacement)
         
         # Chikou Span (Lagging Span)
         chikou = close.shift(-self.displacement)
@@ -44,36 +57,100 @@ class IchimokuStrategy(BaseStrategy):
         signals = data.copy()
         
         # Calculate Ichimoku components
-        tenkan, kijun, senkou_span_a, senkou_span_b, chikou = self.calculate_ichimoku(data)
+        tenkan, kijun, senkou_span_a, senkou_span_b, chikou = self.cached_indicator(
+            data, ('ichimoku', self.tenkan_period, self.kijun_period, self.senkou_span_b_period, self.displacement),
+            lambda: self.calculate_ichimoku(data)
+        )
         signals['tenkan'] = tenkan
         signals['kijun'] = kijun
         signals['senkou_span_a'] = senkou_span_a
         signals['senkou_span_b'] = senkou_span_b
         signals['chikou'] = chikou
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(data['close'], tenkan, kijun, senkou_span_a, senkou_span_b, chikou))
+        
+        return signals
+    
+    def signal_array(self, data):
+        components = self.cached_indicator(
+            data, ('ichimoku', self.tenkan_period, self.kijun_period, self.senkou_span_b_period, self.displacement),
+            lambda: self.calculate_ichimoku(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], *components))
+    
+    def signal_rules(self, close, tenkan, kijun, senkou_span_a, senkou_span_b, chikou):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        close, senkou_span_a, senkou_span_b, chikou = (as_array(close), as_array(senkou_span_a),
+                                                       as_array(senkou_span_b), as_array(chikou))
+        # Chikou so sánh với giá 26 kỳ trước
+        displaced_close = shift(close, self.displacement)
         
         # Generate buy signals
         # Buy when price is above cloud, tenkan crosses above kijun, and chikou confirms
         buy_condition = (
-            (data['close'] > senkou_span_a) & 
-            (data['close'] > senkou_span_b) & 
-            (tenkan > kijun) & 
-            (tenkan.shift(1) <= kijun.shift(1)) & 
-            (chikou > data['close'].shift(self.displacement))  # Chikou so sánh với giá 26 kỳ trước
+            (close > senkou_span_a) & 
+            (close > senkou_span_b) & 
+            crosses_above(tenkan, kijun) & 
+            (chikou > displaced_close)
         )
-        signals.loc[buy_condition, 'signal'] = 1
         
         # Generate sell signals
         # Sell when price is below cloud, tenkan crosses below kijun, and chikou confirms
         sell_condition = (
-            (data['close'] < senkou_span_a) & 
-            (data['close'] < senkou_span_b) & 
-            (tenkan < kijun) & 
-            (tenkan.shift(1) >= kijun.shift(1)) & 
-            (chikou < data['close'].shift(self.displacement))  # Chikou so sánh với giá 26 kỳ trước
+            (close < senkou_span_a) & 
+            (close < senkou_span_b) & 
+            crosses_below(tenkan, kijun) & 
+            (chikou < displaced_close)
         )
-        signals.loc[sell_condition, 'signal'] = -1
+        return buy_condition, sell_condition
+    
+    def panel_signals(self, panel):
+        """Vectorized Ichimoku signals for a bars × symbols panel"""
+        return self.combine_signals(panel['close'], *self.signal_rules(panel['close'], *self.calculate_ichimoku(panel)))
+    
+    def _init_stream(self):
+        self._tenkan_high = RollingMax(self.tenkan_period)
+        self._tenkan_low = RollingMin(self.tenkan_period)
+        self._kijun_high = RollingMax(self.kijun_period)
+        self._kijun_low = RollingMin(self.kijun_period)
+        self._span_b_high = RollingMax(self.senkou_span_b_period)
+        self._span_b_low = RollingMin(self.senkou_span_b_period)
+        # (close, tenkan, kijun, span_a chưa dịch, span_b chưa dịch) của 2*displacement + 2 bar gần nhất
+        self._history = deque(maxlen=2 * self.displacement + 2)
+        self._bar_count = 0
+    
+    def _history_at(self, k):
+        """Record of bar k, or None if it is before the first bar"""
+        first = self._bar_count - len(self._history)
+        if k < first:
+            return None
+        return self._history[k - first]
+    
+    def _on_bar(self, bar):
+        """Incremental Ichimoku signal for bar (current - displacement)"""
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        tenkan = (self._tenkan_high.update(high) + self._tenkan_low.update(low)) / 2
+        kijun = (self._kijun_high.update(high) + self._kijun_low.update(low)) / 2
+        span_b = (self._span_b_high.update(high) + self._span_b_low.update(low)) / 2
+        self._history.append((close, tenkan, kijun, (tenkan + kijun) / 2, span_b))
+        self._bar_count += 1
         
-        return signals
+        i = self._bar_count - 1 - self.displacement
+        if i < 0:
+            return 0
+        close, tenkan, kijun, _, _ = self._history_at(i)
+        chikou = self._history_at(i + self.displacement)[0]
+        previous = self._history_at(i - 1)
+        lagged = self._history_at(i - self.displacement)
+        prev_tenkan, prev_kijun = (previous[1], previous[2]) if previous else (NaN, NaN)
+        lagged_close, senkou_span_a, senkou_span_b = (lagged[0], lagged[3], lagged[4]) if lagged else (NaN, NaN, NaN)
+        
+        signal = 0
+        if (close > senkou_span_a and close > senkou_span_b and tenkan > kijun
+                and prev_tenkan <= prev_kijun and chikou > lagged_close):
+            signal = 1
+        if (close < senkou_span_a and close < senkou_span_b and tenkan < kijun
+                and prev_tenkan >= prev_kijun and chikou < lagged_close):
+            signal = -1
+        return signal
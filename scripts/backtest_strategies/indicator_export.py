@@ -0,0 +1,52 @@
+"""
+Xuất indicator của signal frame cho chart.
+
+Mỗi strategy khai báo indicator_columns (các cột indicator cần xuất) và
+indicator_labels (tên key trong output nếu khác tên cột), nên runner không cần
+biết strategy nào có cột gì. Các series là view của cột trong signal frame
+(mảng NumPy, không chuyển từng phần tử); decimation > 1 giữ mỗi bar thứ
+decimation để giảm kích thước chart.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from serialization import epoch_millis
+
+# Các cột không phải indicator trong signal frame
+NON_INDICATOR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'signal']
+
+def indicator_columns_of(signals: pd.DataFrame) -> List[str]:
+    """Mọi cột indicator của signal frame (dùng khi strategy không khai báo)"""
+    return [col for col in signals.columns if col not in NON_INDICATOR_COLUMNS]
+
+def export_indicators(signals: pd.DataFrame, columns: Optional[List[str]] = None,
+                      labels: Optional[Dict[str, str]] = None, decimation: int = 1) -> Dict[str, Any]:
+    """
+    Chart data of a signal frame: timestamps (epoch ms), close_prices và
+    indicators {label: values}. Cột khai báo nhưng không có trong frame được bỏ qua.
+    """
+    step = max(1, int(decimation))
+    if columns is None:
+        columns = indicator_columns_of(signals)
+    labels = labels or {}
+    return {
+        'timestamps': epoch_millis(signals.index)[::step],
+        'close_prices': signals['close'].to_numpy()[::step],
+        'indicators': {labels.get(col, col): signals[col].to_numpy()[::step]
+                       for col in columns if col in signals.columns}
+    }
+
+def decimate_indicators(indicators: Dict[str, Any], decimation: int) -> Dict[str, Any]:
+    """Keep every decimation-th bar of already exported chart data"""
+    step = max(1, int(decimation))
+    if step == 1:
+        return indicators
+    return {
+        'timestamps': np.asarray(indicators.get('timestamps', []))[::step],
+        'close_prices': np.asarray(indicators.get('close_prices', []), dtype=float)[::step],
+        'indicators': {name: np.asarray(values, dtype=float)[::step]
+                       for name, values in indicators.get('indicators', {}).items()}
+    }
@@ -0,0 +1,330 @@
+"""
+Compiled-style indicator kernels cho các indicator có đệ quy theo bar.
+
+Kernel làm việc trên mảng thô với trạng thái nằm trong biến local thay vì truy
+cập Series.iloc cho từng bar. Nếu numba được cài, kernel được JIT-compile;
+nếu không, cùng thân hàm chạy như vòng lặp Python trên list (nhanh hơn nhiều
+so với iloc). Parabolic SAR có vòng lặp Python riêng tối ưu cho trường hợp không
+có numba; rolling mean (ADX smoothing 'sma') dùng pandas rolling vì
+vòng lặp Python chậm hơn bản C. Kết quả giống hệt bit-for-bit với implementation gốc.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba là optional
+    njit = None
+
+def _parabolic_sar_loop(high, low, close, acceleration, maximum, sar, trend):
+    """Parabolic SAR recursion; ghi kết quả vào sar/trend đã cấp phát sẵn"""
+    n = len(close)
+    if n == 0:
+        return
+    prev_sar = low[0]
+    prev_trend = 1.0  # 1 for uptrend, -1 for downtrend
+    af = acceleration
+    ep = high[0]
+    sar[0] = prev_sar
+    trend[0] = prev_trend
+
+    for i, h, l, c in zip(range(1, n), high[1:], low[1:], close[1:]):
+        value = prev_sar + af * (ep - prev_sar)
+        # Uptrend
+        if prev_trend == 1:
+            # Check if SAR is above low
+            if value > l:
+                value = l
+            # Check for trend reversal
+            if c < value:
+                prev_trend = -1.0
+                value = ep
+                af = acceleration
+                ep = l
+            elif h > ep:
+                ep = h
+                af += acceleration
+                if af > maximum:
+                    af = maximum
+        # Downtrend
+        else:
+            # Check if SAR is below high
+            if value < h:
+                value = h
+            # Check for trend reversal
+            if c > value:
+                prev_trend = 1.0
+                value = ep
+                af = acceleration
+                ep = h
+            elif l < ep:
+                ep = l
+                af += acceleration
+                if af > maximum:
+                    af = maximum
+        prev_sar = value
+        sar[i] = value
+        trend[i] = prev_trend
+
+_parabolic_sar_jit = njit(cache=True)(_parabolic_sar_loop) if njit is not None else None
+
+def _parabolic_sar_python(high, low, close, acceleration, maximum):
+    """
+    Cùng recursion với _parabolic_sar_loop, tối ưu cho Python thuần (không có numba):
+    append vào list thay vì gán theo index và chỉ ghi lại các bar đảo chiều thay vì
+    trend từng bar. Trả về (sar list, danh sách index bar đảo chiều).
+    """
+    if len(close) == 0:
+        return [], []
+    prev_sar = low[0]
+    uptrend = True
+    af = acceleration
+    ep = high[0]
+    sar = [prev_sar]
+    append = sar.append
+    reversals = []
+
+    for h, l, c in zip(high[1:], low[1:], close[1:]):
+        value = prev_sar + af * (ep - prev_sar)
+        if uptrend:
+            if value > l:
+                value = l
+            if c < value:
+                uptrend = False
+                reversals.append(len(sar))
+                value = ep
+                af = acceleration
+                ep = l
+            elif h > ep:
+                ep = h
+                af += acceleration
+                if af > maximum:
+                    af = maximum
+        else:
+            if value < h:
+                value = h
+            if c > value:
+                uptrend = True
+                reversals.append(len(sar))
+                value = ep
+                af = acceleration
+                ep = h
+            elif l < ep:
+                ep = l
+                af += acceleration
+                if af > maximum:
+                    af = maximum
+        prev_sar = value
+        append(value)
+    return sar, reversals
+
+def parabolic_sar(high, low, close, acceleration: float, maximum: float,
+                  use_jit: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parabolic SAR on raw arrays. Returns (sar, trend) as float64 arrays.
+    use_jit=False luôn dùng vòng lặp Python (để đối chiếu trong test).
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    if use_jit and _parabolic_sar_jit is not None:
+        sar = np.zeros(n)
+        trend = np.zeros(n)
+        _parabolic_sar_jit(high, low, close, float(acceleration), float(maximum), sar, trend)
+        return sar, trend
+
+    # memoryview trả về float Python khi duyệt (nhanh như list, không tốn bước tolist);
+    # numpy scalar chậm hơn nhiều
+    high, low, close = (memoryview(np.ascontiguousarray(values)) for values in (high, low, close))
+    sar, reversals = _parabolic_sar_python(high, low, close, float(acceleration), float(maximum))
+    # Trend bắt đầu là uptrend và đổi chiều ở mỗi bar đảo chiều
+    flips = np.zeros(n, dtype=np.int64)
+    flips[reversals] = 1
+    trend = np.where(np.cumsum(flips) % 2 == 0, 1.0, -1.0)
+    return np.array(sar, dtype=np.float64), trend
+
+NaN = float('nan')
+
+def _rolling_mean_loop(values, window, out):
+    """
+    Rolling mean (min_periods = window) theo đúng thuật toán của pandas: Kahan summation
+    khi thêm/bớt, inf được coi là NaN, chuỗi giá trị giống nhau trả về đúng giá trị đó.
+    """
+    nobs = 0
+    neg_ct = 0
+    sum_x = 0.0
+    compensation_add = 0.0
+    compensation_remove = 0.0
+    num_consecutive_same_value = 0
+    prev_value = NaN
+    for i in range(len(values)):
+        val = values[i]
+        if math.isinf(val):
+            val = NaN
+        # Window 1 (hoặc bar đầu tiên): pandas khởi tạo lại trạng thái
+        if i == 0 or window == 1:
+            nobs = 0
+            neg_ct = 0
+            sum_x = 0.0
+            compensation_add = 0.0
+            compensation_remove = 0.0
+            num_consecutive_same_value = 0
+            prev_value = val
+        elif i >= window:
+            old = values[i - window]
+            if not math.isinf(old) and old == old:
+                nobs -= 1
+                y = - old - compensation_remove
+                t = sum_x + y
+                compensation_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+        if val == val:
+            nobs += 1
+            y = val - compensation_add
+            t = sum_x + y
+            compensation_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, val) < 0:
+                neg_ct += 1
+            if val == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = val
+        if nobs >= window and nobs > 0:
+            result = sum_x / nobs
+            if num_consecutive_same_value >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+            out[i] = result
+        else:
+            out[i] = NaN
+
+def _adx_wilder_loop(high, low, close, di_period, adx_period, adx, di_plus, di_minus):
+    """
+    ADX/DI với Wilder smoothing trong một vòng lặp: TR, ±DM, smoothing, DI, DX và ADX
+    cùng cập nhật theo bar. Smoothing như streaming WilderSmoothing: giá trị đầu là trung
+    bình của `period` quan sát đầu tiên, sau đó value += (x - value) / period.
+    Bar đầu tiên không có bar trước nên bắt đầu từ bar 1; output đã được điền NaN.
+    """
+    tr_smooth = dm_plus_smooth = dm_minus_smooth = adx_smooth = NaN
+    seed_tr = seed_plus = seed_minus = seed_dx = 0.0
+    seed_count = 0
+    dx_count = 0
+    for i in range(1, len(close)):
+        h = high[i]
+        l = low[i]
+        prev_close = close[i - 1]
+        tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
+        up = h - high[i - 1]
+        down = low[i - 1] - l
+        dm_plus = up if (up > down and up > 0) else 0.0
+        dm_minus = down if (down > dm_plus and down > 0) else 0.0
+
+        if seed_count < di_period:
+            seed_tr += tr
+            seed_plus += dm_plus
+            seed_minus += dm_minus
+            seed_count += 1
+            if seed_count < di_period:
+                continue
+            tr_smooth = seed_tr / di_period
+            dm_plus_smooth = seed_plus / di_period
+            dm_minus_smooth = seed_minus / di_period
+        else:
+            tr_smooth = tr_smooth + (tr - tr_smooth) / di_period
+            dm_plus_smooth = dm_plus_smooth + (dm_plus - dm_plus_smooth) / di_period
+            dm_minus_smooth = dm_minus_smooth + (dm_minus - dm_minus_smooth) / di_period
+
+        # ±DM <= TR nên TR smoothing bằng 0 chỉ khi cả hai DM bằng 0 (0/0 -> NaN)
+        plus = 100 * (dm_plus_smooth / tr_smooth) if tr_smooth != 0 else NaN
+        minus = 100 * (dm_minus_smooth / tr_smooth) if tr_smooth != 0 else NaN
+        di_plus[i] = plus
+        di_minus[i] = minus
+        total = plus + minus
+        if total != 0 and total == total:
+            dx = 100 * abs(plus - minus) / total
+            if dx_count < adx_period:
+                seed_dx += dx
+                dx_count += 1
+                if dx_count == adx_period:
+                    adx_smooth = seed_dx / adx_period
+            else:
+                adx_smooth = adx_smooth + (dx - adx_smooth) / adx_period
+        adx[i] = adx_smooth
+
+if njit is not None:
+    _rolling_mean_jit = njit(cache=True)(_rolling_mean_loop)
+    _adx_wilder_jit = njit(cache=True)(_adx_wilder_loop)
+else:
+    _rolling_mean_jit = _adx_wilder_jit = None
+
+# Kiểu smoothing của ADX: 'sma' (rolling mean, như implementation ban đầu) hoặc 'wilder'
+ADX_SMOOTHING = ['sma', 'wilder']
+
+def rolling_mean(values, window: int, use_jit: bool = True) -> np.ndarray:
+    """Rolling mean on a raw array, bit-identical to Series.rolling(window).mean()"""
+    values = np.asarray(values, dtype=np.float64)
+    if use_jit and _rolling_mean_jit is not None:
+        out = np.empty(len(values))
+        _rolling_mean_jit(values, int(window), out)
+        return out
+    # Không có numba: pandas rolling (C) nhanh hơn nhiều so với vòng lặp Python và cho cùng kết quả
+    return pd.Series(values).rolling(window=int(window)).mean().to_numpy()
+
+def directional_movement(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    True range và ±DM theo bar (bar đầu: TR = high - low, DM = 0).
+    -DM được lọc theo +DM đã lọc, như implementation ban đầu của ADXStrategy.
+    """
+    prev_close, up, down = np.full(len(close), np.nan), np.full(len(close), np.nan), np.full(len(close), np.nan)
+    prev_close[1:] = close[:-1]
+    up[1:] = high[1:] - high[:-1]
+    down[1:] = low[:-1] - low[1:]
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    dm_plus = np.where((up > down) & (up > 0), up, 0.0)
+    dm_minus = np.where((down > dm_plus) & (down > 0), down, 0.0)
+    return tr, dm_plus, dm_minus
+
+def adx_di(high, low, close, di_period: int, adx_period: int, smoothing: str = 'sma',
+        use_jit: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ADX, +DI và -DI on raw arrays. Returns (adx, di_plus, di_minus) as float64 arrays.
+    smoothing='sma': rolling mean của TR/±DM/DX (giống hệt bit-for-bit implementation
+    pandas ban đầu); 'wilder': Wilder smoothing trong một vòng lặp.
+    """
+    if smoothing not in ADX_SMOOTHING:
+        raise ValueError(f"Unknown ADX smoothing '{smoothing}'")
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    di_period, adx_period = int(di_period), int(adx_period)
+
+    if smoothing == 'wilder':
+        n = len(close)
+        if use_jit and _adx_wilder_jit is not None:
+            outputs = [np.full(n, np.nan) for _ in range(3)]
+            _adx_wilder_jit(high, low, close, di_period, adx_period, *outputs)
+            return tuple(outputs)
+        outputs = [[NaN] * n for _ in range(3)]
+        _adx_wilder_loop(high.tolist(), low.tolist(), close.tolist(), di_period, adx_period, *outputs)
+        return tuple(np.array(values, dtype=np.float64) for values in outputs)
+
+    tr, dm_plus, dm_minus = directional_movement(high, low, close)
+    tr_smooth = rolling_mean(tr, di_period, use_jit)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = 100 * (rolling_mean(dm_plus, di_period, use_jit) / tr_smooth)
+        di_minus = 100 * (rolling_mean(dm_minus, di_period, use_jit) / tr_smooth)
+        dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+    return rolling_mean(dx, adx_period, use_jit), di_plus, di_minus
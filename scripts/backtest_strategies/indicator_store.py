@@ -0,0 +1,123 @@
+"""
+Per-dataset indicator store.
+
+Các primitive dùng chung giữa nhiều strategy (true range, ATR, rolling max/min,
+SMA, EMA, ...) được tính một lần cho mỗi dataset và memoize theo key gồm tên
+primitive cùng các tham số. Khi nhiều strategy hoặc nhiều bộ tham số chạy trên
+cùng dữ liệu (parameter sweep, ensemble) thì chỉ cần gán chung một store.
+
+data là DataFrame OHLCV hoặc panel {'open'/'high'/'low'/'close'/'volume': frame
+bars × symbols}; mọi primitive tính theo từng cột nên dùng được cho cả hai.
+Phép tính giữ nguyên thứ tự như code trong từng strategy trước đây nên giá trị
+giống hệt bit-for-bit.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from batch_indicators import rolling_max_batch, rolling_min_batch
+
+# Batched kernel cho prefill; giá trị giống hệt bit-for-bit primitive cùng tên
+BATCH_KERNELS = {
+    'rolling_max': rolling_max_batch,
+    'rolling_min': rolling_min_batch
+}
+
+
+class IndicatorStore:
+    def __init__(self, data):
+        self.data = data
+        self._values: Dict[tuple, Any] = {}
+        # Các key đã thực sự được tính (theo thứ tự), dùng để theo dõi cache hit
+        self.computed: List[tuple] = []
+
+    def covers(self, data) -> bool:
+        """True if this store was built for exactly this data object"""
+        return data is self.data
+
+    def memo(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Return the value for key, computing it on first use.
+        Key phải chứa đủ mọi tham số ảnh hưởng tới kết quả.
+        """
+        if key not in self._values:
+            self._values[key] = compute()
+            self.computed.append(key)
+        return self._values[key]
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def prefill(self, primitive: str, name: str, windows: Iterable[int]):
+        """
+        Compute primitive(name, window) for many windows in one batched pass
+        (parameter sweep). Chỉ window hợp lệ chưa có trong store được tính; với ít
+        hơn hai window thì để primitive tính như bình thường.
+        """
+        column = self.data[name]
+        if not isinstance(column, pd.Series):
+            return
+        windows = sorted({int(window) for window in windows
+                          if isinstance(window, (int, np.integer)) and not isinstance(window, bool)
+                          and window > 0 and (primitive, name, window) not in self})
+        if len(windows) < 2:
+            return
+        values = BATCH_KERNELS[primitive](column.to_numpy(), windows)
+        for j, window in enumerate(windows):
+            self.memo((primitive, name, window),
+                      lambda j=j: pd.Series(values[:, j], index=column.index, name=column.name))
+
+    def clear(self):
+        self._values.clear()
+        self.computed.clear()
+
+    # Primitives
+
+    def column(self, name: str):
+        return self.data[name]
+
+    def prev(self, name: str):
+        """Column shifted one bar"""
+        return self.memo(('prev', name), lambda: self.data[name].shift(1))
+
+    def diff(self, name: str):
+        return self.memo(('diff', name), lambda: self.data[name].diff())
+
+    def sma(self, name: str, window: int):
+        return self.memo(('sma', name, window), lambda: self.data[name].rolling(window=window).mean())
+
+    def rolling_std(self, name: str, window: int):
+        return self.memo(('rolling_std', name, window), lambda: self.data[name].rolling(window=window).std())
+
+    def rolling_sum(self, name: str, window: int):
+        return self.memo(('rolling_sum', name, window), lambda: self.data[name].rolling(window=window).sum())
+
+    def rolling_max(self, name: str, window: int):
+        return self.memo(('rolling_max', name, window), lambda: self.data[name].rolling(window=window).max())
+
+    def rolling_min(self, name: str, window: int):
+        return self.memo(('rolling_min', name, window), lambda: self.data[name].rolling(window=window).min())
+
+    def ema(self, name: str, span: int, adjust: bool = True):
+        return self.memo(('ema', name, span, adjust), lambda: self.data[name].ewm(span=span, adjust=adjust).mean())
+
+    def true_range(self):
+        """max(high - low, |high - prev close|, |low - prev close|), bỏ qua NaN như max(axis=1)"""
+        def compute():
+            high, low = self.data['high'], self.data['low']
+            prev_close = self.prev('close')
+            return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        return self.memo(('true_range',), compute)
+
+    def atr(self, period: int):
+        """Simple moving average of true range"""
+        return self.memo(('atr', period), lambda: self.true_range().rolling(window=period).mean())
+
+    def typical_price(self):
+        return self.memo(('typical_price',),
+                         lambda: (self.data['high'] + self.data['low'] + self.data['close']) / 3)
@@ -1,8 +1,10 @@
-import pandas as pd
-import numpy as np
-from base_strategy import BaseStrategy
+from base_strategy import BaseStrategy, ema_warmup
+from streaming_indicators import NaN, EMA, RollingMean
+from signal_kernels import signal_column, as_array, shift
 
 class KeltnerChannelStrategy(BaseStrategy):
+    indicator_columns = ['keltner_ema', 'keltner_upper', 'keltner_lower', 'keltner_atr']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -12,19 +14,20 @@ class KeltnerChannelStrategy(BaseStrategy):
         self.multiplier = float(self.strategy_config.get('multiplier', 2.0))
         self.confirmation_periods = int(self.strategy_config.get('confirmation_periods', 2))
     
+    @property
+    def warmup_bars(self) -> int:
+        # EMA (trí nhớ vô hạn) và ATR (true range cần close bar trước), cộng shift(1)
+        return max(ema_warmup(self.ema_period), self.atr_period) + 1
+
     def calculate_keltner_channels(self, data):
         """Calculate Keltner Channels"""
-        # Calculate EMA
-        ema = data['close'].ewm(span=self.ema_period).mean()
+        store = self.indicators(data)
         
-        # Calculate ATR
-        high_low = data['high'] - data['low']
-        high_close = np.abs(data['high'] - data['close'].shift())
-        low_close = np.abs(data['low'] - data['close'].shift())
+        # Calculate EMA
+        ema = store.ema('close', self.ema_period)
         
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-        atr = true_range.rolling(window=self.atr_period).mean()
+        # Calculate ATR (rolling mean của true range, dùng chung với ADX)
+        atr = store.atr(self.atr_period)
         
         # Calculate channels
         upper_channel = ema + (self.multiplier * atr)
@@ -37,33 +40,76 @@ class KeltnerChannelStrategy(BaseStrategy):
         signals = data.copy()
         
         # Calculate Keltner Channels
-        ema, upper_channel, lower_channel, atr = self.calculate_keltner_channels(data)
+        ema, upper_channel, lower_channel, atr = self.cached_indicator(
+            data, ('keltner_channel', self.ema_period, self.atr_period, self.multiplier),
+            lambda: self.calculate_keltner_channels(data)
+        )
         signals['keltner_ema'] = ema
         signals['keltner_upper'] = upper_channel
         signals['keltner_lower'] = lower_channel
         signals['keltner_atr'] = atr
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(data['close'], ema, upper_channel, lower_channel))
         
+        return signals
+    
+    def signal_array(self, data):
+        ema, upper_channel, lower_channel, _ = self.cached_indicator(
+            data, ('keltner_channel', self.ema_period, self.atr_period, self.multiplier),
+            lambda: self.calculate_keltner_channels(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], ema, upper_channel, lower_channel))
+    
+    def signal_rules(self, close, ema, upper_channel, lower_channel):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        close, ema = as_array(close), as_array(ema)
+        upper_channel, lower_channel = as_array(upper_channel), as_array(lower_channel)
+        prev_close, prev_ema = shift(close), shift(ema)
         # Generate buy signals
         # Buy when price bounces off lower channel and moves above EMA
         buy_condition = (
-            (data['close'] >= lower_channel) & 
-            (data['close'] > ema) & 
-            (data['close'].shift(1) < ema.shift(1)) &
-            (data['close'] > data['close'].shift(1))
+            (close >= lower_channel) & 
+            (close > ema) & 
+            (prev_close < prev_ema) &
+            (close > prev_close)
         )
-        signals.loc[buy_condition, 'signal'] = 1
         
         # Generate sell signals
         # Sell when price hits upper channel and moves below EMA
         sell_condition = (
-            (data['close'] <= upper_channel) & 
-            (data['close'] < ema) & 
-            (data['close'].shift(1) > ema.shift(1)) &
-            (data['close'] < data['close'].shift(1))
+            (close <= upper_channel) & 
+            (close < ema) & 
+            (prev_close > prev_ema) &
+            (close < prev_close)
         )
-        signals.loc[sell_condition, 'signal'] = -1
+        return buy_condition, sell_condition
+    
+    def _init_stream(self):
+        self._ema = EMA(self.ema_period)
+        self._atr = RollingMean(self.atr_period)
+        self._prev_close = NaN
+        self._prev_ema = NaN
+    
+    def _on_bar(self, bar):
+        """Incremental Keltner Channel signal for one bar"""
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        prev_close, prev_ema = self._prev_close, self._prev_ema
         
-        return signals
+        # True range bỏ qua các thành phần NaN (bar đầu chỉ có high - low)
+        if prev_close == prev_close:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            true_range = high - low
+        ema = self._ema.update(close)
+        atr = self._atr.update(true_range)
+        upper_channel = ema + (self.multiplier * atr)
+        lower_channel = ema - (self.multiplier * atr)
+        self._prev_close, self._prev_ema = close, ema
+        
+        signal = 0
+        if close >= lower_channel and close > ema and prev_close < prev_ema and close > prev_close:
+            signal = 1
+        if close <= upper_channel and close < ema and prev_close > prev_ema and close < prev_close:
+            signal = -1
+        return signal
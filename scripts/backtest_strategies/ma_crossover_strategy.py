@@ -1,27 +1,69 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import NaN, RollingMean
+from signal_kernels import signal_column, crosses_above, crosses_below
 
 class MACrossoverStrategy(BaseStrategy):
+    indicator_columns = ['fast_ma', 'slow_ma']
+    
     def __init__(self, config):
         super().__init__(config)
         self.fast_period = self.strategy_config['parameters'].get('fastPeriod', 10)
         self.slow_period = self.strategy_config['parameters'].get('slowPeriod', 20)
     
+    @property
+    def warmup_bars(self) -> int:
+        # SMA dài nhất cộng shift(1) của điều kiện cắt
+        return max(self.fast_period, self.slow_period)
+
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         df = data.copy()
         
         # Calculate moving averages
-        df['fast_ma'] = df['close'].rolling(window=self.fast_period).mean()
-        df['slow_ma'] = df['close'].rolling(window=self.slow_period).mean()
+        store = self.indicators(data)
+        df['fast_ma'] = store.sma('close', self.fast_period)
+        df['slow_ma'] = store.sma('close', self.slow_period)
         
         # Generate signals - chỉ tạo signal khi có crossover
-        df['signal'] = 0
+        df['signal'] = signal_column(*self.signal_rules(df['fast_ma'], df['slow_ma']))
         
+        return df
+    
+    def signal_array(self, data):
+        store = self.indicators(data)
+        return signal_column(*self.signal_rules(store.sma('close', self.fast_period), store.sma('close', self.slow_period)))
+    
+    def signal_rules(self, fast_ma, slow_ma):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
         # Buy signal khi fast MA cắt lên trên slow MA
-        df.loc[(df['fast_ma'] > df['slow_ma']) & (df['fast_ma'].shift(1) <= df['slow_ma'].shift(1)), 'signal'] = 1
+        buy = crosses_above(fast_ma, slow_ma)
         
         # Sell signal khi fast MA cắt xuống dưới slow MA
-        df.loc[(df['fast_ma'] < df['slow_ma']) & (df['fast_ma'].shift(1) >= df['slow_ma'].shift(1)), 'signal'] = -1
+        sell = crosses_below(fast_ma, slow_ma)
+        return buy, sell
+    
+    def panel_signals(self, panel):
+        store = self.indicators(panel)
+        return self.combine_signals(panel['close'], *self.signal_rules(store.sma('close', self.fast_period),
+                                                                       store.sma('close', self.slow_period)))
+    
+    def _init_stream(self):
+        self._fast = RollingMean(self.fast_period)
+        self._slow = RollingMean(self.slow_period)
+        self._prev_fast = NaN
+        self._prev_slow = NaN
+    
+    def _on_bar(self, bar) -> int:
+        close = float(bar['close'])
+        fast = self._fast.update(close)
+        slow = self._slow.update(close)
+        prev_fast, prev_slow = self._prev_fast, self._prev_slow
+        self._prev_fast, self._prev_slow = fast, slow
         
-        return df 
\ No newline at end of file
+        signal = 0
+        if fast > slow and prev_fast <= prev_slow:
+            signal = 1
+        if fast < slow and prev_fast >= prev_slow:
+            signal = -1
+        return signal
\ No newline at end of file
@@ -1,18 +1,31 @@
 import pandas as pd
 import numpy as np
-from base_strategy import BaseStrategy
+from base_strategy import BaseStrategy, ema_warmup
+from streaming_indicators import NaN, EMA
+from signal_kernels import signal_column, crosses_above, crosses_below
 
 class MACDStrategy(BaseStrategy):
+    # Chart đọc signal line của MACD ở key 'signal'
+    indicator_columns = ['macd', 'signal_line', 'histogram']
+    indicator_labels = {'signal_line': 'signal'}
+    
     def __init__(self, config):
         super().__init__(config)
         self.fast_ema = self.strategy_config['parameters'].get('fastEMA', 12)
         self.slow_ema = self.strategy_config['parameters'].get('slowEMA', 26)
         self.signal_period = self.strategy_config['parameters'].get('signalPeriod', 9)
     
-    def calculate_macd(self, data: pd.Series) -> tuple:
+    @property
+    def warmup_bars(self) -> int:
+        # EMA chậm rồi EMA signal của MACD line, cộng shift(1) của điều kiện cắt
+        return ema_warmup(max(self.fast_ema, self.slow_ema)) + ema_warmup(self.signal_period) + 1
+
+    def calculate_macd(self, data: pd.DataFrame) -> tuple:
+        store = self.indicators(data)
+        
         # Calculate EMAs
-        fast_ema = data.ewm(span=self.fast_ema, adjust=False).mean()
-        slow_ema = data.ewm(span=self.slow_ema, adjust=False).mean()
+        fast_ema = store.ema('close', self.fast_ema, adjust=False)
+        slow_ema = store.ema('close', self.slow_ema, adjust=False)
         
         # Calculate MACD line
         macd_line = fast_ema - slow_ema
@@ -29,13 +42,52 @@ class MACDStrategy(BaseStrategy):
         df = data.copy()
         
         # Calculate MACD components
-        df['macd'], df['signal_line'], df['histogram'] = self.calculate_macd(df['close'])
+        df['macd'], df['signal_line'], df['histogram'] = self.cached_indicator(
+            data, ('macd', self.fast_ema, self.slow_ema, self.signal_period),
+            lambda: self.calculate_macd(data)
+        )
         
         # Generate signals
-        df['signal'] = 0
+        df['signal'] = signal_column(*self.signal_rules(df['macd'], df['signal_line']))
+        
+        return df
+    
+    def signal_array(self, data):
+        macd, signal_line, _ = self.cached_indicator(
+            data, ('macd', self.fast_ema, self.slow_ema, self.signal_period),
+            lambda: self.calculate_macd(data)
+        )
+        return signal_column(*self.signal_rules(macd, signal_line))
+    
+    def signal_rules(self, macd, signal_line):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
         # Buy when MACD crosses above signal line
-        df.loc[(df['macd'] > df['signal_line']) & (df['macd'].shift(1) <= df['signal_line'].shift(1)), 'signal'] = 1
+        buy = crosses_above(macd, signal_line)
         # Sell when MACD crosses below signal line
-        df.loc[(df['macd'] < df['signal_line']) & (df['macd'].shift(1) >= df['signal_line'].shift(1)), 'signal'] = -1
+        sell = crosses_below(macd, signal_line)
+        return buy, sell
+    
+    def panel_signals(self, panel):
+        macd, signal_line, _ = self.calculate_macd(panel)
+        return self.combine_signals(panel['close'], *self.signal_rules(macd, signal_line))
+    
+    def _init_stream(self):
+        self._fast = EMA(self.fast_ema, adjust=False)
+        self._slow = EMA(self.slow_ema, adjust=False)
+        self._signal_line = EMA(self.signal_period, adjust=False)
+        self._prev_macd = NaN
+        self._prev_signal_line = NaN
+    
+    def _on_bar(self, bar) -> int:
+        close = float(bar['close'])
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal_line.update(macd)
+        prev_macd, prev_signal_line = self._prev_macd, self._prev_signal_line
+        self._prev_macd, self._prev_signal_line = macd, signal_line
         
-        return df 
\ No newline at end of file
+        signal = 0
+        if macd > signal_line and prev_macd <= prev_signal_line:
+            signal = 1
+        if macd < signal_line and prev_macd >= prev_signal_line:
+            signal = -1
+        return signal
\ No newline at end of file
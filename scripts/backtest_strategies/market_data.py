@@ -0,0 +1,67 @@
+"""
+Market data helpers dùng chung cho các runner: tên bảng OHLCV theo symbol
+và resample OHLCV theo timeframe.
+"""
+
+import re
+import pandas as pd
+
+# Map timeframe to pandas offset string
+TIMEFRAME_MAP = {
+    '1m': '1T',
+    '3m': '3T',
+    '5m': '5T',
+    '15m': '15T',
+    '30m': '30T',
+    '1h': 'H',
+    '2h': '2H',
+    '4h': '4H',
+    '6h': '6H',
+    '8h': '8H',
+    '12h': '12H',
+    '1d': 'D',
+    '3d': '3D',
+    '1w': 'W',
+    '1M': 'M'
+}
+
+# Quote asset được nhận diện ở cuối symbol dạng liền (BTCUSDT, ETHBUSD, ...)
+QUOTE_ASSETS = ['USDT', 'USDC', 'BUSD', 'FDUSD', 'TUSD']
+
+OHLCV_AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum'
+}
+
+def split_symbol(symbol: str, default_quote: str = 'USDT') -> tuple:
+    """
+    Split a trading symbol into (base, quote).
+    Chấp nhận 'BTCUSDT', 'BTC/USDT', 'btc-usdt', 'BTC_USDT' hoặc chỉ 'BTC'.
+    """
+    parts = [part for part in re.split(r'[/\-_:\s]+', symbol.strip().upper()) if part]
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    if not parts:
+        raise ValueError(f"Invalid symbol: '{symbol}'")
+    compact = parts[0]
+    for quote in QUOTE_ASSETS:
+        if compact.endswith(quote) and len(compact) > len(quote):
+            return compact[:-len(quote)], quote
+    return compact, default_quote
+
+def ohlcv_table_name(symbol: str, base_timeframe: str = '1m') -> str:
+    """Supabase table holding the raw candles of a symbol, e.g. 'OHLCV_BTC_USDT_1m'"""
+    base, quote = split_symbol(symbol)
+    return f"OHLCV_{base}_{quote}_{base_timeframe}"
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Resample 1m OHLCV data theo timeframe (giữ nguyên nếu là '1m')"""
+    if timeframe == '1m':
+        return df
+    rule = TIMEFRAME_MAP.get(timeframe)
+    if not rule:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    return df.resample(rule).agg(OHLCV_AGGREGATION).dropna()
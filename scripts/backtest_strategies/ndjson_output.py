@@ -0,0 +1,74 @@
+"""
+Streaming NDJSON output cho các runner: mỗi dòng stdout là một JSON object có
+trường 'type' và được in ngay khi có, thay vì gom toàn bộ kết quả thành một
+document rồi json.dumps một lần.
+
+Thứ tự dòng: 'summary' trước, sau đó các khối 'trades' và 'indicators' (mỗi khối
+tối đa chunk_size phần tử, 'offset' là vị trí của phần tử đầu khối), cuối cùng
+là 'end'. Mảng số được encode theo khối bằng serializer dùng chung (NaN/inf -> null
+trên cả mảng), hoặc thành buffer nhị phân base64 với chart_format='float32'.
+"""
+
+import json
+import sys
+from typing import Any, Dict, List
+
+from serialization import json_scalar, json_record, json_values, pack_values, CHART_FORMATS
+
+DEFAULT_CHUNK_SIZE = 10000
+
+class NDJSONWriter:
+    """Ghi từng record thành một dòng JSON và flush ngay để process cha đọc dần"""
+
+    def __init__(self, stream=None, chunk_size: int = DEFAULT_CHUNK_SIZE, chart_format: str = 'json'):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if chart_format not in CHART_FORMATS:
+            raise ValueError(f"Unknown chart format '{chart_format}'")
+        self.stream = stream if stream is not None else sys.stdout
+        self.chunk_size = chunk_size
+        self.chart_format = chart_format
+        self.records = 0
+
+    def write(self, record_type: str, **fields) -> None:
+        """One line {'type': record_type, **fields}; fields phải là JSON-native (NaN không được phép)"""
+        line = json.dumps({'type': record_type, **fields}, allow_nan=False, default=json_scalar)
+        self.stream.write(line + '\n')
+        self.stream.flush()
+        self.records += 1
+
+    def write_trades(self, trades: List[Dict[str, Any]], **fields) -> int:
+        """Trades theo khối chunk_size; trả về số khối đã ghi"""
+        chunks = 0
+        for offset in range(0, len(trades), self.chunk_size):
+            chunk = [json_record(trade) for trade in trades[offset:offset + self.chunk_size]]
+            self.write('trades', **fields, offset=offset, trades=chunk)
+            chunks += 1
+        return chunks
+
+    def write_indicators(self, indicators: Dict[str, Any], **fields) -> int:
+        """
+        Indicator data (timestamps, close_prices, indicators: {name: values}) theo khối
+        chunk_size bar, cùng format với dict indicators của runner; trả về số khối đã ghi
+        """
+        timestamps = indicators.get('timestamps', [])
+        close_prices = indicators.get('close_prices', [])
+        series = indicators.get('indicators', {})
+        if self.chart_format == 'json':
+            encode = encode_time = json_values
+        else:
+            encode = lambda values: pack_values(values, self.chart_format)
+            encode_time = lambda values: pack_values(values, 'float64')
+        chunks = 0
+        for offset in range(0, len(timestamps), self.chunk_size):
+            window = slice(offset, offset + self.chunk_size)
+            self.write('indicators', **fields, offset=offset,
+                       timestamps=encode_time(timestamps[window]),
+                       close_prices=encode(close_prices[window]),
+                       indicators={name: encode(values[window]) for name, values in series.items()})
+            chunks += 1
+        return chunks
+
+    def end(self, **fields) -> None:
+        """Dòng cuối: process cha biết output không bị cắt giữa chừng"""
+        self.write('end', records=self.records + 1, **fields)
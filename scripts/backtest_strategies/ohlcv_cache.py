@@ -0,0 +1,351 @@
+"""
+Local columnar cache cho nến OHLCV 1m, đồng bộ tăng dần từ Supabase.
+
+Mỗi symbol có một thư mục (theo tên bảng, ví dụ 'OHLCV_BTC_USDT_1m') chứa một
+file nhị phân cho mỗi cột: open_time (int64 ns UTC) và open/high/low/close/volume
+(float64), cùng meta.json ghi số dòng và khoảng [synced_from, synced_until] đã
+đồng bộ. Đọc một khoảng ngày là searchsorted trên open_time rồi cắt view của
+memmap - không copy dữ liệu cột. Khi cần dữ liệu ngoài khoảng đã đồng bộ, chỉ
+phần thiếu (thường là đuôi sau open_time cuối cùng) được fetch và nối vào file.
+
+Nến 1m trong quá khứ không thay đổi; chỉ nến cũ hơn settle_delay mới được lưu,
+phần gần hiện tại được fetch mỗi lần và không ghi vào cache.
+
+Các timeframe 5m/15m/1h/4h/1d được lưu sẵn thành resample pyramid trong thư mục
+con của symbol (mỗi level gộp từ level trước) và cập nhật tăng dần sau mỗi lần
+đồng bộ: chỉ bucket cuối (có thể chưa đủ) và các bucket mới được tính lại.
+"""
+
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: không khóa giữa các process
+    fcntl = None
+
+from market_data import ohlcv_table_name, resample_ohlcv
+from ohlcv_loader import OHLCVLoader, RAW_OHLCV_COLUMNS, TIME_COLUMN
+from resample_pyramid import PYRAMID_LEVELS, aggregate_arrays, timeframe_nanos
+import ohlcv_loader
+
+# Tăng khi layout file thay đổi để bỏ qua dữ liệu cũ
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join('results', 'cache', 'ohlcv')
+# Nến mới hơn khoảng này có thể chưa được ghi đủ vào bảng nên không được cache
+SETTLE_DELAY = pd.Timedelta(minutes=15)
+
+COLUMNS = list(RAW_OHLCV_COLUMNS.values())
+META_FILE = 'meta.json'
+LOCK_FILE = '.lock'
+# PostgREST so sánh timestamptz ở độ chính xác microsecond
+EPSILON = pd.Timedelta(microseconds=1)
+MINUTE = pd.Timedelta(minutes=1).value
+
+def _utc(value) -> pd.Timestamp:
+    """Mốc thời gian không có timezone được hiểu là UTC như loader"""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+class OHLCVCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, settle_delay: pd.Timedelta = SETTLE_DELAY):
+        self.cache_dir = cache_dir
+        self.settle_delay = pd.Timedelta(settle_delay)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'OHLCVCache':
+        """OHLCV_CACHE_DIR overrides the default directory"""
+        return cls(os.getenv('OHLCV_CACHE_DIR', DEFAULT_CACHE_DIR))
+
+    # Files
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.cache_dir, ohlcv_table_name(symbol))
+
+    @staticmethod
+    def _column_path(directory: str, column: str, generation: int) -> str:
+        return os.path.join(directory, f'{column}.{generation}.bin')
+
+    @staticmethod
+    def _read_meta(directory: str) -> Optional[Dict[str, int]]:
+        try:
+            with open(os.path.join(directory, META_FILE)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta.get('version') == CACHE_VERSION else None
+
+    @staticmethod
+    def _write_meta(directory: str, meta: Dict[str, int]):
+        """Ghi meta sau cùng và atomic: reader chỉ thấy các dòng đã ghi xong"""
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': CACHE_VERSION, **meta}, f)
+        os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+    @contextmanager
+    def _locked(self, directory: str):
+        """Một process đồng bộ một symbol tại một thời điểm (tránh tải trùng)"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _map(self, directory: str, meta: Dict[str, int]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Memmap read-only của toàn bộ các cột (rows dòng đầu của mỗi file)"""
+        rows, generation = meta['rows'], meta['generation']
+        if rows == 0:
+            return np.empty(0, dtype=np.int64), {column: np.empty(0) for column in COLUMNS}
+        times = np.memmap(self._column_path(directory, TIME_COLUMN, generation), dtype=np.int64, mode='r', shape=(rows,))
+        columns = {column: np.memmap(self._column_path(directory, column, generation), dtype=np.float64, mode='r', shape=(rows,))
+                   for column in COLUMNS}
+        return times, columns
+
+    def _append(self, directory: str, meta: Dict[str, int], times: np.ndarray, columns: Dict[str, np.ndarray]):
+        """
+        Ghi các dòng mới từ dòng rows trở đi; phần ghi dở của lần trước bị ghi đè.
+        File chỉ bị cắt sau phần vừa ghi, không bao giờ ngắn hơn phần reader khác đang map.
+        """
+        rows, generation = meta['rows'], meta['generation']
+        pairs = [(TIME_COLUMN, times.astype(np.int64))] + [(column, columns[column].astype(np.float64)) for column in COLUMNS]
+        for column, values in pairs:
+            path = self._column_path(directory, column, generation)
+            with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+                f.seek(rows * 8)
+                f.write(values.tobytes())
+                f.truncate()
+        meta['rows'] = rows + len(times)
+
+    def _rewrite(self, directory: str, meta: Dict[str, int], times: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Ghi toàn bộ dữ liệu vào generation mới (khi thêm dữ liệu trước synced_from)"""
+        old_generation = meta['generation']
+        meta.update({'generation': old_generation + 1, 'rows': 0})
+        self._append(directory, meta, times, columns)
+        return old_generation
+
+    def _remove_generation(self, directory: str, generation: int):
+        for column in [TIME_COLUMN] + COLUMNS:
+            try:
+                os.remove(self._column_path(directory, column, generation))
+            except OSError:
+                # Không tồn tại, hoặc còn được map bởi reader khác (Windows)
+                pass
+
+    # Resample pyramid
+
+    def _update_pyramid(self, directory: str, meta: Dict[str, int]):
+        """
+        Cập nhật các level sau khi dữ liệu 1m thay đổi. Level được build lại toàn bộ khi
+        level nguồn được ghi lại (generation mới); nếu không thì bucket cuối của level
+        được tính lại cùng các bucket mới từ phần đuôi của level nguồn.
+        """
+        source_directory, source_meta = directory, meta
+        for timeframe in PYRAMID_LEVELS:
+            level_directory = os.path.join(directory, timeframe)
+            os.makedirs(level_directory, exist_ok=True)
+            level_meta = self._read_meta(level_directory)
+            source_times, source_columns = self._map(source_directory, source_meta)
+            old_generation = None
+            if level_meta is None or level_meta['source_generation'] != source_meta['generation']:
+                old_generation = level_meta['generation'] if level_meta is not None else None
+                level_meta = {'generation': (old_generation or 0) + 1, 'rows': 0}
+                first = 0
+            elif level_meta['rows'] > 0:
+                level_times, _ = self._map(level_directory, level_meta)
+                level_meta['rows'] -= 1
+                first = int(np.searchsorted(source_times, level_times[-1], side='left'))
+                del level_times
+            else:
+                first = 0
+            times, columns = aggregate_arrays(source_times[first:], {column: values[first:] for column, values in source_columns.items()},
+                                              timeframe_nanos(timeframe))
+            self._append(level_directory, level_meta, times, columns)
+            # base_*: trạng thái dữ liệu 1m mà level phản ánh
+            level_meta.update({'source_generation': source_meta['generation'], 'source_rows': source_meta['rows'],
+                               'base_generation': meta['generation'], 'base_rows': meta['rows']})
+            self._write_meta(level_directory, level_meta)
+            if old_generation is not None:
+                self._remove_generation(level_directory, old_generation)
+            source_directory, source_meta = level_directory, level_meta
+
+    @staticmethod
+    def _pyramid_current(level_meta: Optional[Dict[str, int]], meta: Dict[str, int]) -> bool:
+        return (level_meta is not None and level_meta.get('base_rows') == meta['rows']
+                and level_meta.get('base_generation') == meta['generation'])
+
+    def _read_timeframe(self, symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp,
+                        data: pd.DataFrame) -> pd.DataFrame:
+        """
+        data (1m của [start, end]) resample theo timeframe: các bucket nằm trọn trong
+        khoảng đã đồng bộ được đọc trực tiếp từ pyramid, chỉ bucket dở ở hai đầu được
+        resample từ data. Kết quả giống resample_ohlcv(data, timeframe).
+        """
+        directory = self._dir(symbol)
+        meta = self._read_meta(directory)
+        level_directory = os.path.join(directory, timeframe)
+        level_meta = self._read_meta(level_directory)
+        if meta is None or not self._pyramid_current(level_meta, meta):
+            return resample_ohlcv(data, timeframe)
+
+        bucket = timeframe_nanos(timeframe)
+        upper = min(end.value, meta['synced_until']) + MINUTE
+        first_full = -(-start.value // bucket) * bucket
+        last_full = upper // bucket * bucket
+        if first_full >= last_full:
+            return resample_ohlcv(data, timeframe)
+
+        level_times, level_columns = self._map(level_directory, level_meta)
+        lo, hi = np.searchsorted(level_times, [first_full, last_full], side='left')
+        middle = self._frame(level_times[lo:hi], {column: values[lo:hi] for column, values in level_columns.items()})
+        head_end, tail_start = np.searchsorted(data.index.asi8, [first_full, last_full], side='left')
+        parts = [resample_ohlcv(data.iloc[:head_end], timeframe) if head_end > 0 else None,
+                 middle.dropna(),
+                 resample_ohlcv(data.iloc[tail_start:], timeframe) if tail_start < len(data) else None]
+        return pd.concat([part for part in parts if part is not None])
+
+    # Public API
+
+    def coverage(self, symbol: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(synced_from, synced_until) của symbol, hoặc None nếu chưa có cache"""
+        meta = self._read_meta(self._dir(symbol))
+        if meta is None:
+            return None
+        return pd.Timestamp(meta['synced_from'], tz='UTC'), pd.Timestamp(meta['synced_until'], tz='UTC')
+
+    def read_arrays(self, symbol: str, start_date=None, end_date=None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Zero-copy slice [start_date, end_date] của cache: (open_time int64 ns UTC, {column: float64}).
+        Các mảng là view read-only trên memmap.
+        """
+        directory = self._dir(symbol)
+        meta = self._read_meta(directory) or {'rows': 0, 'generation': 0}
+        times, columns = self._map(directory, meta)
+        lo = 0 if start_date is None else int(np.searchsorted(times, _utc(start_date).value, side='left'))
+        hi = len(times) if end_date is None else int(np.searchsorted(times, _utc(end_date).value, side='right'))
+        return times[lo:hi], {column: values[lo:hi] for column, values in columns.items()}
+
+    def read(self, symbol: str, start_date=None, end_date=None) -> pd.DataFrame:
+        """Cached 1m candles as an open/high/low/close/volume frame; các cột không bị copy"""
+        times, columns = self.read_arrays(symbol, start_date, end_date)
+        return self._frame(times, columns)
+
+    @staticmethod
+    def _frame(times: np.ndarray, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        index = pd.DatetimeIndex(np.asarray(times).view('M8[ns]'), name=TIME_COLUMN).tz_localize('UTC')
+        return pd.DataFrame({column: np.asarray(columns[column]) for column in COLUMNS}, index=index, copy=False)
+
+    @staticmethod
+    def _fetched(arrays: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Kết quả OHLCVLoader.fetch -> (open_time ns, {column chuẩn: values})"""
+        index = pd.DatetimeIndex(arrays[TIME_COLUMN])
+        index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        return index.asi8, {name: np.asarray(arrays[raw], dtype=np.float64) for raw, name in RAW_OHLCV_COLUMNS.items()}
+
+    def sync(self, symbol: str, start_date, end_date,
+             fetch: Callable[[pd.Timestamp, pd.Timestamp], Dict[str, Any]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Đảm bảo cache chứa [start_date, min(end_date, settled)]; fetch(start, end) chỉ được
+        gọi cho phần còn thiếu. Trả về các dòng mới hơn settled (không được cache).
+        """
+        start, end = _utc(start_date), _utc(end_date)
+        settled = pd.Timestamp(datetime.now(timezone.utc)).floor('min') - self.settle_delay
+        upper = min(end, settled)
+        directory = self._dir(symbol)
+
+        with self._locked(directory):
+            meta = self._read_meta(directory)
+            if start <= upper:
+                if meta is None:
+                    meta = {'generation': 0, 'rows': 0, 'synced_from': start.value, 'synced_until': upper.value}
+                    times, columns = self._fetched(fetch(start, upper))
+                    self._rewrite(directory, meta, times, columns)
+                    self._write_meta(directory, meta)
+                else:
+                    synced_from = pd.Timestamp(meta['synced_from'], tz='UTC')
+                    synced_until = pd.Timestamp(meta['synced_until'], tz='UTC')
+                    if start < synced_from:
+                        # Dữ liệu trước synced_from: ghép head với dữ liệu cũ thành generation mới
+                        head_times, head_columns = self._fetched(fetch(start, synced_from - EPSILON))
+                        keep = head_times < synced_from.value
+                        old_times, old_columns = self._map(directory, meta)
+                        old_generation = self._rewrite(
+                            directory, meta, np.concatenate([head_times[keep], old_times]),
+                            {column: np.concatenate([head_columns[column][keep], old_columns[column]]) for column in COLUMNS})
+                        meta['synced_from'] = start.value
+                        self._write_meta(directory, meta)
+                        del old_times, old_columns
+                        self._remove_generation(directory, old_generation)
+                    if upper > synced_until:
+                        # Chỉ fetch phần đuôi sau khoảng đã đồng bộ
+                        tail_times, tail_columns = self._fetched(fetch(synced_until + EPSILON, upper))
+                        keep = tail_times > synced_until.value
+                        self._append(directory, meta, tail_times[keep], {column: tail_columns[column][keep] for column in COLUMNS})
+                        meta['synced_until'] = upper.value
+                        self._write_meta(directory, meta)
+            # Cũng build pyramid cho cache có trước pyramid hoặc lần cập nhật trước bị dừng giữa chừng
+            if meta is not None and not self._pyramid_current(self._read_meta(os.path.join(directory, PYRAMID_LEVELS[-1])), meta):
+                self._update_pyramid(directory, meta)
+
+        if end <= settled:
+            return np.empty(0, dtype=np.int64), {column: np.empty(0) for column in COLUMNS}
+        recent_start = max(start, settled + EPSILON)
+        times, columns = self._fetched(fetch(recent_start, end))
+        keep = times >= recent_start.value
+        return times[keep], {column: values[keep] for column, values in columns.items()}
+
+    def load(self, symbol: str, start_date, end_date,
+             fetch: Callable[[pd.Timestamp, pd.Timestamp], Dict[str, Any]], timeframe: str = '1m') -> pd.DataFrame:
+        """
+        Candles for [start_date, end_date]: cache + phần thiếu từ fetch, theo timeframe
+        (level của pyramid được đọc trực tiếp, timeframe khác được resample từ 1m).
+        """
+        recent_times, recent_columns = self.sync(symbol, start_date, end_date, fetch)
+        times, columns = self.read_arrays(symbol, start_date, end_date)
+        if len(recent_times):
+            times = np.concatenate([times, recent_times])
+            columns = {column: np.concatenate([columns[column], recent_columns[column]]) for column in COLUMNS}
+        data = self._frame(times, columns)
+        if timeframe == '1m':
+            return data
+        if timeframe in PYRAMID_LEVELS:
+            return self._read_timeframe(symbol, timeframe, _utc(start_date), _utc(end_date), data)
+        return resample_ohlcv(data, timeframe)
+
+def load_ohlcv(symbol: str, start_date, end_date, timeframe: str = '1m',
+               supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+               cache_dir: Optional[str] = None, **options) -> pd.DataFrame:
+    """
+    Load candles theo timeframe (local cache trước, Supabase chỉ cho phần thiếu).
+    OHLCV_CACHE=0 tắt cache; khoảng không giới hạn luôn đọc trực tiếp từ Supabase.
+    """
+    if os.getenv('OHLCV_CACHE', '1') == '0' or start_date is None or end_date is None:
+        return ohlcv_loader.load_ohlcv(symbol, start_date, end_date, timeframe, supabase_url, supabase_key, **options)
+
+    cache = OHLCVCache(cache_dir) if cache_dir else OHLCVCache.from_env()
+    # Loader (và credentials) chỉ cần khi thật sự phải fetch
+    loaders = []
+
+    def fetch(start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, Any]:
+        if not loaders:
+            loaders.append(OHLCVLoader.from_env(supabase_url, supabase_key, **options))
+        return loaders[0].fetch(ohlcv_table_name(symbol), list(RAW_OHLCV_COLUMNS), start, end)
+
+    try:
+        return cache.load(symbol, start_date, end_date, fetch, timeframe)
+    finally:
+        for loader in loaders:
+            loader.close()
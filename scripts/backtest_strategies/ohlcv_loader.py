@@ -0,0 +1,223 @@
+"""
+Paginated, parallel OHLCV loader cho các bảng Supabase (PostgREST).
+
+Một câu query .select('*') bị giới hạn bởi max-rows của PostgREST và trả về mọi
+cột dạng JSON. Loader này:
+- chia khoảng thời gian thành các chunk, mỗi chunk đọc theo keyset pagination
+  trên open_time (open_time > key cuối của trang trước), không dùng offset;
+- chạy các chunk song song với số worker giới hạn, mỗi worker giữ một kết nối
+  HTTP keep-alive riêng (pool kết nối, không mở lại TCP/TLS cho từng trang);
+- chỉ select các cột cần dùng và ghép kết quả trực tiếp thành mảng float64.
+Chỉ dùng thư viện chuẩn (http.client), không phụ thuộc supabase-py.
+"""
+
+import os
+import json
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, urlencode, quote
+
+import numpy as np
+import pandas as pd
+
+from market_data import ohlcv_table_name, resample_ohlcv
+
+TIME_COLUMN = 'open_time'
+
+# Cột giá trong bảng OHLCV_<BASE>_<QUOTE>_1m -> tên cột chuẩn dùng trong strategy
+RAW_OHLCV_COLUMNS = {
+    'open_price': 'open',
+    'high_price': 'high',
+    'low_price': 'low',
+    'close_price': 'close',
+    'volume': 'volume'
+}
+
+# PostgREST của Supabase trả tối đa 1000 dòng mỗi request theo mặc định
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_WORKERS = 8
+DEFAULT_CHUNK = pd.Timedelta(days=7)
+
+class OHLCVLoader:
+    def __init__(self, url: str, key: str, page_size: int = DEFAULT_PAGE_SIZE, workers: int = DEFAULT_WORKERS,
+                 chunk: pd.Timedelta = DEFAULT_CHUNK, timeout: float = 60.0, retries: int = 3):
+        if not url or not key:
+            raise ValueError("Missing Supabase credentials")
+        parsed = urlsplit(url)
+        self._connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._base_path = parsed.path.rstrip('/') + '/rest/v1/'
+        self._headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Accept': 'application/json',
+            'Connection': 'keep-alive'
+        }
+        self.page_size = int(page_size)
+        self.workers = max(1, int(workers))
+        self.chunk = pd.Timedelta(chunk)
+        self.timeout = timeout
+        self.retries = retries
+
+        # Mỗi worker thread giữ một kết nối; danh sách để đóng tất cả khi xong
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @classmethod
+    def from_env(cls, url: Optional[str] = None, key: Optional[str] = None, **options) -> 'OHLCVLoader':
+        """
+        Credentials từ arguments hoặc NEXT_PUBLIC_SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY.
+        OHLCV_FETCH_WORKERS / OHLCV_PAGE_SIZE override số worker và kích thước trang.
+        """
+        url = url or os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+        key = key or os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        options.setdefault('workers', int(os.getenv('OHLCV_FETCH_WORKERS', DEFAULT_WORKERS)))
+        options.setdefault('page_size', int(os.getenv('OHLCV_PAGE_SIZE', DEFAULT_PAGE_SIZE)))
+        return cls(url, key, **options)
+
+    def __enter__(self) -> 'OHLCVLoader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+    # HTTP
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connection_class(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _get(self, table: str, params: List[Tuple[str, Any]]) -> list:
+        """GET /rest/v1/<table>?params; kết nối bị server đóng thì mở lại và thử lại"""
+        path = self._base_path + quote(table) + '?' + urlencode(params, quote_via=quote, safe=',.()*')
+        for attempt in range(self.retries + 1):
+            connection = self._connection()
+            try:
+                connection.request('GET', path, headers=self._headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if attempt == self.retries:
+                    raise
+                continue
+            with self._lock:
+                self.requests += 1
+            if response.status >= 400:
+                raise RuntimeError(f"PostgREST error {response.status} for table {table}: {body[:500].decode('utf-8', 'replace')}")
+            return json.loads(body)
+
+    # Query
+
+    def _time_bounds(self, table: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """open_time nhỏ nhất / lớn nhất của bảng (cho khoảng không giới hạn)"""
+        bounds = []
+        for direction in ('asc', 'desc'):
+            rows = self._get(table, [('select', TIME_COLUMN), ('order', f'{TIME_COLUMN}.{direction}'), ('limit', 1)])
+            if not rows:
+                return None, None
+            bounds.append(pd.Timestamp(rows[0][TIME_COLUMN]))
+        return bounds[0], bounds[1]
+
+    def _chunks(self, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[str, str, bool]]:
+        """[start, end] chia thành các khoảng [a, b); khoảng cuối lấy cả end như lte"""
+        edges = [start]
+        while edges[-1] + self.chunk < end:
+            edges.append(edges[-1] + self.chunk)
+        edges.append(end)
+        return [(a.isoformat(), b.isoformat(), i == len(edges) - 2) for i, (a, b) in enumerate(zip(edges, edges[1:]))]
+
+    def _fetch_chunk(self, table: str, columns: List[str], lower: str, upper: str,
+                     inclusive: bool) -> List[Dict[str, np.ndarray]]:
+        """
+        Keyset pagination trong một chunk. Server có thể giới hạn số dòng mỗi trang
+        thấp hơn page_size, nên chỉ dừng khi trang rỗng hoặc ngắn hơn trang đầy nhất đã gặp.
+        """
+        select = ','.join([TIME_COLUMN] + columns)
+        upper_filter = (TIME_COLUMN, f"{'lte' if inclusive else 'lt'}.{upper}")
+        lower_filter = (TIME_COLUMN, f'gte.{lower}')
+        pages = []
+        full_page = 0
+        while True:
+            rows = self._get(table, [('select', select), lower_filter, upper_filter,
+                                     ('order', f'{TIME_COLUMN}.asc'), ('limit', self.page_size)])
+            if rows:
+                pages.append(self._page_arrays(rows, columns))
+            full_page = max(full_page, len(rows))
+            if not rows or len(rows) < full_page:
+                break
+            lower_filter = (TIME_COLUMN, f'gt.{rows[-1][TIME_COLUMN]}')
+        return pages
+
+    @staticmethod
+    def _page_arrays(rows: List[dict], columns: List[str]) -> Dict[str, np.ndarray]:
+        arrays = {TIME_COLUMN: np.array([row[TIME_COLUMN] for row in rows], dtype=object)}
+        for column in columns:
+            # None (NULL) -> NaN; numeric dạng chuỗi cũng được chuyển thành float
+            arrays[column] = np.array([row[column] for row in rows], dtype=np.float64)
+        return arrays
+
+    def fetch(self, table: str, columns: List[str], start_date=None, end_date=None) -> Dict[str, Any]:
+        """
+        Fetch open_time plus numeric columns for start_date <= open_time <= end_date.
+        Returns {'open_time': DatetimeIndex, column: float64 array, ...} đã sắp xếp theo open_time.
+        """
+        columns = [column for column in columns if column != TIME_COLUMN]
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+        if start is None or end is None:
+            first, last = self._time_bounds(table)
+            start = first if start is None else start
+            end = last if end is None else end
+
+        result = {TIME_COLUMN: pd.DatetimeIndex([], name=TIME_COLUMN), **{column: np.empty(0) for column in columns}}
+        if start is None or end is None:
+            return result
+        # Mốc không có timezone được hiểu là UTC như Postgres (timestamptz)
+        if (start.tz is None) != (end.tz is None):
+            start, end = [ts.tz_localize('UTC') if ts.tz is None else ts for ts in (start, end)]
+        if start > end:
+            return result
+
+        chunks = self._chunks(start, end)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            chunk_pages = list(executor.map(lambda chunk: self._fetch_chunk(table, columns, *chunk), chunks))
+        pages = [page for chunk in chunk_pages for page in chunk]
+        if not pages:
+            return result
+
+        # Chunk rời nhau và đã theo thứ tự nên chỉ cần nối lại
+        times = np.concatenate([page[TIME_COLUMN] for page in pages])
+        result[TIME_COLUMN] = pd.DatetimeIndex(pd.to_datetime(times), name=TIME_COLUMN)
+        for column in columns:
+            result[column] = np.concatenate([page[column] for page in pages])
+        return result
+
+    def load_ohlcv(self, symbol: str, start_date=None, end_date=None) -> pd.DataFrame:
+        """1m candles of a symbol as a float64 open/high/low/close/volume frame indexed by open_time"""
+        arrays = self.fetch(ohlcv_table_name(symbol), list(RAW_OHLCV_COLUMNS), start_date, end_date)
+        return pd.DataFrame({name: arrays[column] for column, name in RAW_OHLCV_COLUMNS.items()},
+                            index=arrays[TIME_COLUMN])
+
+def load_ohlcv(symbol: str, start_date, end_date, timeframe: str = '1m',
+               supabase_url: Optional[str] = None, supabase_key: Optional[str] = None, **options) -> pd.DataFrame:
+    """Load 1m candles from Supabase and resample them to timeframe"""
+    with OHLCVLoader.from_env(supabase_url, supabase_key, **options) as loader:
+        data = loader.load_ohlcv(symbol, start_date, end_date)
+    return resample_ohlcv(data, timeframe)
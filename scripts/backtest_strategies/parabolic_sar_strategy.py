@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
-from base_strategy import BaseStrategy
+from base_strategy import BaseStrategy, ema_warmup
+from streaming_indicators import NaN, ParabolicSAR
+from indicator_kernels import parabolic_sar
+from signal_kernels import signal_column, as_array, shift
 
 class ParabolicSARStrategy(BaseStrategy):
+    indicator_columns = ['parabolic_sar', 'trend']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -11,73 +16,15 @@ class ParabolicSARStrategy(BaseStrategy):
         self.maximum = float(self.strategy_config.get('maximum', 0.2))
         self.confirmation_periods = int(self.strategy_config.get('confirmation_periods', 1))
     
+    @property
+    def warmup_bars(self) -> int:
+        # SAR đệ quy từ bar đầu như EMA: EMA_WARMUP_SPANS lần số bước để AF đạt maximum
+        return ema_warmup(int(np.ceil(self.maximum / self.acceleration)))
+
     def calculate_parabolic_sar(self, data):
-        """Calculate Parabolic SAR"""
-        high = data['high']
-        low = data['low']
-        close = data['close']
-        
-        # Initialize arrays
-        sar = np.zeros(len(data))
-        trend = np.zeros(len(data))
-        af = np.zeros(len(data))
-        ep = np.zeros(len(data))
-        
-        # Set initial values
-        sar[0] = low.iloc[0]
-        trend[0] = 1  # 1 for uptrend, -1 for downtrend
-        af[0] = self.acceleration
-        ep[0] = high.iloc[0]
-        
-        for i in range(1, len(data)):
-            # Uptrend
-            if trend[i-1] == 1:
-                sar[i] = sar[i-1] + af[i-1] * (ep[i-1] - sar[i-1])
-                
-                # Check if SAR is above low
-                if sar[i] > low.iloc[i]:
-                    sar[i] = low.iloc[i]
-                
-                # Check for trend reversal
-                if close.iloc[i] < sar[i]:
-                    trend[i] = -1
-                    sar[i] = ep[i-1]
-                    af[i] = self.acceleration
-                    ep[i] = low.iloc[i]
-                else:
-                    trend[i] = 1
-                    # Update extreme point
-                    if high.iloc[i] > ep[i-1]:
-                        ep[i] = high.iloc[i]
-                        af[i] = min(af[i-1] + self.acceleration, self.maximum)
-                    else:
-                        ep[i] = ep[i-1]
-                        af[i] = af[i-1]
-            
-            # Downtrend
-            else:
-                sar[i] = sar[i-1] + af[i-1] * (ep[i-1] - sar[i-1])
-                
-                # Check if SAR is below high
-                if sar[i] < high.iloc[i]:
-                    sar[i] = high.iloc[i]
-                
-                # Check for trend reversal
-                if close.iloc[i] > sar[i]:
-                    trend[i] = 1
-                    sar[i] = ep[i-1]
-                    af[i] = self.acceleration
-                    ep[i] = high.iloc[i]
-                else:
-                    trend[i] = -1
-                    # Update extreme point
-                    if low.iloc[i] < ep[i-1]:
-                        ep[i] = low.iloc[i]
-                        af[i] = min(af[i-1] + self.acceleration, self.maximum)
-                    else:
-                        ep[i] = ep[i-1]
-                        af[i] = af[i-1]
-        
+        """Calculate Parabolic SAR (kernel trên mảng NumPy, JIT nếu có numba)"""
+        sar, trend = parabolic_sar(data['high'].to_numpy(), data['low'].to_numpy(), data['close'].to_numpy(),
+                                   self.acceleration, self.maximum)
         return pd.Series(sar, index=data.index), pd.Series(trend, index=data.index)
     
     def generate_signals(self, data):
@@ -85,29 +32,58 @@ class ParabolicSARStrategy(BaseStrategy):
         signals = data.copy()
         
         # Calculate Parabolic SAR
-        sar, trend = self.calculate_parabolic_sar(data)
+        sar, trend = self.cached_indicator(
+            data, ('parabolic_sar', self.acceleration, self.maximum),
+            lambda: self.calculate_parabolic_sar(data)
+        )
         signals['parabolic_sar'] = sar
         signals['trend'] = trend
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(data['close'], sar, trend))
         
+        return signals
+    
+    def signal_array(self, data):
+        sar, trend = self.cached_indicator(
+            data, ('parabolic_sar', self.acceleration, self.maximum),
+            lambda: self.calculate_parabolic_sar(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], sar, trend))
+    
+    def signal_rules(self, close, sar, trend):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        close, sar, trend = as_array(close), as_array(sar), as_array(trend)
+        prev_trend = shift(trend)
         # Generate buy signals
         # Buy when trend changes from downtrend to uptrend
         buy_condition = (
             (trend == 1) & 
-            (trend.shift(1) == -1) & 
-            (data['close'] > sar)
+            (prev_trend == -1) & 
+            (close > sar)
         )
-        signals.loc[buy_condition, 'signal'] = 1
         
         # Generate sell signals
         # Sell when trend changes from uptrend to downtrend
         sell_condition = (
             (trend == -1) & 
-            (trend.shift(1) == 1) & 
-            (data['close'] < sar)
+            (prev_trend == 1) & 
+            (close < sar)
         )
-        signals.loc[sell_condition, 'signal'] = -1
+        return buy_condition, sell_condition
+    
+    def _init_stream(self):
+        self._sar = ParabolicSAR(self.acceleration, self.maximum)
+    
+    def _on_bar(self, bar):
+        """Incremental Parabolic SAR signal for one bar"""
+        close = float(bar['close'])
+        prev_trend = self._sar.trend if self._sar.started else NaN
+        sar, trend = self._sar.update(float(bar['high']), float(bar['low']), close)
         
-        return signals
+        signal = 0
+        if trend == 1 and prev_trend == -1 and close > sar:
+            signal = 1
+        if trend == -1 and prev_trend == 1 and close < sar:
+            signal = -1
+        return signal
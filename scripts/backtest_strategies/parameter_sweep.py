@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Parameter Sweep - chạy nhiều bộ tham số của một strategy trên cùng một dataset.
+Dữ liệu chỉ load/resample một lần, indicator dùng chung được cache trong mỗi
+worker process, các bộ tham số được chia cho một process pool.
+
+engine='grid' (mặc định) tính signal của cả batch thành một ma trận int8
+bars × combinations rồi mô phỏng từng cột bằng batched simulator, không tạo
+signal frame hay trade record cho từng bộ; engine='backtest' chạy run_backtest
+đầy đủ cho từng bộ tham số. Performance của hai engine giống hệt nhau.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from strategy_registry import get_strategy_class, build_strategy_config
+from indicator_store import IndicatorStore
+from signal_grid import simulate_signal_grid
+
+# State của từng worker process (được gán một lần trong initializer)
+_worker_state: Dict[str, Any] = {}
+
+SWEEP_ENGINES = ['grid', 'backtest']
+
+def expand_grid(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand a parameter grid into a list of combinations.
+    Thứ tự giữ theo grid nên các bộ có cùng tham số indicator (đặt key đó lên đầu)
+    nằm liền nhau và rơi vào cùng một batch/cache.
+    """
+    keys = list(param_grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+def sample_search_space(search_space: Dict[str, Any], n_iter: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Random search: mỗi tham số là list (chọn ngẫu nhiên) hoặc tuple (low, high).
+    (low, high) là int thì lấy số nguyên trong [low, high], ngược lại lấy float đều.
+    """
+    rng = np.random.default_rng(seed)
+    combinations = []
+    seen = set()
+    # Giới hạn số lần thử để không lặp vô hạn khi không gian nhỏ hơn n_iter
+    for _ in range(n_iter * 10):
+        if len(combinations) >= n_iter:
+            break
+        params = {}
+        for name, space in search_space.items():
+            if isinstance(space, tuple):
+                low, high = space
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = space[int(rng.integers(len(space)))]
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            combinations.append(params)
+    # Giữ các bộ có cùng tham số liền nhau để tận dụng cache
+    return sorted(combinations, key=lambda p: tuple(str(p[k]) for k in search_space))
+
+def run_signal_grid(strategy_type: str, data: pd.DataFrame, base_config: Dict[str, Any],
+                    combinations: List[Dict[str, Any]], store: Optional[IndicatorStore] = None
+                    ) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Signal matrix int8 (bars × combinations, cột j ứng với combinations[j]) và
+    performance của từng bộ tham số trên cùng data.
+    """
+    StrategyClass = get_strategy_class(strategy_type)
+    store = store if store is not None and store.covers(data) else IndicatorStore(data)
+    strategies = [StrategyClass(build_strategy_config(base_config, strategy_type, params)) for params in combinations]
+    signals = StrategyClass.signal_grid(store, strategies)
+    return signals, simulate_signal_grid(store.column('close').to_numpy(), signals, strategies)
+
+def _init_worker(data: pd.DataFrame, base_config: Dict[str, Any], strategy_type: str, engine: str = 'grid'):
+    """Initializer: dữ liệu chỉ được truyền một lần cho mỗi worker"""
+    _worker_state['data'] = data
+    _worker_state['base_config'] = base_config
+    _worker_state['strategy_type'] = strategy_type
+    _worker_state['engine'] = engine
+    _worker_state['indicator_store'] = IndicatorStore(data)
+
+def _run_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Chạy một batch các bộ tham số trong worker hiện tại"""
+    data = _worker_state['data']
+    strategy_type = _worker_state['strategy_type']
+    StrategyClass = get_strategy_class(strategy_type)
+
+    store = _worker_state['indicator_store']
+    if _worker_state.get('engine', 'grid') == 'grid':
+        try:
+            _, performances = run_signal_grid(strategy_type, data, _worker_state['base_config'], batch, store)
+            return [{'params': params, 'performance': performance, 'error': None}
+                    for params, performance in zip(batch, performances)]
+        except Exception as e:
+            # Một bộ tham số lỗi làm hỏng cả ma trận: chạy lại từng bộ để ghi lỗi riêng.
+            # Ghi ra stderr để lỗi của chính grid engine không bị che đi
+            print(f"WARNING: grid engine failed for {strategy_type} batch of {len(batch)} "
+                  f"({type(e).__name__}: {e}); falling back to per-combination backtests", file=sys.stderr)
+
+    strategies = [StrategyClass(build_strategy_config(_worker_state['base_config'], strategy_type, params))
+                  for params in batch]
+    # Indicator của mọi period trong batch được tính một lượt bằng batched kernel
+    StrategyClass.prefill_indicators(store, strategies)
+
+    rows = []
+    for params, strategy in zip(batch, strategies):
+        strategy.indicator_store = store
+        try:
+            performance = strategy.run_backtest(data)['performance']
+            rows.append({'params': params, 'performance': performance, 'error': None})
+        except Exception as e:
+            rows.append({'params': params, 'performance': {}, 'error': str(e)})
+    return rows
+
+def _split_batches(combinations: List[Dict[str, Any]], n_batches: int) -> List[List[Dict[str, Any]]]:
+    """Chia thành các batch liền nhau (không xen kẽ) để giữ cache hit trong từng worker"""
+    n_batches = max(1, min(n_batches, len(combinations)))
+    size = -(-len(combinations) // n_batches)
+    return [combinations[i:i + size] for i in range(0, len(combinations), size)]
+
+def run_parameter_sweep(strategy_type: str, data: pd.DataFrame, base_config: Dict[str, Any],
+                        param_grid: Optional[Dict[str, List[Any]]] = None,
+                        search_space: Optional[Dict[str, Any]] = None,
+                        n_iter: int = 50, seed: Optional[int] = None,
+                        workers: Optional[int] = None, batches_per_worker: int = 4,
+                        rank_by: str = 'total_return', ascending: bool = False,
+                        engine: str = 'grid') -> pd.DataFrame:
+    """
+    Run every parameter combination on the same data and return a ranked table.
+    Mỗi dòng gồm các tham số, các cột trong dict performance, 'error' và 'rank'.
+    """
+    if engine not in SWEEP_ENGINES:
+        raise ValueError(f"Unknown sweep engine '{engine}'")
+    if param_grid is not None:
+        combinations = expand_grid(param_grid)
+    elif search_space is not None:
+        combinations = sample_search_space(search_space, n_iter, seed)
+    else:
+        raise ValueError("Either param_grid or search_space is required")
+
+    if not combinations:
+        return pd.DataFrame()
+
+    # Kiểm tra strategy type trước khi khởi tạo pool
+    get_strategy_class(strategy_type)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(data, base_config, strategy_type, engine)
+        try:
+            rows = _run_batch(combinations)
+        finally:
+            _worker_state.clear()
+    else:
+        batches = _split_batches(combinations, workers * batches_per_worker)
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data, base_config, strategy_type, engine)) as executor:
+            for batch_rows in executor.map(_run_batch, batches):
+                rows.extend(batch_rows)
+
+    table = pd.DataFrame([{**row['params'], **row['performance'], 'error': row['error']} for row in rows])
+    if rank_by in table.columns:
+        table = table.sort_values(rank_by, ascending=ascending, na_position='last', kind='stable')
+    table = table.reset_index(drop=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table
+
+def load_sweep_data(config: Dict[str, Any]) -> pd.DataFrame:
+    """Load và resample OHLCV một lần cho toàn bộ sweep"""
+    from backtest_runner import load_data
+
+    trading = config['trading']
+    return load_data(
+        trading['symbol'],
+        trading['timeframe'],
+        trading.get('startDate', '2023-01-01'),
+        trading.get('endDate', '2023-12-31')
+    )
+
+def table_to_records(table: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert ranked table to JSON-serializable records (NaN -> None)"""
+    records = table.astype(object).where(table.notna(), None).to_dict(orient='records')
+    return [{k: (v.item() if hasattr(v, 'item') else v) for k, v in record.items()} for record in records]
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter Sweep Runner')
+    parser.add_argument('--config', required=True, help='Backtest configuration in JSON format')
+    parser.add_argument('--grid', required=False, help='Parameter grid JSON: {"period": [7, 14, 21], ...}')
+    parser.add_argument('--search_space', required=False,
+                        help='Random search JSON: {"choices": {"period": [7, 14]}, "ranges": {"overbought": [65, 80]}}')
+    parser.add_argument('--n_iter', type=int, default=50, help='Number of random search samples')
+    parser.add_argument('--seed', type=int, default=None, help='Random search seed')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--rank_by', default='total_return', help='Performance metric used for ranking')
+    parser.add_argument('--top', type=int, default=None, help='Only output the top N rows')
+    parser.add_argument('--engine', choices=SWEEP_ENGINES, default='grid',
+                        help='grid: signal matrix int8 + batched simulator; backtest: run_backtest cho từng bộ')
+    args = parser.parse_args()
+
+    try:
+        config = json.loads(args.config)
+        strategy_type = config['strategy']['type']
+
+        search_space = None
+        if args.search_space:
+            raw_space = json.loads(args.search_space)
+            # JSON không có tuple: các khoảng liên tục được khai báo trong "ranges"
+            search_space = dict(raw_space.get('choices', {}))
+            search_space.update({k: tuple(v) for k, v in raw_space.get('ranges', {}).items()})
+
+        data = load_sweep_data(config)
+        table = run_parameter_sweep(
+            strategy_type, data, config,
+            param_grid=json.loads(args.grid) if args.grid else None,
+            search_space=search_space,
+            n_iter=args.n_iter,
+            seed=args.seed,
+            workers=args.workers,
+            rank_by=args.rank_by,
+            engine=args.engine
+        )
+        if args.top:
+            table = table.head(args.top)
+
+        print(json.dumps({'results': table_to_records(table)}))
+    except Exception as e:
+        print(json.dumps({'error': f'Error running parameter sweep: {str(e)}'}))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
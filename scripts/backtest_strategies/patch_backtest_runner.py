@@ -4,55 +4,18 @@ import numpy as np
 import json
 import argparse
 import sys
-import os
+import time
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, List
 from decimal import Decimal
 
-# Import strategies
-from rsi_strategy import RSIStrategy
-from ma_crossover_strategy import MACrossoverStrategy  
-from macd_strategy import MACDStrategy
-from bollinger_bands_strategy import BollingerBandsStrategy
-from breakout_strategy import BreakoutStrategy
-from stochastic_strategy import StochasticStrategy
-from williams_r_strategy import WilliamsRStrategy
-from adx_strategy import ADXStrategy
-from ichimoku_strategy import IchimokuStrategy
-from parabolic_sar_strategy import ParabolicSARStrategy
-from keltner_channel_strategy import KeltnerChannelStrategy
-from vwap_strategy import VWAPStrategy
-
-def convert_datetime_to_string(obj):
-    """Convert datetime objects to string for JSON serialization"""
-    if isinstance(obj, (datetime, pd.Timestamp)):
-        return obj.isoformat()
-    elif isinstance(obj, np.datetime64):
-        return pd.Timestamp(obj).isoformat()
-    elif isinstance(obj, (np.integer, np.floating)):
-        # Handle NaN values
-        if np.isnan(obj):
-            return None
-        return obj.item()
-    elif isinstance(obj, np.ndarray):
-        # Handle NaN values in arrays
-        result = []
-        for x in obj.tolist():
-            if isinstance(x, (np.floating, float)) and np.isnan(x):
-                result.append(None)
-            elif hasattr(x, 'item'):
-                result.append(x.item())
-            else:
-                result.append(convert_datetime_to_string(x))
-        return result
-    elif isinstance(obj, dict):
-        return {k: convert_datetime_to_string(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_datetime_to_string(item) for item in obj]
-    elif isinstance(obj, float) and np.isnan(obj):
-        # Handle regular Python float NaN
-        return None
-    return obj
+from market_data import ohlcv_table_name
+from resample_pyramid import timeframe_nanos
+from ohlcv_cache import load_ohlcv
+from strategy_registry import get_strategy_class, build_strategy_config
+from ndjson_output import NDJSONWriter, DEFAULT_CHUNK_SIZE
+from serialization import to_json_safe, chart_payload, CHART_FORMATS
 
 def load_patch_data(start_date: str, end_date: str, symbol: str = 'BTC', timeframe: str = '1h', 
                     supabase_url: str = None, supabase_key: str = None) -> pd.DataFrame:
@@ -60,83 +23,11 @@ def load_patch_data(start_date: str, end_date: str, symbol: str = 'BTC', timefra
     Load data cho một patch cụ thể từ Supabase - giống như backtest bình thường
     """
     try:
-        from supabase import create_client, Client
-        
-        # Supabase config - từ arguments hoặc env vars
-        if supabase_url and supabase_key:
-            url = supabase_url
-            key = supabase_key
-        else:
-            url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-            key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-        
-        if not url or not key:
-            raise ValueError("Missing Supabase credentials")
-            
-        supabase: Client = create_client(url, key)
-        
-        # Chỉ dùng bảng 1m như backtest bình thường
-        table_name = "OHLCV_BTC_USDT_1m"
-        
-        # Query data cho patch
-        response = supabase.table(table_name).select('*').gte('open_time', start_date).lte('open_time', end_date).order('open_time', desc=False).execute()
-        
-        if not response.data:
-            raise ValueError(f"No data found for period {start_date} to {end_date} in {table_name}")
-            
-        # Convert to DataFrame
-        df = pd.DataFrame(response.data)
-        
-        # Rename columns to match expected format
-        df = df.rename(columns={
-            'open_price': 'open',
-            'high_price': 'high', 
-            'low_price': 'low',
-            'close_price': 'close',
-            'volume': 'volume'
-        })
-        
-        # Convert to float
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = df[col].astype(float)
-            
-        # Set datetime index
-        df['open_time'] = pd.to_datetime(df['open_time'])
-        df = df.set_index('open_time')
-        
-        # Resample data theo timeframe - giống như backtest bình thường
-        if timeframe != '1m':  # Nếu không phải 1 phút thì cần resample
-            # Map timeframe to pandas offset string
-            timeframe_map = {
-                '1m': '1T',
-                '3m': '3T',
-                '5m': '5T',
-                '15m': '15T',
-                '30m': '30T',
-                '1h': 'H',
-                '2h': '2H',
-                '4h': '4H',
-                '6h': '6H',
-                '8h': '8H',
-                '12h': '12H',
-                '1d': 'D',
-                '3d': '3D',
-                '1w': 'W',
-                '1M': 'M'
-            }
-            
-            rule = timeframe_map.get(timeframe)
-            if not rule:
-                raise ValueError(f"Invalid timeframe: {timeframe}")
-            
-            # Resample OHLCV data
-            df = df.resample(rule).agg({
-                'open': 'first',
-                'high': 'max',
-                'low': 'min',
-                'close': 'last',
-                'volume': 'sum'
-            }).dropna()
+        # Chỉ dùng bảng 1m của symbol như backtest bình thường; đọc từ local cache, chỉ fetch
+        # phần còn thiếu, và resample theo timeframe - giống như backtest bình thường
+        df = load_ohlcv(symbol, start_date, end_date, timeframe, supabase_url, supabase_key)
+        if len(df) == 0:
+            raise ValueError(f"No data found for period {start_date} to {end_date} in {ohlcv_table_name(symbol)}")
         
         return df
         
@@ -166,32 +57,60 @@ def generate_patches(start_date: str, end_date: str, days_per_patch: int) -> Lis
         
     return patches
 
-def run_patch_backtest_with_strategy(patch_data: pd.DataFrame, config: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+def patch_bounds(data: pd.DataFrame, start_date: str, end_date: str) -> tuple:
     """
-    Chạy backtest cho một patch sử dụng strategy classes
+    Vị trí [lo, hi) của một patch trong dữ liệu đã load cho cả khoảng thời gian.
+    Hai đầu đều inclusive giống query gte/lte của load_patch_data.
     """
-    # Strategy mapping
-    strategy_map = {
-        'ma_crossover': MACrossoverStrategy,
-        'rsi': RSIStrategy,
-        'macd': MACDStrategy,
-        'bollinger_bands': BollingerBandsStrategy,
-        'breakout': BreakoutStrategy,
-        'stochastic': StochasticStrategy,
-        'williams_r': WilliamsRStrategy,
-        'adx': ADXStrategy,
-        'ichimoku': IchimokuStrategy,
-        'parabolic_sar': ParabolicSARStrategy,
-        'keltner_channel': KeltnerChannelStrategy,
-        'vwap': VWAPStrategy
-    }
-    
-    # Get strategy class
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    tz = getattr(data.index, 'tz', None)
+    if tz is not None:
+        start = start.tz_localize(tz) if start.tz is None else start.tz_convert(tz)
+        end = end.tz_localize(tz) if end.tz is None else end.tz_convert(tz)
+    else:
+        start = start.tz_convert(None) if start.tz is not None else start
+        end = end.tz_convert(None) if end.tz is not None else end
+    # Index đã sắp xếp: cắt theo vị trí (binary search) thay vì so sánh toàn bộ index
+    lo = data.index.searchsorted(start, side='left')
+    hi = data.index.searchsorted(end, side='right')
+    return lo, hi
+
+def slice_patch_data(data: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """Cắt dữ liệu của một patch từ dữ liệu đã load cho cả khoảng thời gian"""
+    lo, hi = patch_bounds(data, start_date, end_date)
+    return data.iloc[lo:hi]
+
+def slice_patch_with_warmup(data: pd.DataFrame, start_date: str, end_date: str, warmup: int) -> tuple:
+    """
+    Dữ liệu của một patch kèm tối đa warmup bar ngay trước nó (lịch sử để indicator
+    của bar đầu patch đã ổn định). Trả về (frame, số bar warm-up thực có).
+    """
+    lo, hi = patch_bounds(data, start_date, end_date)
+    context = max(0, lo - warmup)
+    return data.iloc[context:hi], lo - context
+
+def warmup_start(start_date: str, timeframe: str, warmup: int) -> str:
+    """
+    Thời điểm bắt đầu load để có warmup bar trước start_date.
+    Timeframe theo lịch ('1w', '1M') lấy độ dài lớn nhất của một bar.
+    """
+    if warmup <= 0:
+        return start_date
+    nanos = timeframe_nanos(timeframe) or pd.Timedelta(days=31 if timeframe.endswith('M') else 7).value
+    return (pd.Timestamp(start_date) - pd.Timedelta(nanos * warmup, unit='ns')).isoformat()
+
+def elapsed_ms(started: float) -> float:
+    """Milliseconds since a time.perf_counter() mark"""
+    return round((time.perf_counter() - started) * 1000, 3)
+
+def build_patch_strategy_config(config: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    """
+    Chuyển config dạng phẳng của patch runner thành config dạng strategy classes
+    """
+    # Get strategy type (kiểm tra strategy có được hỗ trợ)
     strategy_type = config.get('strategyType', config.get('strategy', {}).get('type', 'rsi'))
-    if strategy_type not in strategy_map:
-        raise ValueError(f"Strategy type '{strategy_type}' not supported")
-        
-    StrategyClass = strategy_map[strategy_type]
+    get_strategy_class(strategy_type)
     
     # Prepare config for strategy class
     strategy_config = {
@@ -256,20 +175,136 @@ def run_patch_backtest_with_strategy(patch_data: pd.DataFrame, config: Dict[str,
                 'multiplier': config.get('keltnerChannelMultiplier', 2.0),
                 # VWAP parameters
                 'vwap_period': config.get('vwapPeriod', 20),
-                'std_dev_multiplier': config.get('vwapStdDev', 2.0)
+                'std_dev_multiplier': config.get('vwapStdDev', 2.0),
+                # Ensemble parameters (None -> mặc định của EnsembleStrategy)
+                'members': config.get('members'),
+                'method': config.get('ensembleMethod'),
+                'minVotes': config.get('ensembleMinVotes'),
+                'threshold': config.get('ensembleThreshold'),
+                'holdBars': config.get('ensembleHoldBars')
             }
         }
     }
-    
+    return strategy_config
+
+def build_patch_strategy(config: Dict[str, Any], initial_capital: float, parameters: Dict[str, Any] = None):
+    """
+    Strategy instance cho một patch.
+    parameters (nếu có) ghi đè tham số strategy, ví dụ bộ tham số tối ưu của walk-forward.
+    """
+    strategy_config = build_patch_strategy_config(config, initial_capital)
+    strategy_type = strategy_config['strategy']['type']
+    if parameters:
+        strategy_config = build_strategy_config(strategy_config, strategy_type, parameters)
+    return get_strategy_class(strategy_type)(strategy_config), strategy_type
+
+def patch_warmup_bars(config: Dict[str, Any], parameters: Dict[str, Any] = None) -> int:
+    """Warm-up lookback mà strategy của config (với parameters nếu có) khai báo"""
+    strategy, _ = build_patch_strategy(config, 1.0, parameters)
+    return strategy.warmup_bars
+
+def run_patch_backtest_with_strategy(patch_data: pd.DataFrame, config: Dict[str, Any], initial_capital: float,
+                                     parameters: Dict[str, Any] = None, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Chạy backtest cho một patch sử dụng strategy classes.
+    parameters (nếu có) ghi đè tham số strategy, ví dụ bộ tham số tối ưu của walk-forward.
+    warmup bar đầu của patch_data là lịch sử trước patch: chỉ dùng để tính indicator,
+    không giao dịch và không xuất indicator.
+    """
     # Initialize strategy
-    strategy = StrategyClass(strategy_config)
+    strategy, _ = build_patch_strategy(config, initial_capital, parameters)
     
     # Run backtest
-    results = strategy.run_backtest(patch_data)
+    started = time.perf_counter()
+    signals = strategy.warmup_signals(patch_data, warmup)
+    results = strategy.run_plan(strategy.plan_trades(signals))
+    backtest_ms = elapsed_ms(started)
     
     # Extract indicators data
-    indicators_data = extract_indicators_data(strategy, patch_data, strategy_type)
+    started = time.perf_counter()
+    indicators_data = extract_indicators_data(strategy, patch_data.iloc[warmup:], signals,
+                                              config.get('chartDecimation', 1))
+    indicators_ms = elapsed_ms(started)
+    
+    return format_patch_result(results, initial_capital, indicators_data,
+                               {'bars': len(signals), 'warmupBars': warmup,
+                                'backtestMs': backtest_ms, 'indicatorsMs': indicators_ms})
+
+def prepare_patch(patch_data: pd.DataFrame, config: Dict[str, Any], parameters: Dict[str, Any] = None,
+                  warmup: int = 0) -> Dict[str, Any]:
+    """
+    Phần không phụ thuộc vốn của một patch: signals, trade plan (điểm vào/ra lệnh)
+    và indicators cho chart. Chạy được song song trong worker process.
+    """
+    strategy, _ = build_patch_strategy(config, 1.0, parameters)
+    
+    started = time.perf_counter()
+    signals = strategy.warmup_signals(patch_data, warmup)
+    plan = strategy.plan_trades(signals)
+    plan_ms = elapsed_ms(started)
+    
+    started = time.perf_counter()
+    indicators_data = extract_indicators_data(strategy, patch_data.iloc[warmup:], signals,
+                                              config.get('chartDecimation', 1))
+    indicators_ms = elapsed_ms(started)
+    
+    return {'plan': plan, 'indicators': indicators_data,
+            'timing': {'bars': len(signals), 'warmupBars': warmup, 'backtestMs': plan_ms, 'indicatorsMs': indicators_ms}}
+
+def finish_patch(prepared: Dict[str, Any], config: Dict[str, Any], initial_capital: float,
+                 parameters: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Áp vốn đầu patch vào trade plan đã chuẩn bị (O(số lệnh)); kết quả giống hệt
+    run_patch_backtest_with_strategy trên cùng dữ liệu
+    """
+    strategy, _ = build_patch_strategy(config, initial_capital, parameters)
+    started = time.perf_counter()
+    results = strategy.run_plan(prepared['plan'])
+    timing = dict(prepared['timing'])
+    timing['backtestMs'] = round(timing['backtestMs'] + elapsed_ms(started), 3)
+    return format_patch_result(results, initial_capital, prepared['indicators'], timing)
+
+def _prepare_patch_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return prepare_patch(job['data'], job['config'], warmup=job['warmup'])
+
+def run_patches(jobs: List[Dict[str, Any]], config: Dict[str, Any], initial_capital: float,
+                workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    Chạy các patch (mỗi job có 'data', 'warmup' và 'sliceMs'), vốn cuối patch trước là vốn đầu patch sau.
+    workers > 1: signals và trade plan của các patch được tính song song, sau đó
+    vốn được nối tiếp qua các patch bằng một vòng tuần tự rẻ; kết quả giống hệt workers=1.
+    """
+    current_capital = initial_capital
+    patch_results = []
+    workers = min(workers, len(jobs))
+    if workers > 1:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            prepared = list(executor.map(_prepare_patch_job, [{'data': job['data'], 'config': config, 'warmup': job.get('warmup', 0)}
+                                                            for job in jobs]))
+        # Thời gian chờ pool được chia đều cho các patch
+        pool_ms = elapsed_ms(started) / len(jobs)
     
+    for i, job in enumerate(jobs):
+        started = time.perf_counter()
+        if workers > 1:
+            patch_result = finish_patch(prepared[i], config, current_capital)
+            patch_ms = elapsed_ms(started) + pool_ms
+        else:
+            patch_result = run_patch_backtest_with_strategy(job['data'], config, current_capital,
+                                                            warmup=job.get('warmup', 0))
+            patch_ms = elapsed_ms(started)
+        patch_result['timing'] = {'sliceMs': job['sliceMs'], **patch_result['timing'],
+                                  'totalMs': round(job['sliceMs'] + patch_ms, 3)}
+        patch_results.append(patch_result)
+        
+        # Rebalance: update capital for next patch
+        current_capital = patch_result['finalCapital']
+    return patch_results
+
+def format_patch_result(results: Dict[str, Any], initial_capital: float, indicators_data: Dict[str, Any],
+                        timing: Dict[str, Any]) -> Dict[str, Any]:
+    """Kết quả một patch theo format của patch runner"""
     # Return formatted results - clean up all datetime objects
     result = {
         'initialCapital': initial_capital,
@@ -282,11 +317,14 @@ def run_patch_backtest_with_strategy(patch_data: pd.DataFrame, config: Dict[str,
         'maxDrawdown': results['performance']['max_drawdown'],
         'sharpeRatio': results['performance'].get('sharpe_ratio', 0),
         'trades': results['trades'],
-        'indicators': indicators_data
+        'indicators': None,
+        'timing': timing
     }
     
-    # Clean up all datetime objects in the entire result
-    return convert_datetime_to_string(result)
+    # Clean up all datetime objects (indicator arrays giữ nguyên tới khi xuất output)
+    result = to_json_safe(result)
+    result['indicators'] = indicators_data
+    return result
 
 def aggregate_patch_results(patch_results: List[Dict[str, Any]], initial_capital: float) -> Dict[str, Any]:
     """
@@ -350,116 +388,20 @@ def aggregate_patch_results(patch_results: List[Dict[str, Any]], initial_capital
     }
     
     # Clean up datetime objects
-    return convert_datetime_to_string(result)
+    return to_json_safe(result)
 
-def extract_indicators_data(strategy, patch_data: pd.DataFrame, strategy_type: str) -> Dict[str, Any]:
+def extract_indicators_data(strategy, patch_data: pd.DataFrame, signals_data: pd.DataFrame = None,
+                            decimation: int = 1) -> Dict[str, Any]:
     """
-    Extract indicators data for chart display
+    Extract indicators data for chart display (signals_data: signals đã tính, nếu có).
+    Các cột do strategy khai báo (indicator_columns) được cắt thẳng từ signal frame
+    thành mảng NumPy; NaN được đổi thành null khi xuất JSON.
     """
     try:
         # Generate signals to get indicators
-        signals_data = strategy.generate_signals(patch_data)
-        
-        # Convert timestamps to milliseconds
-        timestamps = (signals_data.index.astype(np.int64) // 10**6).tolist()
-        close_prices = signals_data['close'].tolist()
-        
-        indicators = {
-            'timestamps': timestamps,
-            'close_prices': close_prices,
-            'indicators': {}
-        }
-        
-        # Extract indicators based on strategy type
-        if strategy_type == 'rsi':
-            if 'rsi' in signals_data.columns:
-                indicators['indicators']['rsi'] = signals_data['rsi'].tolist()
-                
-        elif strategy_type == 'ma_crossover':
-            if 'fast_ma' in signals_data.columns:
-                indicators['indicators']['fast_ma'] = signals_data['fast_ma'].tolist()
-            if 'slow_ma' in signals_data.columns:
-                indicators['indicators']['slow_ma'] = signals_data['slow_ma'].tolist()
-                
-        elif strategy_type == 'macd':
-            if 'macd' in signals_data.columns:
-                indicators['indicators']['macd'] = signals_data['macd'].tolist()
-            if 'signal_line' in signals_data.columns:
-                indicators['indicators']['signal_line'] = signals_data['signal_line'].tolist()
-            if 'histogram' in signals_data.columns:
-                indicators['indicators']['histogram'] = signals_data['histogram'].tolist()
-                
-        elif strategy_type == 'bollinger_bands':
-            if 'upper' in signals_data.columns:
-                indicators['indicators']['upper'] = signals_data['upper'].tolist()
-            if 'middle' in signals_data.columns:
-                indicators['indicators']['middle'] = signals_data['middle'].tolist()
-            if 'lower' in signals_data.columns:
-                indicators['indicators']['lower'] = signals_data['lower'].tolist()
-                
-        elif strategy_type == 'breakout':
-            if 'upper_channel' in signals_data.columns:
-                indicators['indicators']['upper_channel'] = signals_data['upper_channel'].tolist()
-            if 'lower_channel' in signals_data.columns:
-                indicators['indicators']['lower_channel'] = signals_data['lower_channel'].tolist()
-                
-        elif strategy_type == 'stochastic':
-            if 'stoch_k' in signals_data.columns:
-                indicators['indicators']['stoch_k'] = signals_data['stoch_k'].tolist()
-            if 'stoch_d' in signals_data.columns:
-                indicators['indicators']['stoch_d'] = signals_data['stoch_d'].tolist()
-                
-        elif strategy_type == 'williams_r':
-            if 'williams_r' in signals_data.columns:
-                indicators['indicators']['williams_r'] = signals_data['williams_r'].tolist()
-                
-        elif strategy_type == 'adx':
-            if 'adx' in signals_data.columns:
-                indicators['indicators']['adx'] = signals_data['adx'].tolist()
-            if 'di_plus' in signals_data.columns:
-                indicators['indicators']['di_plus'] = signals_data['di_plus'].tolist()
-            if 'di_minus' in signals_data.columns:
-                indicators['indicators']['di_minus'] = signals_data['di_minus'].tolist()
-                
-        elif strategy_type == 'ichimoku':
-            if 'tenkan' in signals_data.columns:
-                indicators['indicators']['tenkan'] = signals_data['tenkan'].tolist()
-            if 'kijun' in signals_data.columns:
-                indicators['indicators']['kijun'] = signals_data['kijun'].tolist()
-            if 'senkou_span_a' in signals_data.columns:
-                indicators['indicators']['senkou_span_a'] = signals_data['senkou_span_a'].tolist()
-            if 'senkou_span_b' in signals_data.columns:
-                indicators['indicators']['senkou_span_b'] = signals_data['senkou_span_b'].tolist()
-            if 'chikou' in signals_data.columns:
-                indicators['indicators']['chikou'] = signals_data['chikou'].tolist()
-                
-        elif strategy_type == 'parabolic_sar':
-            if 'parabolic_sar' in signals_data.columns:
-                indicators['indicators']['parabolic_sar'] = signals_data['parabolic_sar'].tolist()
-            if 'trend' in signals_data.columns:
-                indicators['indicators']['trend'] = signals_data['trend'].tolist()
-                
-        elif strategy_type == 'keltner_channel':
-            if 'keltner_ema' in signals_data.columns:
-                indicators['indicators']['keltner_ema'] = signals_data['keltner_ema'].tolist()
-            if 'keltner_upper' in signals_data.columns:
-                indicators['indicators']['keltner_upper'] = signals_data['keltner_upper'].tolist()
-            if 'keltner_lower' in signals_data.columns:
-                indicators['indicators']['keltner_lower'] = signals_data['keltner_lower'].tolist()
-            if 'keltner_atr' in signals_data.columns:
-                indicators['indicators']['keltner_atr'] = signals_data['keltner_atr'].tolist()
-                
-        elif strategy_type == 'vwap':
-            if 'vwap' in signals_data.columns:
-                indicators['indicators']['vwap'] = signals_data['vwap'].tolist()
-            if 'vwap_upper' in signals_data.columns:
-                indicators['indicators']['vwap_upper'] = signals_data['vwap_upper'].tolist()
-            if 'vwap_lower' in signals_data.columns:
-                indicators['indicators']['vwap_lower'] = signals_data['vwap_lower'].tolist()
-            if 'vwap_std' in signals_data.columns:
-                indicators['indicators']['vwap_std'] = signals_data['vwap_std'].tolist()
-        
-        return indicators
+        if signals_data is None:
+            signals_data = strategy.generate_signals(patch_data)
+        return strategy.export_indicators(signals_data, decimation)
         
     except Exception as e:
         return {
@@ -468,18 +410,57 @@ def extract_indicators_data(strategy, patch_data: pd.DataFrame, strategy_type: s
             'indicators': {}
         }
 
-def main():
+def concatenate_blocks(blocks: List[Any]) -> Any:
+    """Nối các mảng (hoặc list) của từng patch theo thứ tự"""
+    if not blocks:
+        return []
+    if all(isinstance(block, np.ndarray) for block in blocks):
+        return np.concatenate(blocks)
+    return [value for block in blocks for value in block]
+
+def write_ndjson_results(writer: NDJSONWriter, patch_results: List[Dict[str, Any]], total_results: Dict[str, Any],
+                         timing: Dict[str, Any], experiment_id: str):
+    """
+    Output dạng NDJSON: dòng 'summary' (kết quả tổng và từng patch, không kèm trades/
+    indicators), sau đó trades và indicators của từng patch theo khối ('patch' là chỉ
+    số patch), cuối cùng là dòng 'end'. Mỗi patch được giải phóng ngay sau khi ghi.
+    """
+    writer.write('summary', success=True, experiment_id=experiment_id, results=total_results, timing=timing,
+                 patches=[{key: value for key, value in patch.items() if key not in ('trades', 'indicators')}
+                          for patch in patch_results])
+    total_trades = 0
+    for i, patch_result in enumerate(patch_results):
+        trades = patch_result.pop('trades', [])
+        writer.write_trades(trades, patch=i)
+        total_trades += len(trades)
+        writer.write_indicators(patch_result.pop('indicators', {}), patch=i)
+    writer.end(success=True, experiment_id=experiment_id, patches=len(patch_results), trades=total_trades)
+
+def main(argv: List[str] = None):
+    """CLI entry point; argv mặc định là sys.argv (worker_service gọi trực tiếp với argv của job)"""
     parser = argparse.ArgumentParser(description='Patch Backtest Runner')
     parser.add_argument('--experiment_id', required=True, help='Experiment ID')
     parser.add_argument('--config', required=True, help='Configuration JSON')
     parser.add_argument('--supabase_url', required=False, help='Supabase URL')
     parser.add_argument('--supabase_key', required=False, help='Supabase Service Role Key')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for patch signals (1 = sequential)')
+    parser.add_argument('--output', choices=['json', 'ndjson'], default='json',
+                        help='json: một document; ndjson: summary rồi từng khối trades/indicators theo dòng')
+    parser.add_argument('--chunk_size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Số trade/bar tối đa trong mỗi dòng của output ndjson')
+    parser.add_argument('--chart_format', choices=CHART_FORMATS, default='json',
+                        help='json: indicator là list số (NaN -> null); float32: buffer nhị phân base64')
+    parser.add_argument('--chart_decimation', type=int, default=None,
+                        help='Chỉ xuất mỗi bar thứ N của indicator cho chart (mặc định config chartDecimation hoặc 1)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     try:
         # Parse config
         config = json.loads(args.config)
+        if args.chart_decimation is not None:
+            config['chartDecimation'] = args.chart_decimation
         
         # Extract parameters
         start_date = config.get('startDate')
@@ -490,67 +471,88 @@ def main():
         # Generate patches
         patches = generate_patches(start_date, end_date, patch_days)
         
-        # Run backtest for each patch
-        patch_results = []
-        current_capital = initial_capital
-        all_trades = []
-        all_indicators = {
-            'timestamps': [],
-            'close_prices': [],
-            'indicators': {}
-        }
+        # Warm-up lookback strategy khai báo: mỗi patch được tính kèm đúng chừng ấy bar
+        # ngay trước nó (patch đầu tiên lấy từ phần load thêm trước start_date), nên
+        # indicator nối liền qua ranh giới patch thay vì NaN ở đầu mỗi patch
+        warmup = patch_warmup_bars(config)
         
+        # Load và resample toàn bộ khoảng thời gian một lần; mỗi patch chỉ cắt theo vị trí
+        run_started = time.perf_counter()
+        full_data = load_patch_data(
+            warmup_start(start_date, config.get('timeframe', '1h'), warmup),
+            end_date,
+            config.get('symbol', 'BTC'),
+            config.get('timeframe', '1h'),
+            args.supabase_url,
+            args.supabase_key
+        )
+        load_ms = elapsed_ms(run_started)
+        
+        # Slice data for each patch
+        jobs = []
         for i, patch in enumerate(patches):
-            # Load data for this patch
-            patch_data = load_patch_data(
-                patch['startDate'], 
-                patch['endDate'],
-                config.get('symbol', 'BTC'),
-                config.get('timeframe', '1h'),
-                args.supabase_url,
-                args.supabase_key
-            )
-            
-            if patch_data is None:
+            slice_started = time.perf_counter()
+            if full_data is None:
                 # Log the issue for debugging
                 error_info = f"No data loaded for patch {i+1}: {patch['startDate']} to {patch['endDate']}"
                 continue
                 
-            if len(patch_data) == 0:
+            patch_data, patch_warmup = slice_patch_with_warmup(full_data, patch['startDate'], patch['endDate'], warmup)
+            if len(patch_data) == patch_warmup:
                 # Log the issue for debugging  
                 error_info = f"Empty data for patch {i+1}: {patch['startDate']} to {patch['endDate']}"
                 continue
             
-            # Run backtest for this patch
-            patch_result = run_patch_backtest_with_strategy(patch_data, config, current_capital)
-            patch_results.append(patch_result)
-            
+            jobs.append({'data': patch_data, 'warmup': patch_warmup, 'sliceMs': elapsed_ms(slice_started)})
+        
+        # Run backtest for each patch (song song khi --workers > 1, vốn vẫn nối tiếp theo thứ tự patch)
+        patches_started = time.perf_counter()
+        patch_results = run_patches(jobs, config, initial_capital, max(1, args.workers))
+        patches_ms = elapsed_ms(patches_started)
+        
+        # Aggregate results
+        total_results = aggregate_patch_results(patch_results, initial_capital)
+        timing = {
+            'loadMs': load_ms,
+            'patchesMs': patches_ms,
+            'workers': min(max(1, args.workers), max(1, len(jobs))),
+            'totalMs': elapsed_ms(run_started)
+        }
+        
+        if args.output == 'ndjson':
+            writer = NDJSONWriter(sys.stdout, args.chunk_size, args.chart_format)
+            write_ndjson_results(writer, patch_results, total_results, timing, args.experiment_id)
+            return
+        
+        all_trades = []
+        all_indicators = {
+            'timestamps': [],
+            'close_prices': [],
+            'indicators': {}
+        }
+        for patch_result in patch_results:
             # Aggregate trades
-            patch_trades = patch_result.get('trades', [])
-            # Debug: Log patch trades (commented out to avoid JSON parsing issues)
-            # print(f"[INFO] Patch {i+1} trades: {len(patch_trades)} trades")
-            # Debug: Log sample trade (commented out to avoid JSON parsing issues)
-            # if patch_trades:
-            #     print(f"  - Sample trade: {patch_trades[0] if patch_trades else 'None'}")
-            all_trades.extend(patch_trades)
+            all_trades.extend(patch_result.get('trades', []))
             
             # Aggregate indicators
             patch_indicators = patch_result.get('indicators', {})
-            if patch_indicators.get('timestamps'):
-                all_indicators['timestamps'].extend(patch_indicators['timestamps'])
-                all_indicators['close_prices'].extend(patch_indicators['close_prices'])
+            if len(patch_indicators.get('timestamps', [])):
+                all_indicators['timestamps'].append(patch_indicators['timestamps'])
+                all_indicators['close_prices'].append(patch_indicators['close_prices'])
                 
                 # Merge indicators
                 for indicator_name, values in patch_indicators.get('indicators', {}).items():
-                    if indicator_name not in all_indicators['indicators']:
-                        all_indicators['indicators'][indicator_name] = []
-                    all_indicators['indicators'][indicator_name].extend(values)
-            
-            # Rebalance: update capital for next patch
-            current_capital = patch_result['finalCapital']
+                    all_indicators['indicators'].setdefault(indicator_name, []).append(values)
         
-        # Aggregate results
-        total_results = aggregate_patch_results(patch_results, initial_capital)
+        # Ghép mảng của các patch một lần
+        all_indicators['timestamps'] = concatenate_blocks(all_indicators['timestamps'])
+        all_indicators['close_prices'] = concatenate_blocks(all_indicators['close_prices'])
+        all_indicators['indicators'] = {name: concatenate_blocks(blocks)
+                                        for name, blocks in all_indicators['indicators'].items()}
+        if args.chart_format != 'json':
+            all_indicators = chart_payload(all_indicators, args.chart_format)
+            for patch_result in patch_results:
+                patch_result['indicators'] = chart_payload(patch_result['indicators'], args.chart_format)
         
         # Output results with trades and indicators
         results = {
@@ -559,11 +561,12 @@ def main():
             'patches': patch_results,
             'trades': all_trades,  # All trades from all patches
             'indicators': all_indicators,  # All indicators from all patches
+            'timing': timing,
             'experiment_id': args.experiment_id
         }
         
         # Clean up datetime objects before JSON serialization
-        clean_results = convert_datetime_to_string(results)
+        clean_results = to_json_safe(results)
         
         # Output JSON to stdout with NaN handling
         json_output = json.dumps(clean_results, allow_nan=False, default=str)
@@ -577,7 +580,9 @@ def main():
             'error': str(e),
             'experiment_id': args.experiment_id
         }
-        clean_error = convert_datetime_to_string(error_result)
+        if args.output == 'ndjson':
+            error_result = {'type': 'error', **error_result}
+        clean_error = to_json_safe(error_result)
         print(json.dumps(clean_error, allow_nan=False, default=str))
         sys.exit(1)
 
@@ -0,0 +1,158 @@
+"""
+Vectorized performance metrics trên equity curve (mảng float64).
+
+Drawdown và underwater duration dùng running max (np.maximum.accumulate) thay vì
+cập nhật từng bar trong vòng lặp; Sharpe/Sortino/Calmar dùng lợi nhuận theo bar
+và cùng giả định 252 kỳ/năm như Sharpe ratio trước đây.
+lttb_indices giảm số điểm của equity curve (Largest-Triangle-Three-Buckets)
+trước khi gửi cho frontend mà vẫn giữ hình dạng đường cong.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+PERIODS_PER_YEAR = 252
+
+def running_peak(equity: np.ndarray) -> np.ndarray:
+    return np.maximum.accumulate(equity) if len(equity) else equity
+
+def drawdown_curve(equity: np.ndarray) -> np.ndarray:
+    """Drawdown (tỷ lệ so với đỉnh gần nhất) tại từng bar"""
+    peak = running_peak(equity)
+    return (peak - equity) / peak
+
+def max_drawdown(equity: np.ndarray) -> float:
+    return float(drawdown_curve(equity).max()) if len(equity) else 0.0
+
+def underwater_durations(equity: np.ndarray) -> np.ndarray:
+    """Số bar liên tiếp equity nằm dưới đỉnh gần nhất, tính tại từng bar"""
+    underwater = equity < running_peak(equity)
+    positions = np.arange(len(equity))
+    # Vị trí bar gần nhất đạt đỉnh mới (không underwater)
+    last_peak = np.maximum.accumulate(np.where(underwater, -1, positions)) if len(equity) else positions
+    return positions - last_peak
+
+def max_drawdown_duration(equity: np.ndarray) -> int:
+    """Longest underwater stretch in bars"""
+    return int(underwater_durations(equity).max()) if len(equity) else 0
+
+def period_returns(equity: np.ndarray) -> np.ndarray:
+    """Lợi nhuận theo bar như pd.Series(equity).pct_change().dropna()"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[1:] / equity[:-1] - 1
+    return returns[~np.isnan(returns)]
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year: int = PERIODS_PER_YEAR) -> float:
+    """Annualized Sharpe ratio (risk-free rate = 0, std với ddof=1)"""
+    if len(returns) == 0:
+        return 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.std(returns, ddof=1) if len(returns) > 1 else np.nan
+        return np.sqrt(periods_per_year) * (np.mean(returns) / std)
+
+def sortino_ratio(returns: np.ndarray, periods_per_year: int = PERIODS_PER_YEAR) -> float:
+    """Annualized Sortino ratio; downside deviation tính trên toàn bộ số bar"""
+    if len(returns) == 0:
+        return 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    if downside == 0:
+        return 0.0
+    return float(np.sqrt(periods_per_year) * np.mean(returns) / downside)
+
+def calmar_ratio(equity: np.ndarray, periods_per_year: int = PERIODS_PER_YEAR) -> float:
+    """Annualized return / max drawdown, 0 nếu không có drawdown"""
+    drawdown = max_drawdown(equity)
+    if len(equity) < 2 or drawdown == 0:
+        return 0.0
+    growth = equity[-1] / equity[0]
+    annual_return = growth ** (periods_per_year / (len(equity) - 1)) - 1 if growth > 0 else -1.0
+    return float(annual_return / drawdown)
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    Điểm đầu và cuối luôn được giữ; trục x là chỉ số bar.
+    """
+    if n_out < 3:
+        raise ValueError("n_out must be at least 3")
+    n = len(values)
+    if n <= n_out:
+        return np.arange(n)
+
+    y = np.asarray(values, dtype=np.float64)
+    # n_out - 2 bucket cho các điểm giữa
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        start, end = edges[k], edges[k + 1]
+        # Trung bình của bucket kế tiếp (bucket cuối dùng điểm cuối)
+        next_start, next_end = (edges[k + 1], edges[k + 2]) if k + 2 < len(edges) else (n - 1, n)
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = y[next_start:next_end].mean()
+
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[k + 1] = a
+    return selected
+
+def downsample_equity(equity, n_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(bar indices, equity values) với tối đa n_points điểm"""
+    equity = np.asarray(equity, dtype=np.float64)
+    n = len(equity)
+    if n <= n_points:
+        indices = np.arange(n)
+    elif n_points < 3:
+        # LTTB cần ít nhất 3 điểm: giữ điểm cuối, và điểm đầu khi n_points = 2
+        indices = np.array([0, n - 1][2 - max(n_points, 0):], dtype=np.int64)
+    else:
+        indices = lttb_indices(equity, n_points)
+    return indices, equity[indices]
+
+def performance_summary(trade_pnl: np.ndarray, trade_value: np.ndarray, equity: np.ndarray,
+                        initial_capital: float, final_capital: float, total_fee: float) -> dict:
+    """
+    Performance dict của một backtest từ pnl net (đã trừ phí) và giá trị vào lệnh
+    (entry_price * size) của từng lệnh cùng equity curve.
+    """
+    trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+    trade_value = np.asarray(trade_value, dtype=np.float64)
+    total_trades = len(trade_pnl)
+    wins = trade_pnl > 0
+    losses = trade_pnl < 0
+    winning_trades = int(wins.sum())
+    losing_trades = total_trades - winning_trades
+    win_rate = winning_trades / total_trades if total_trades > 0 else 0
+
+    avg_win = np.mean(trade_pnl[wins]) if winning_trades > 0 else 0
+    avg_loss = np.mean(trade_pnl[losses]) if losing_trades > 0 else 0
+
+    # Tỷ lệ lợi nhuận net (%) của từng lệnh theo giá trị vào lệnh
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_ratio = np.where(trade_value > 0, (trade_pnl / trade_value) * 100, 0.0)
+    avg_win_net = np.mean(profit_ratio[wins]) if wins.any() else 0
+    avg_loss_net = np.mean(profit_ratio[losses]) if losses.any() else 0
+
+    total_return = (final_capital - initial_capital) / initial_capital * 100
+    returns = period_returns(equity)
+    return {
+        'total_return': total_return,
+        'sharpe_ratio': sharpe_ratio(returns),
+        'sortino_ratio': sortino_ratio(returns),
+        'calmar_ratio': calmar_ratio(equity),
+        'max_drawdown': max_drawdown(equity) * 100,
+        'max_drawdown_duration': max_drawdown_duration(equity),
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': win_rate * 100,
+        'average_win': avg_win,
+        'average_loss': avg_loss,
+        'avg_win_net': avg_win_net,
+        'avg_loss_net': avg_loss_net,
+        'final_capital': final_capital,
+        'total_fee': total_fee
+    }
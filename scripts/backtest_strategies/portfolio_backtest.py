@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Portfolio Backtest - chạy một strategy trên nhiều symbol cùng lúc.
+Các symbol được căn chỉnh trên chung một timestamp index thành các frame
+bars × symbols, signal được tính vector hóa trên toàn bộ các cột, sau đó một
+vòng lặp duy nhất qua các bar áp dụng maxPositions và phân bổ vốn.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import argparse
+from typing import Dict, Any, List, Callable, Optional
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from base_strategy import BaseStrategy, PANEL_FIELDS
+from strategy_registry import get_strategy_class
+from serialization import dumps
+
+def align_panel(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Align per-symbol OHLCV frames on the union of their timestamps.
+    Trả về dict field -> frame bars × symbols (float64); bar mà một symbol không
+    có dữ liệu là NaN và symbol đó không giao dịch ở bar đó.
+    """
+    if not frames:
+        raise ValueError("At least one symbol is required")
+    return {
+        field: pd.DataFrame({symbol: frame[field] for symbol, frame in frames.items()}).astype(np.float64)
+        for field in PANEL_FIELDS
+        if all(field in frame.columns for frame in frames.values())
+    }
+
+def load_portfolio_data(symbols: List[str], timeframe: str, start_date: str, end_date: str,
+                        loader: Optional[Callable] = None) -> Dict[str, pd.DataFrame]:
+    """Load OHLCV của từng symbol (mặc định dùng backtest_runner.load_data)"""
+    if loader is None:
+        from backtest_runner import load_data as loader
+    return {symbol: loader(symbol, timeframe, start_date, end_date) for symbol in symbols}
+
+def simulate_portfolio(strategy: BaseStrategy, close: pd.DataFrame, signals: pd.DataFrame) -> tuple:
+    """
+    Single pass over the aligned bars with one position slot per symbol.
+    Cùng luật vào/ra lệnh và phí với BaseStrategy._simulate_arrays; mỗi lệnh mới
+    nhận (vốn chưa dùng * positionSize / số slot còn trống), tối đa maxPositions
+    lệnh mở cùng lúc, khi thiếu slot thì ưu tiên theo thứ tự cột symbol.
+    Returns (trades, equity, final_capital, total_fee).
+    """
+    symbols = list(close.columns)
+    index = close.index
+    n, m = close.shape
+    prices = close.to_numpy(dtype=np.float64)
+    signal_values = signals.reindex(index=index, columns=symbols).fillna(0).to_numpy()
+    has_buy = (signal_values == 1).any(axis=1)
+
+    check_stoploss = strategy.prioritize_stoploss
+    check_take_profit = strategy.prioritize_stoploss and strategy.use_take_profit
+    max_positions = max(1, strategy.max_positions)
+
+    trades = []
+    equity = np.empty(max(n, 1), dtype=np.float64)
+    equity[0] = strategy.initial_capital
+    current_capital = strategy.initial_capital
+    total_fee = 0
+
+    # Trạng thái từng symbol; stop/take profit là ±inf khi không có position
+    # để phép so sánh vector không bao giờ kích hoạt
+    in_position = np.zeros(m, dtype=bool)
+    entry_price = np.zeros(m)
+    position_size = np.zeros(m)
+    entry_fee = np.zeros(m)
+    entry_index = np.zeros(m, dtype=np.int64)
+    stoploss_price = np.full(m, -np.inf)
+    take_profit_price = np.full(m, np.inf)
+    open_count = 0
+    committed = 0.0
+
+    def close_position(j, i, price, exit_reason):
+        nonlocal current_capital, total_fee, open_count, committed
+        price_in, size = float(entry_price[j]), float(position_size[j])
+        pnl = (price - price_in) * size
+        pnl_pct = (price - price_in) / price_in
+        exit_fee = price * size * strategy.maker_fee
+        trade = {'symbol': symbols[j]}
+        trade.update(strategy._make_trade_record(
+            index[entry_index[j]], index[i], price_in, price, size,
+            pnl, pnl_pct, exit_reason, float(entry_fee[j]), exit_fee, {}, {}
+        ))
+        trades.append(trade)
+        current_capital += pnl - exit_fee
+        total_fee += exit_fee
+        in_position[j] = False
+        stoploss_price[j] = -np.inf
+        take_profit_price[j] = np.inf
+        open_count -= 1
+        # Reset về 0 khi không còn lệnh mở để không tích lũy sai số làm tròn
+        committed = committed - price_in * size if open_count else 0.0
+
+    for i in range(1, n):
+        row_prices = prices[i]
+        row_signals = signal_values[i]
+        exited = None
+
+        if open_count:
+            # Thứ tự ưu tiên: stoploss -> sell signal -> take profit (NaN price không kích hoạt)
+            stop_hit = (row_prices <= stoploss_price) if check_stoploss else np.zeros(m, dtype=bool)
+            signal_hit = in_position & (row_signals == -1)
+            take_profit_hit = (row_prices >= take_profit_price) if check_take_profit else np.zeros(m, dtype=bool)
+            exited = stop_hit | signal_hit | take_profit_hit
+            if exited.any():
+                for j in np.flatnonzero(exited):
+                    if stop_hit[j]:
+                        exit_reason = 'stoploss'
+                    elif signal_hit[j]:
+                        exit_reason = 'signal'
+                    else:
+                        exit_reason = 'take_profit'
+                    close_position(j, i, float(row_prices[j]), exit_reason)
+
+        if has_buy[i] and open_count < max_positions:
+            # Symbol vừa thoát lệnh ở bar này không vào lại ngay (giống engine một symbol)
+            candidates = (row_signals == 1) & ~in_position & ~np.isnan(row_prices)
+            if exited is not None:
+                candidates &= ~exited
+            for j in np.flatnonzero(candidates):
+                if open_count >= max_positions:
+                    break
+                price = float(row_prices[j])
+                allocation = (current_capital - committed) * strategy.position_size / (max_positions - open_count)
+                size = allocation / price
+                fee = price * size * strategy.taker_fee
+                current_capital -= fee
+                total_fee += fee
+                committed += price * size
+                in_position[j] = True
+                entry_price[j] = price
+                position_size[j] = size
+                entry_fee[j] = fee
+                entry_index[j] = i
+                stoploss_price[j] = price * (1 - strategy.stop_loss)
+                if check_take_profit:
+                    take_profit_price[j] = price * (1 + strategy.take_profit)
+                open_count += 1
+
+        equity[i] = current_capital
+
+    # Close any remaining position at the end (giá hợp lệ gần nhất của từng symbol)
+    if open_count:
+        last_prices = close.ffill().to_numpy(dtype=np.float64)[-1]
+        for j in np.flatnonzero(in_position):
+            close_position(j, n - 1, float(last_prices[j]), 'end_of_backtest')
+
+    return trades, equity, current_capital, total_fee
+
+def run_portfolio_backtest(strategy: BaseStrategy, frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Run one strategy over several symbols sharing the same capital.
+    Kết quả có cùng layout với BaseStrategy.run_backtest, thêm 'symbol' trong mỗi
+    trade và 'symbols' (thống kê theo từng symbol) trong performance.
+    """
+    panel = align_panel(frames)
+    signals = strategy.signal_matrix(panel)
+    trades, equity, current_capital, total_fee = simulate_portfolio(strategy, panel['close'], signals)
+    results = strategy._build_results(trades, equity, current_capital, total_fee)
+
+    per_symbol = {}
+    for symbol in panel['close'].columns:
+        symbol_trades = [t for t in trades if t['symbol'] == symbol]
+        per_symbol[symbol] = {
+            'total_trades': len(symbol_trades),
+            'winning_trades': len([t for t in symbol_trades if t['pnl'] > 0]),
+            'total_pnl': float(sum(t['pnl'] for t in symbol_trades))
+        }
+    results['performance']['symbols'] = per_symbol
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Portfolio Backtest Runner')
+    parser.add_argument('--config', required=True,
+                        help='Backtest configuration in JSON format, trading.symbols là danh sách symbol')
+    args = parser.parse_args()
+
+    try:
+        config = json.loads(args.config)
+        trading = config['trading']
+        symbols = trading.get('symbols') or [trading['symbol']]
+        frames = load_portfolio_data(
+            symbols,
+            trading['timeframe'],
+            trading.get('startDate', '2023-01-01'),
+            trading.get('endDate', '2023-12-31')
+        )
+
+        strategy = get_strategy_class(config['strategy']['type'])(config)
+        results = run_portfolio_backtest(strategy, frames)
+
+        print(dumps({"trades": results["trades"]}))
+        print(dumps(results["performance"]))
+    except Exception as e:
+        print(json.dumps({'error': f'Error running portfolio backtest: {str(e)}'}))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Resample pyramid cho OHLCV: các timeframe lớn được gộp từ level nhỏ hơn đã có
+(5m -> 15m -> 1h -> 4h -> 1d) thay vì resample lại toàn bộ dữ liệu 1m cho mỗi
+timeframe.
+
+open/high/low/close/volume gộp được theo tầng (first của các first, max của các
+max, ...), nên bucket 1h chính là gộp của bốn bucket 15m. Level trung gian giữ
+cả bucket có giá trị NaN (như kết quả resample trước dropna) nên kết quả cuối
+giống resample trực tiếp; volume chỉ có thể khác ở sai số làm tròn của phép cộng.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data import TIMEFRAME_MAP, OHLCV_AGGREGATION
+
+# Các level được lưu sẵn trong OHLCVCache, mỗi level gộp từ level trước (level đầu từ 1m)
+PYRAMID_LEVELS = ['5m', '15m', '1h', '4h', '1d']
+
+DAY = pd.Timedelta(days=1).value
+UNIT_NANOS = {'m': pd.Timedelta(minutes=1).value, 'h': pd.Timedelta(hours=1).value, 'd': DAY}
+
+def timeframe_nanos(timeframe: str) -> Optional[int]:
+    """Độ dài cố định của một bucket (ns); None cho timeframe theo lịch như '1w', '1M'"""
+    if timeframe not in TIMEFRAME_MAP:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    unit = UNIT_NANOS.get(timeframe[-1])
+    return int(timeframe[:-1]) * unit if unit is not None else None
+
+def nests(source: str, target: str) -> bool:
+    """True if every target bucket is a union of whole source buckets"""
+    source_nanos = timeframe_nanos(source)
+    if source_nanos is None or DAY % source_nanos != 0:
+        return False
+    target_nanos = timeframe_nanos(target)
+    if target_nanos is None:
+        # 'W'/'M' đóng bên phải: bar 00:00 của ngày cuối thuộc bucket khác phần còn lại
+        # của ngày đó, nên không ghép được từ bar ngày
+        return False
+    return target_nanos % source_nanos == 0 and (DAY % target_nanos == 0 or target_nanos % DAY == 0)
+
+def resample_levels(data: pd.DataFrame, timeframes: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Resample data to every timeframe; mỗi timeframe được gộp từ level lớn nhất đã
+    tính mà nó chứa trọn, chỉ level đầu tiên phải resample toàn bộ data.
+    Kết quả giống data.resample(rule).agg(OHLCV_AGGREGATION).dropna().
+    """
+    ordered = sorted(set(timeframes), key=lambda tf: (timeframe_nanos(tf) or np.inf, tf))
+    levels = {}
+    for timeframe in ordered:
+        sources = [tf for tf in levels if nests(tf, timeframe)]
+        source = levels[max(sources, key=timeframe_nanos)] if sources else data
+        levels[timeframe] = source.resample(TIMEFRAME_MAP[timeframe]).agg(OHLCV_AGGREGATION)
+    return {timeframe: levels[timeframe].dropna() for timeframe in timeframes}
+
+def aggregate_arrays(times: np.ndarray, columns: Dict[str, np.ndarray],
+                     bucket_nanos: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Gộp các bar (open_time int64 ns, đã sắp xếp) thành bucket cố định bucket_nanos.
+    Chỉ trả về bucket có ít nhất một bar; NaN được bỏ qua như resample của pandas.
+    """
+    n = len(times)
+    if n == 0:
+        return times[:0].copy(), {column: np.empty(0) for column in OHLCV_AGGREGATION}
+    buckets = times - times % bucket_nanos
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], n]
+    positions = np.arange(n)
+
+    result = {}
+    for column, how in OHLCV_AGGREGATION.items():
+        values = np.asarray(columns[column], dtype=np.float64)
+        valid = ~np.isnan(values)
+        if how == 'first':
+            position = np.minimum.reduceat(np.where(valid, positions, n), starts)
+            result[column] = np.where(position < ends, values[np.minimum(position, n - 1)], np.nan)
+        elif how == 'last':
+            position = np.maximum.reduceat(np.where(valid, positions, -1), starts)
+            result[column] = np.where(position >= starts, values[position], np.nan)
+        elif how == 'max':
+            result[column] = np.fmax.reduceat(values, starts)
+        elif how == 'min':
+            result[column] = np.fmin.reduceat(values, starts)
+        else:
+            result[column] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    return buckets[starts], result
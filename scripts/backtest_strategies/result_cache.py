@@ -0,0 +1,164 @@
+"""
+Local result cache cho backtest_runner.
+Key là SHA-256 của phần config ảnh hưởng tới kết quả (symbol, timeframe, khoảng
+dữ liệu, strategy và tham số, phí, risk settings). Mỗi kết quả được lưu thành
+một file pickle nén zlib; tổng dung lượng bị giới hạn và file ít dùng nhất
+(theo mtime) bị xóa trước.
+"""
+
+import os
+import json
+import zlib
+import pickle
+import hashlib
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import pandas as pd
+
+# Tăng khi format kết quả/engine thay đổi để bỏ qua các entry cũ
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.path.join('results', 'cache', 'backtests')
+DEFAULT_MAX_MB = 512
+
+ENTRY_SUFFIX = '.bin'
+STATS_FILE = 'stats.json'
+
+def cache_key(config: Dict[str, Any]) -> str:
+    """Hash of the config sections that determine a backtest result"""
+    relevant = {
+        'version': CACHE_VERSION,
+        'trading': config.get('trading', {}),
+        'riskManagement': config.get('riskManagement', {}),
+        'strategy': config.get('strategy', {})
+    }
+    canonical = json.dumps(relevant, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def is_cacheable(config: Dict[str, Any]) -> bool:
+    """Chỉ cache khi khoảng dữ liệu đã kết thúc (nến mới có thể được thêm vào sau)"""
+    end_date = config.get('trading', {}).get('endDate', '2023-12-31')
+    try:
+        end = pd.Timestamp(end_date)
+    except (ValueError, TypeError):
+        return False
+    end = end.tz_localize('UTC') if end.tz is None else end.tz_convert('UTC')
+    return end < pd.Timestamp(datetime.now(timezone.utc))
+
+class ResultCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        """BACKTEST_CACHE_DIR / BACKTEST_CACHE_MAX_MB override the defaults"""
+        cache_dir = os.getenv('BACKTEST_CACHE_DIR', DEFAULT_CACHE_DIR)
+        max_mb = float(os.getenv('BACKTEST_CACHE_MAX_MB', DEFAULT_MAX_MB))
+        return cls(cache_dir, int(max_mb * 1024 * 1024))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result or None; đánh dấu entry là vừa dùng"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except Exception:
+            # Entry hỏng (ghi dở, khác version pickle, ...) -> xóa và coi như miss
+            self._remove(path)
+            self._record(hit=False)
+            return None
+        os.utime(path)
+        self._record(hit=True)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result, then evict least recently used entries over max_bytes"""
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        self._write_atomic(self._path(key), payload)
+        self.evict()
+
+    def _write_atomic(self, path: str, payload: bytes):
+        """Ghi vào file tạm rồi os.replace: reader đồng thời chỉ thấy file cũ hoặc file mới đầy đủ"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def get_or_compute(self, config: Dict[str, Any], compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Return (result, hit). Kết quả chỉ được lưu khi config cacheable"""
+        if not is_cacheable(config):
+            return compute(), False
+        key = cache_key(config)
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+        result = compute()
+        self.put(key, result)
+        return result, False
+
+    def _entries(self) -> list:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self):
+        """Xóa các entry cũ nhất cho tới khi tổng dung lượng <= max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _stats_path(self) -> str:
+        return os.path.join(self.cache_dir, STATS_FILE)
+
+    def _read_counts(self) -> Dict[str, int]:
+        try:
+            with open(self._stats_path()) as f:
+                counts = json.load(f)
+            return {'hits': int(counts.get('hits', 0)), 'misses': int(counts.get('misses', 0))}
+        except (FileNotFoundError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def _record(self, hit: bool):
+        """
+        Cộng dồn số hit/miss qua các lần chạy (mỗi lần chạy CLI là một process mới).
+        File được thay atomic nên không bao giờ bị đọc dở; khi nhiều worker ghi cùng
+        lúc, một vài lần cộng có thể bị mất (bộ đếm chỉ mang tính thống kê).
+        """
+        counts = self._read_counts()
+        counts['hits' if hit else 'misses'] += 1
+        self._write_atomic(self._stats_path(), json.dumps(counts).encode('utf-8'))
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {**self._read_counts(), 'entries': len(entries), 'bytes': sum(size for _, size, _ in entries)}
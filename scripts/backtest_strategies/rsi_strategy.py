@@ -1,34 +1,101 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from batch_indicators import rsi_batch
+from signal_grid import level_signal_grid
+from signal_kernels import signal_column, crosses_above, crosses_below
+from streaming_indicators import NaN, RollingMean, divide
 
 class RSIStrategy(BaseStrategy):
+    indicator_columns = ['rsi']
+    
     def __init__(self, config):
         super().__init__(config)
         self.period = self.strategy_config['parameters'].get('period', 14)
         self.overbought = self.strategy_config['parameters'].get('overbought', 70)
         self.oversold = self.strategy_config['parameters'].get('oversold', 30)
     
-    def calculate_rsi(self, data: pd.Series) -> pd.Series:
-        delta = data.diff()
+    @property
+    def warmup_bars(self) -> int:
+        # delta (1 bar) + rolling mean period, so sánh với rsi.shift(1)
+        return self.period + 1
+
+    def calculate_rsi(self, data: pd.DataFrame) -> pd.Series:
+        delta = self.indicators(data).diff('close')
         gain = (delta.where(delta > 0, 0)).rolling(window=self.period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
         rs = gain / loss
         return 100 - (100 / (1 + rs))
     
+    @classmethod
+    def prefill_indicators(cls, store, strategies):
+        """RSI của mọi period trong sweep được tính cùng lúc (gain/loss và cumsum dùng chung)"""
+        periods = sorted({s.period for s in strategies
+                          if isinstance(s.period, (int, np.integer)) and s.period > 0 and ('rsi', s.period) not in store})
+        if len(periods) < 2:
+            return
+        close = store.column('close')
+        values = rsi_batch(close.to_numpy(), periods)
+        for j, period in enumerate(periods):
+            store.memo(('rsi', period), lambda j=j: pd.Series(values[:, j], index=close.index))
+    
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         df = data.copy()
         
         # Calculate RSI
-        df['rsi'] = self.calculate_rsi(df['close'])
+        df['rsi'] = self.rsi(data)
         
         # Generate signals - chỉ tạo signal khi có sự thay đổi trạng thái
-        df['signal'] = 0
+        df['signal'] = signal_column(*self.signal_rules(df['rsi']))
         
+        return df
+    
+    def rsi(self, data: pd.DataFrame) -> pd.Series:
+        return self.cached_indicator(data, ('rsi', self.period), lambda: self.calculate_rsi(data))
+    
+    def signal_array(self, data):
+        return signal_column(*self.signal_rules(self.rsi(data)))
+    
+    @classmethod
+    def signal_grid(cls, store, strategies):
+        """Một cột RSI cho mỗi period; mọi cặp ngưỡng của period đó được so sánh cùng lúc"""
+        cls.prefill_indicators(store, strategies)
+        for strategy in strategies:
+            strategy.indicator_store = store
+        return level_signal_grid(len(store.data), strategies, lambda s: s.period, lambda s: s.rsi(store.data))
+    
+    def signal_rules(self, rsi):
+        """Buy/sell masks; rsi là Series/mảng hoặc frame bars × symbols"""
         # Buy signal khi RSI từ trên oversold xuống dưới oversold
-        df.loc[(df['rsi'] < self.oversold) & (df['rsi'].shift(1) >= self.oversold), 'signal'] = 1
+        buy = crosses_below(rsi, self.oversold)
         
         # Sell signal khi RSI từ dưới overbought lên trên overbought
-        df.loc[(df['rsi'] > self.overbought) & (df['rsi'].shift(1) <= self.overbought), 'signal'] = -1
+        sell = crosses_above(rsi, self.overbought)
+        return buy, sell
+    
+    def panel_signals(self, panel):
+        return self.combine_signals(panel['close'], *self.signal_rules(self.calculate_rsi(panel)))
+    
+    def _init_stream(self):
+        self._prev_close = None
+        self._gain = RollingMean(self.period)
+        self._loss = RollingMean(self.period)
+        self._prev_rsi = NaN
+    
+    def _on_bar(self, bar) -> int:
+        close = float(bar['close'])
+        delta = close - self._prev_close if self._prev_close is not None else NaN
+        self._prev_close = close
+        
+        # Giống delta.where(...): bar không tăng/giảm đóng góp 0 (loss là -0.0)
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else -0.0)
+        rsi = 100 - divide(100, 1 + divide(gain, loss))
+        prev_rsi, self._prev_rsi = self._prev_rsi, rsi
         
-        return df 
\ No newline at end of file
+        signal = 0
+        if rsi < self.oversold and prev_rsi >= self.oversold:
+            signal = 1
+        if rsi > self.overbought and prev_rsi <= self.overbought:
+            signal = -1
+        return signal
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Serializer dùng chung cho output JSON của các runner.
+
+Mảng số (ndarray, Series, list số) được chuyển cả mảng một lần: tolist() rồi chỉ
+gán None tại các vị trí NaN/inf tìm bằng mask NumPy, thay vì kiểm tra pd.isna/
+np.isnan cho từng phần tử. Timestamp của chart được đổi sang epoch milliseconds
+theo cả index. Chart payload có thể xuất dạng nhị phân: mỗi series là buffer
+float32 (timestamps float64, vẫn chính xác tới ms) little-endian mã hóa base64,
+NaN giữ nguyên để phía JS đọc bằng Float32Array/Float64Array.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+# Định dạng chart payload: 'json' (list số, NaN -> null) hoặc buffer nhị phân base64
+CHART_FORMATS = ['json', 'float32']
+
+def json_scalar(value: Any) -> Any:
+    """A single value as a JSON-native Python object (NaN/inf -> None, Timestamp -> ISO string)"""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return None if value is pd.NaT else value.isoformat()
+    if isinstance(value, np.datetime64):
+        return json_scalar(pd.Timestamp(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def json_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flat record (ví dụ một trade) với mọi giá trị đã chuyển bằng json_scalar"""
+    return {key: json_scalar(value) for key, value in record.items()}
+
+def json_values(values) -> list:
+    """
+    Array of numbers as a list; NaN/inf được đổi thành None bằng mask trên cả mảng
+    (chỉ các vị trí không hữu hạn được gán lại trong Python).
+    """
+    array = np.asarray(values)
+    if array.ndim == 1 and array.dtype.kind == 'f':
+        items = array.tolist()
+        for i in np.flatnonzero(~np.isfinite(array)).tolist():
+            items[i] = None
+        return items
+    if array.ndim == 1 and array.dtype.kind in 'iub':
+        return array.tolist()
+    if array.ndim == 1 and array.dtype.kind == 'M':
+        return [json_scalar(value) for value in pd.DatetimeIndex(array)]
+    return [to_json_safe(value) for value in (values if isinstance(values, list) else array.tolist())]
+
+def epoch_millis(values) -> np.ndarray:
+    """Datetime index/array/Series as int64 epoch milliseconds (UTC), chuyển cả mảng một lần"""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+def _is_number_list(values: list) -> bool:
+    first = values[0]
+    return isinstance(first, (int, float, np.number)) and not isinstance(first, (bool, np.bool_))
+
+def to_json_safe(obj: Any) -> Any:
+    """
+    Recursively convert obj into JSON-native objects (dict/list/str/số/None).
+    Mảng và list số được chuyển theo cả mảng bằng json_values.
+    """
+    if isinstance(obj, dict):
+        return {key: to_json_safe(value) for key, value in obj.items()}
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        return json_values(obj)
+    if isinstance(obj, (list, tuple)):
+        if obj and _is_number_list(obj):
+            array = np.asarray(obj)
+            if array.ndim == 1 and array.dtype.kind in 'fiu':
+                return json_values(array)
+        return [to_json_safe(value) for value in obj]
+    return json_scalar(obj)
+
+def json_default(obj: Any) -> Any:
+    """default= cho json.dumps: kiểu chưa biết được chuyển bằng to_json_safe, còn lại thành string"""
+    converted = to_json_safe(obj)
+    return str(converted) if converted is obj else converted
+
+def dumps(obj: Any) -> str:
+    """JSON text of obj with NaN/inf as null (luôn là JSON hợp lệ cho JSON.parse)"""
+    return json.dumps(to_json_safe(obj), allow_nan=False, default=json_default)
+
+def pack_values(values, dtype: str = 'float32') -> Dict[str, Any]:
+    """Numeric array as a little-endian buffer mã hóa base64 (NaN giữ nguyên)"""
+    array = np.ascontiguousarray(np.asarray(values, dtype=np.float64).astype(np.dtype(dtype).newbyteorder('<')))
+    return {'dtype': dtype, 'length': len(array), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def unpack_values(packed: Dict[str, Any]) -> np.ndarray:
+    """Inverse of pack_values"""
+    dtype = np.dtype(packed['dtype']).newbyteorder('<')
+    return np.frombuffer(base64.b64decode(packed['data']), dtype=dtype, count=packed['length'])
+
+def chart_payload(indicators: Dict[str, Any], chart_format: str = 'json') -> Dict[str, Any]:
+    """
+    Indicator data (timestamps, close_prices, indicators: {name: values}) theo chart_format.
+    'float32': timestamps là buffer float64, close_prices và indicator là buffer float32.
+    """
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart format '{chart_format}'")
+    if chart_format == 'json':
+        return to_json_safe(indicators)
+    payload = {
+        'format': chart_format,
+        'timestamps': pack_values(indicators.get('timestamps', []), 'float64'),
+        'close_prices': pack_values(indicators.get('close_prices', []), chart_format),
+        'indicators': {name: pack_values(values, chart_format)
+                       for name, values in indicators.get('indicators', {}).items()}
+    }
+    return payload
@@ -0,0 +1,59 @@
+"""
+Kernel dùng chung để tạo signal trên mảng NumPy.
+
+Điều kiện buy/sell của các strategy được tính trên mảng float (1 chiều theo bar hoặc
+2 chiều bars × symbols) thay vì chuỗi phép so sánh Series với .shift(1), nên không
+có bước căn index của pandas và không tạo Series trung gian. Signal cuối cùng là
+mảng int8 (1 buy, -1 sell, 0 none): 1 byte mỗi bar thay vì 8 byte của cột int64.
+
+Ngữ nghĩa giống hệt phép tính pandas cũ: bar đầu không có giá trị trước (như
+shift(1) cho NaN) và mọi phép so sánh với NaN là False.
+"""
+
+import numpy as np
+
+def as_array(values) -> np.ndarray:
+    """Series/frame/mảng -> mảng float64 (không copy khi đã là float64)"""
+    return np.asarray(values, dtype=np.float64)
+
+def shift(values, periods: int = 1) -> np.ndarray:
+    """Như Series.shift(periods) với periods >= 0 theo trục bar: periods bar đầu là NaN"""
+    values = as_array(values)
+    shifted = np.full(values.shape, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+def _current_previous(level, ndim: int) -> tuple:
+    """(giá trị tại bar i, giá trị tại bar i-1) của level cho bar 1..n-1; ngưỡng cố định dùng chung"""
+    level = as_array(level)
+    if level.ndim < ndim or level.shape[0] == 1:
+        return level, level
+    return level[1:], level[:-1]
+
+def _first_bar_false(crossed: np.ndarray, n_bars: int) -> np.ndarray:
+    """Mask của bar 1..n-1 -> mask n bar (bar đầu False); shape theo broadcast values/level"""
+    result = np.zeros((n_bars,) + crossed.shape[1:], dtype=bool)
+    result[1:] = crossed
+    return result
+
+def crosses_above(values, level) -> np.ndarray:
+    """
+    Mask bool: values > level tại bar i và values <= level tại bar i-1.
+    level là ngưỡng (scalar, mảng theo cột) hoặc mảng cùng shape với values.
+    """
+    values = as_array(values)
+    current, previous = _current_previous(level, values.ndim)
+    return _first_bar_false((values[1:] > current) & (values[:-1] <= previous), len(values))
+
+def crosses_below(values, level) -> np.ndarray:
+    """Mask bool: values < level tại bar i và values >= level tại bar i-1"""
+    values = as_array(values)
+    current, previous = _current_previous(level, values.ndim)
+    return _first_bar_false((values[1:] < current) & (values[:-1] >= previous), len(values))
+
+def signal_column(buy, sell) -> np.ndarray:
+    """int8 signal từ điều kiện buy/sell (Series hoặc mảng bool); sell ghi đè buy như generate_signals"""
+    signal = np.array(buy, dtype=np.int8)
+    signal[np.asarray(sell, dtype=bool)] = -1
+    return signal
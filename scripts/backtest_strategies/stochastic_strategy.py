@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import NaN, RollingMax, RollingMean, RollingMin, divide
+from signal_kernels import signal_column, as_array, crosses_above, crosses_below
 
 class StochasticStrategy(BaseStrategy):
+    indicator_columns = ['stoch_k', 'stoch_d']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -14,10 +18,16 @@ class StochasticStrategy(BaseStrategy):
         self.smooth_k = int(self.strategy_config.get('smooth_k', 3))
         self.smooth_d = int(self.strategy_config.get('smooth_d', 3))
     
+    @property
+    def warmup_bars(self) -> int:
+        # Rolling min/max k_period, làm mượt smooth_k, %D d_period, cộng shift(1)
+        return self.k_period + self.smooth_k + self.d_period - 2
+
     def calculate_stochastic(self, data):
         """Calculate Stochastic Oscillator"""
-        low_min = data['low'].rolling(window=self.k_period).min()
-        high_max = data['high'].rolling(window=self.k_period).max()
+        store = self.indicators(data)
+        low_min = store.rolling_min('low', self.k_period)
+        high_max = store.rolling_max('high', self.k_period)
         
         # %K line
         k_line = 100 * ((data['close'] - low_min) / (high_max - low_min))
@@ -28,34 +38,75 @@ class StochasticStrategy(BaseStrategy):
         
         return k_line, d_line
     
+    @classmethod
+    def prefill_indicators(cls, store, strategies):
+        """Rolling min của low / max của high cho mọi k_period trong sweep (sparse table)"""
+        periods = [s.k_period for s in strategies]
+        store.prefill('rolling_min', 'low', periods)
+        store.prefill('rolling_max', 'high', periods)
+    
     def generate_signals(self, data):
         """Generate trading signals based on Stochastic Oscillator"""
         signals = data.copy()
         
         # Calculate Stochastic
-        k_line, d_line = self.calculate_stochastic(data)
+        k_line, d_line = self.cached_indicator(
+            data, ('stochastic', self.k_period, self.smooth_k, self.d_period),
+            lambda: self.calculate_stochastic(data)
+        )
         signals['stoch_k'] = k_line
         signals['stoch_d'] = d_line
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(k_line, d_line))
         
+        return signals
+    
+    def signal_array(self, data):
+        k_line, d_line = self.cached_indicator(
+            data, ('stochastic', self.k_period, self.smooth_k, self.d_period),
+            lambda: self.calculate_stochastic(data)
+        )
+        return signal_column(*self.signal_rules(k_line, d_line))
+    
+    def signal_rules(self, k_line, d_line):
+        """Buy/sell masks; inputs là Series/mảng hoặc frame bars × symbols"""
+        k_line, d_line = as_array(k_line), as_array(d_line)
         # Generate buy signals
         # Buy when %K crosses above %D from oversold territory
-        buy_condition = (
-            (k_line < self.oversold) & 
-            (k_line > d_line) & 
-            (k_line.shift(1) <= d_line.shift(1))
-        )
-        signals.loc[buy_condition, 'signal'] = 1
+        buy_condition = (k_line < self.oversold) & crosses_above(k_line, d_line)
         
         # Generate sell signals
         # Sell when %K crosses below %D from overbought territory
-        sell_condition = (
-            (k_line > self.overbought) & 
-            (k_line < d_line) & 
-            (k_line.shift(1) >= d_line.shift(1))
-        )
-        signals.loc[sell_condition, 'signal'] = -1
+        sell_condition = (k_line > self.overbought) & crosses_below(k_line, d_line)
+        return buy_condition, sell_condition
+    
+    def panel_signals(self, panel):
+        """Vectorized Stochastic signals for a bars × symbols panel"""
+        return self.combine_signals(panel['close'], *self.signal_rules(*self.calculate_stochastic(panel)))
+    
+    def _init_stream(self):
+        self._low_min = RollingMin(self.k_period)
+        self._high_max = RollingMax(self.k_period)
+        self._k_line = RollingMean(self.smooth_k)
+        self._d_line = RollingMean(self.d_period)
+        self._prev_k = NaN
+        self._prev_d = NaN
+    
+    def _on_bar(self, bar):
+        """Incremental Stochastic signal for one bar"""
+        close = float(bar['close'])
+        low_min = self._low_min.update(bar['low'])
+        high_max = self._high_max.update(bar['high'])
         
-        return signals
+        k_line = self._k_line.update(100 * divide(close - low_min, high_max - low_min))
+        d_line = self._d_line.update(k_line)
+        prev_k, prev_d = self._prev_k, self._prev_d
+        self._prev_k, self._prev_d = k_line, d_line
+        
+        signal = 0
+        if k_line < self.oversold and k_line > d_line and prev_k <= prev_d:
+            signal = 1
+        if k_line > self.overbought and k_line < d_line and prev_k >= prev_d:
+            signal = -1
+        return signal
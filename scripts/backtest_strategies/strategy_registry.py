@@ -0,0 +1,56 @@
+"""
+Strategy registry dùng chung cho các runner (sweep, walk-forward, ...)
+"""
+
+from typing import Dict, Any
+
+from ma_crossover_strategy import MACrossoverStrategy
+from rsi_strategy import RSIStrategy
+from macd_strategy import MACDStrategy
+from bollinger_bands_strategy import BollingerBandsStrategy
+from breakout_strategy import BreakoutStrategy
+from stochastic_strategy import StochasticStrategy
+from williams_r_strategy import WilliamsRStrategy
+from adx_strategy import ADXStrategy
+from ichimoku_strategy import IchimokuStrategy
+from parabolic_sar_strategy import ParabolicSARStrategy
+from keltner_channel_strategy import KeltnerChannelStrategy
+from vwap_strategy import VWAPStrategy
+from ensemble_strategy import EnsembleStrategy
+
+# Strategy mapping
+STRATEGY_MAP = {
+    'ma_crossover': MACrossoverStrategy,
+    'rsi': RSIStrategy,
+    'macd': MACDStrategy,
+    'bollinger_bands': BollingerBandsStrategy,
+    'breakout': BreakoutStrategy,
+    'stochastic': StochasticStrategy,
+    'williams_r': WilliamsRStrategy,
+    'adx': ADXStrategy,
+    'ichimoku': IchimokuStrategy,
+    'parabolic_sar': ParabolicSARStrategy,
+    'keltner_channel': KeltnerChannelStrategy,
+    'vwap': VWAPStrategy,
+    'ensemble': EnsembleStrategy
+}
+
+def get_strategy_class(strategy_type: str):
+    """Get strategy class by type"""
+    if strategy_type not in STRATEGY_MAP:
+        raise ValueError(f"Strategy type '{strategy_type}' not supported")
+    return STRATEGY_MAP[strategy_type]
+
+def build_strategy_config(base_config: Dict[str, Any], strategy_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge một bộ tham số vào config dạng backtest_runner.
+    Tham số được ghi vào cả strategy['parameters'] lẫn strategy vì một số strategy
+    (RSI, MACD, ...) đọc từ 'parameters', số khác (Stochastic, ADX, ...) đọc trực tiếp.
+    """
+    config = dict(base_config)
+    strategy = dict(config.get('strategy', {}))
+    strategy['type'] = strategy_type
+    strategy['parameters'] = {**strategy.get('parameters', {}), **params}
+    strategy.update(params)
+    config['strategy'] = strategy
+    return config
@@ -0,0 +1,356 @@
+"""
+Incremental (streaming) indicator primitives với trạng thái O(1) cho mỗi bar.
+
+Các lớp rolling/EWM cập nhật theo đúng thứ tự phép tính của các kernel
+rolling/ewm trong pandas (Kahan summation, Welford variance, deque min/max),
+nên giá trị streaming khớp với kết quả batch của generate_signals.
+"""
+
+import math
+from collections import deque
+from typing import Tuple
+
+import numpy as np
+
+NaN = float('nan')
+MAX_FLOAT64 = np.finfo(np.float64).max
+
+def _clean(value: float) -> float:
+    """Pandas coi inf là NaN trong các phép rolling"""
+    value = float(value)
+    if math.isinf(value):
+        return NaN
+    return value
+
+def divide(a: float, b: float) -> float:
+    """Chia theo ngữ nghĩa NumPy/pandas (x/0 -> ±inf, 0/0 -> NaN) thay vì raise"""
+    if b == 0 or a != a or b != b:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(np.float64(a) / np.float64(b))
+    return a / b
+
+class RollingSum:
+    """Rolling sum over a fixed window (min_periods = window)"""
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self.values = deque()
+        self.value = NaN
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def _add(self, val: float):
+        if val == val:
+            self.nobs += 1
+            y = val - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if val == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = val
+
+    def _remove(self, val: float):
+        if val == val:
+            self.nobs -= 1
+            y = - val - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+
+    def _push(self, val: float):
+        # Window 1: pandas khởi tạo lại trạng thái ở mỗi bar
+        if self.window == 1:
+            self.values.clear()
+            self._reset()
+        if self.prev_value is None:
+            self.prev_value = val
+        self.values.append(val)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(val)
+
+    def _result(self) -> float:
+        if self.nobs >= self.window:
+            if self.num_consecutive_same_value >= self.nobs:
+                return self.prev_value * self.nobs
+            return self.sum_x
+        return NaN
+
+    def update(self, value: float) -> float:
+        self._push(_clean(value))
+        self.value = self._result()
+        return self.value
+
+class RollingMean(RollingSum):
+    """Rolling mean over a fixed window (min_periods = window)"""
+
+    def _reset(self):
+        super()._reset()
+        self.neg_ct = 0
+
+    def _add(self, val: float):
+        super()._add(val)
+        if val == val and math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+
+    def _remove(self, val: float):
+        super()._remove(val)
+        if val == val and math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def _result(self) -> float:
+        if self.nobs >= self.window and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.num_consecutive_same_value >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+            return result
+        return NaN
+
+class RollingStd:
+    """Rolling standard deviation (Welford, ddof=1 mặc định)"""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = int(window)
+        self.ddof = ddof
+        self.values = deque()
+        self.value = NaN
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def _add(self, val: float):
+        if val != val:
+            return
+        self.nobs += 1
+        if val == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = val
+
+        prev_mean = self.mean_x - self.compensation_add
+        y = val - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        if self.nobs:
+            self.mean_x = self.mean_x + t / self.nobs
+        else:
+            self.mean_x = 0.0
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+
+    def _remove(self, val: float):
+        if val == val:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = val - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+
+    def update(self, value: float) -> float:
+        val = _clean(value)
+        if self.window == 1:
+            self.values.clear()
+            self._reset()
+        if self.prev_value is None:
+            self.prev_value = val
+        self.values.append(val)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(val)
+
+        if self.nobs >= max(self.window, 1) and self.nobs > self.ddof:
+            if self.nobs == 1 or self.num_consecutive_same_value >= self.nobs:
+                variance = 0.0
+            else:
+                variance = self.ssqdm_x / (self.nobs - self.ddof)
+            self.value = math.sqrt(variance) if variance >= 0 else 0.0
+        else:
+            self.value = NaN
+        return self.value
+
+class RollingExtreme:
+    """Rolling max/min bằng monotonic deque (mỗi giá trị vào/ra deque đúng một lần)"""
+
+    def __init__(self, window: int, is_max: bool):
+        self.window = int(window)
+        self.is_max = is_max
+        self.queue = deque()    # (index, value), giá trị cực trị luôn ở đầu
+        self.values = deque()   # toàn bộ cửa sổ để đếm số quan sát hợp lệ
+        self.nobs = 0
+        self.count = 0
+        self.value = NaN
+
+    def update(self, value: float) -> float:
+        val = _clean(value)
+        k = self.count
+        self.count += 1
+
+        if val == val:
+            self.nobs += 1
+            ai = val
+        else:
+            ai = -MAX_FLOAT64 if self.is_max else MAX_FLOAT64
+
+        queue = self.queue
+        if self.is_max:
+            while queue and (ai >= queue[-1][1] or queue[-1][1] != queue[-1][1]):
+                queue.pop()
+        else:
+            while queue and (ai <= queue[-1][1] or queue[-1][1] != queue[-1][1]):
+                queue.pop()
+        queue.append((k, val))
+        self.values.append(val)
+
+        # Loại các phần tử nằm ngoài cửa sổ
+        oldest = k - self.window
+        while queue and queue[0][0] <= oldest:
+            queue.popleft()
+        if len(self.values) > self.window:
+            removed = self.values.popleft()
+            if removed == removed:
+                self.nobs -= 1
+
+        self.value = queue[0][1] if queue and self.nobs >= self.window else NaN
+        return self.value
+
+class RollingMax(RollingExtreme):
+    def __init__(self, window: int):
+        super().__init__(window, is_max=True)
+
+class RollingMin(RollingExtreme):
+    def __init__(self, window: int):
+        super().__init__(window, is_max=False)
+
+class EMA:
+    """Exponential moving average theo span, giống Series.ewm(span=..., adjust=...).mean()"""
+
+    def __init__(self, span: float, adjust: bool = True):
+        com = (span - 1) / 2.0
+        alpha = 1. / (1. + com)
+        self.old_wt_factor = 1. - alpha
+        self.new_wt = 1. if adjust else alpha
+        self.adjust = adjust
+        self.weighted = None
+        self.old_wt = 1.
+        self.value = NaN
+
+    def update(self, value: float) -> float:
+        cur = float(value)
+        if self.weighted is None:
+            self.weighted = cur
+        elif self.weighted == self.weighted:
+            if cur == cur:
+                self.old_wt *= self.old_wt_factor
+                # Tránh sai số trên chuỗi hằng (giống pandas)
+                if self.weighted != cur:
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * cur
+                    self.weighted /= (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.
+            else:
+                self.old_wt *= self.old_wt_factor
+        elif cur == cur:
+            self.weighted = cur
+        self.value = self.weighted
+        return self.value
+
+class WilderSmoothing:
+    """
+    Wilder smoothing (RMA): giá trị đầu là trung bình cộng của `period` quan sát
+    đầu tiên, sau đó value = value + (x - value) / period.
+    """
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.seed_sum = 0.0
+        self.seed_count = 0
+        self.value = NaN
+
+    def update(self, value: float) -> float:
+        x = float(value)
+        if x != x:
+            return self.value
+        if self.seed_count < self.period:
+            self.seed_sum += x
+            self.seed_count += 1
+            if self.seed_count == self.period:
+                self.value = self.seed_sum / self.period
+        else:
+            self.value = self.value + (x - self.value) / self.period
+        return self.value
+
+class ParabolicSAR:
+    """Parabolic SAR recursion, cùng logic với ParabolicSARStrategy.calculate_parabolic_sar"""
+
+    def __init__(self, acceleration: float, maximum: float):
+        self.acceleration = acceleration
+        self.maximum = maximum
+        self.sar = NaN
+        self.trend = 0.0
+        self.af = 0.0
+        self.ep = 0.0
+        self.started = False
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        if not self.started:
+            self.started = True
+            self.sar = low
+            self.trend = 1.0
+            self.af = self.acceleration
+            self.ep = high
+            return self.sar, self.trend
+
+        sar = self.sar + self.af * (self.ep - self.sar)
+        if self.trend == 1:
+            if sar > low:
+                sar = low
+            if close < sar:
+                self.trend = -1.0
+                sar = self.ep
+                self.af = self.acceleration
+                self.ep = low
+            elif high > self.ep:
+                self.ep = high
+                self.af = min(self.af + self.acceleration, self.maximum)
+        else:
+            if sar < high:
+                sar = high
+            if close > sar:
+                self.trend = 1.0
+                sar = self.ep
+                self.af = self.acceleration
+                self.ep = high
+            elif low < self.ep:
+                self.ep = low
+                self.af = min(self.af + self.acceleration, self.maximum)
+        self.sar = sar
+        return self.sar, self.trend
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script để so sánh engine 'array' với vòng lặp 'reference' của run_backtest
+"""
+
+import sys
+import os
+import time
+import functools
+import pandas as pd
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rsi_strategy import RSIStrategy
+from ma_crossover_strategy import MACrossoverStrategy
+from macd_strategy import MACDStrategy
+from bollinger_bands_strategy import BollingerBandsStrategy
+from breakout_strategy import BreakoutStrategy
+from stochastic_strategy import StochasticStrategy
+from williams_r_strategy import WilliamsRStrategy
+from adx_strategy import ADXStrategy
+from ichimoku_strategy import IchimokuStrategy
+from parabolic_sar_strategy import ParabolicSARStrategy
+from keltner_channel_strategy import KeltnerChannelStrategy
+from vwap_strategy import VWAPStrategy
+from base_strategy import BaseStrategy, IndicatorSnapshots
+
+ALL_STRATEGIES = [
+    MACrossoverStrategy, RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+    BreakoutStrategy, StochasticStrategy, WilliamsRStrategy, ADXStrategy,
+    IchimokuStrategy, ParabolicSARStrategy, KeltnerChannelStrategy, VWAPStrategy
+]
+
+RISK_VARIANTS = [
+    {'prioritizeStoploss': False, 'useTakeProfit': False},
+    {'prioritizeStoploss': True, 'useTakeProfit': False},
+    {'prioritizeStoploss': True, 'useTakeProfit': True, 'stopLoss': 1.0, 'takeProfit': 1.5},
+]
+
+# Test tốc độ (so sánh wall-clock) dễ fail trên CI đang tải nặng nên chỉ chạy khi
+# bật BACKTEST_BENCHMARKS=1; các test bit-identical luôn chạy
+RUN_BENCHMARKS = os.environ.get('BACKTEST_BENCHMARKS') == '1'
+
+def benchmark(test):
+    """Decorator cho test tốc độ: bỏ qua trừ khi BACKTEST_BENCHMARKS=1"""
+    @functools.wraps(test)
+    def wrapper(*args, **kwargs):
+        if not RUN_BENCHMARKS:
+            print(f"⏭️  {test.__name__} skipped (set BACKTEST_BENCHMARKS=1 to run)")
+            return
+        return test(*args, **kwargs)
+    return wrapper
+
+def generate_test_data(n_bars: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """Generate sample OHLCV data for testing"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start='2023-01-01', periods=n_bars, freq='1h')
+    returns = rng.normal(0.0001, 0.01, n_bars)
+    close = 30000 * np.cumprod(1 + returns)
+    open_price = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_price, close) * (1 + rng.uniform(0, 0.005, n_bars))
+    low = np.minimum(open_price, close) * (1 - rng.uniform(0, 0.005, n_bars))
+    volume = rng.uniform(100, 1000, n_bars)
+    return pd.DataFrame({
+        'open': open_price,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    }, index=pd.DatetimeIndex(dates, name='open_time'))
+
+def make_config(risk_overrides: dict) -> dict:
+    return {
+        'trading': {'symbol': 'BTCUSDT', 'timeframe': '1h', 'initialCapital': 10000, 'positionSize': 1.0},
+        'riskManagement': {'stopLoss': 2.0, 'takeProfit': 4.0, **risk_overrides},
+        'strategy': {'parameters': {}}
+    }
+
+def values_equal(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return a == b
+
+def assert_same_results(reference: dict, arrays: dict, label: str):
+    assert len(reference['trades']) == len(arrays['trades']), f"{label}: trade count differs"
+    for ref_trade, arr_trade in zip(reference['trades'], arrays['trades']):
+        assert list(ref_trade.keys()) == list(arr_trade.keys()), f"{label}: trade layout differs"
+        for key in ref_trade:
+            assert values_equal(ref_trade[key], arr_trade[key]), f"{label}: trade field '{key}' differs"
+    assert reference['equity_curve'] == arrays['equity_curve'], f"{label}: equity curve differs"
+    for key, value in reference['performance'].items():
+        assert values_equal(value, arrays['performance'][key]), f"{label}: performance '{key}' differs"
+
+def test_array_engine_matches_reference():
+    """Engine 'array' phải cho ra cùng trades, phí và equity curve với vòng lặp gốc"""
+    print("Testing array engine parity...")
+    data = generate_test_data()
+
+    for strategy_class in ALL_STRATEGIES:
+        for risk in RISK_VARIANTS:
+            strategy = strategy_class(make_config(risk))
+            reference = strategy.run_backtest(data, engine='reference')
+            arrays = strategy.run_backtest(data, engine='array')
+            label = f"{strategy_class.__name__} {risk}"
+            assert_same_results(reference, arrays, label)
+            print(f"  ✅ {label}: {len(arrays['trades'])} trades")
+
+@benchmark
+def test_array_engine_speed():
+    """Array engine phải nhanh hơn rõ rệt so với vòng lặp iloc"""
+    data = generate_test_data(5000)
+    strategy = RSIStrategy(make_config(RISK_VARIANTS[1]))
+
+    start = time.perf_counter()
+    strategy.run_backtest(data, engine='reference')
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    strategy.run_backtest(data, engine='array')
+    array_time = time.perf_counter() - start
+
+    print(f"Reference: {reference_time:.3f}s, array: {array_time:.3f}s")
+    assert array_time < reference_time
+
+class _EndInPositionStrategy(BaseStrategy):
+    """Mua ở bar đầu, indicator có NaN/0 ở cuối để kiểm tra snapshot end_of_backtest"""
+    def generate_signals(self, data):
+        df = data.copy()
+        df['signal'] = 0
+        df.iloc[1, df.columns.get_loc('signal')] = 1
+        df['ind_a'] = np.arange(len(df), dtype=float)
+        df.iloc[-3:, df.columns.get_loc('ind_a')] = [np.nan, 0.0, np.nan]
+        df['ind_b'] = np.nan
+        return df
+
+def test_end_of_backtest_snapshot():
+    """Snapshot cuối backtest lấy giá trị hợp lệ gần nhất, hoặc 0 nếu không có"""
+    data = generate_test_data(50)
+    strategy = _EndInPositionStrategy(make_config({}))
+    reference = strategy.run_backtest(data, engine='reference')
+    arrays = strategy.run_backtest(data, engine='array')
+    assert_same_results(reference, arrays, 'end_of_backtest')
+
+    trade = arrays['trades'][-1]
+    assert trade['exit_reason'] == 'end_of_backtest'
+    assert trade['exit_ind_a'] == 46.0
+    assert trade['exit_ind_b'] == 0
+
+    snapshots = IndicatorSnapshots(strategy.generate_signals(data))
+    assert snapshots.columns == ['ind_a', 'ind_b']
+    assert snapshots.last_valid_at(0)['ind_a'] == 0
+    assert snapshots.last_valid_at(10)['ind_a'] == 10.0
+    print("✅ End-of-backtest snapshot matches reference")
+
+def test_unknown_engine():
+    strategy = RSIStrategy(make_config({}))
+    try:
+        strategy.run_backtest(generate_test_data(100), engine='vectorized')
+    except ValueError:
+        return
+    raise AssertionError("Expected ValueError for unknown engine")
+
+if __name__ == "__main__":
+    test_array_engine_matches_reference()
+    test_array_engine_speed()
+    test_end_of_backtest_snapshot()
+    test_unknown_engine()
+    print("\n✅ Array backtest tests completed successfully!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script cho batched multi-period kernels (rolling sum/mean/max/min, RSI)
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batch_indicators import rolling_sum_batch, rolling_mean_batch, rolling_max_batch, rolling_min_batch, rsi_batch
+from rsi_strategy import RSIStrategy
+from strategy_registry import STRATEGY_MAP, build_strategy_config
+from parameter_sweep import run_parameter_sweep
+from test_array_backtest import generate_test_data, make_config, benchmark
+
+WINDOWS = [1, 2, 3, 5, 7, 14, 16, 17, 31, 32, 33, 100, 2999, 3000, 4000]
+
+def make_values(n: int = 3000) -> np.ndarray:
+    """Random walk có NaN, inf, chuỗi hằng và chuỗi 0"""
+    values = np.cumsum(np.random.default_rng(0).normal(0, 1, n)) + 100
+    values[100:130] = 5.0
+    values[400:420] = 0.0
+    values[200] = np.nan
+    values[300] = np.inf
+    return values
+
+def test_rolling_extremes_bit_identical():
+    values = make_values()
+    for batch, method in [(rolling_max_batch, 'max'), (rolling_min_batch, 'min')]:
+        out = batch(values, WINDOWS)
+        assert out.shape == (len(values), len(WINDOWS))
+        for j, window in enumerate(WINDOWS):
+            expected = getattr(pd.Series(values).rolling(window=window), method)().to_numpy()
+            assert np.array_equal(out[:, j], expected, equal_nan=True), (method, window)
+
+def test_rolling_sums_match_pandas():
+    values = make_values()
+    for batch, method in [(rolling_sum_batch, 'sum'), (rolling_mean_batch, 'mean')]:
+        out = batch(values, WINDOWS)
+        for j, window in enumerate(WINDOWS):
+            expected = getattr(pd.Series(values).rolling(window=window), method)().to_numpy()
+            # NaN ở đúng vị trí, giá trị khác nhau chỉ ở mức sai số làm tròn
+            assert np.allclose(out[:, j], expected, rtol=1e-12, atol=1e-9, equal_nan=True), (method, window)
+            if window <= 20:
+                # Window toàn giá trị bằng nhau (kể cả 0) giống hệt pandas
+                for start, stop in [(100, 130), (400, 420)]:
+                    constant = slice(start + window - 1, stop)
+                    assert np.array_equal(out[constant, j], expected[constant]), (method, window)
+    assert rolling_mean_batch([], [3]).shape == (0, 1)
+    try:
+        rolling_mean_batch(values, [0])
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+def test_rsi_batch_matches_strategy():
+    data = generate_test_data(5000)
+    periods = [2, 7, 14, 30]
+    out = rsi_batch(data['close'], periods)
+    for j, period in enumerate(periods):
+        strategy = RSIStrategy(build_strategy_config(make_config({}), 'rsi', {'period': period}))
+        expected = strategy.calculate_rsi(data).to_numpy()
+        assert np.allclose(out[:, j], expected, rtol=0, atol=1e-8, equal_nan=True), period
+        assert np.array_equal(np.isnan(out[:, j]), np.isnan(expected))
+
+def test_sweep_prefill_matches_individual_runs():
+    """Breakout/Stochastic sweep dùng rolling max/min batch: kết quả giống hệt chạy riêng"""
+    data = generate_test_data(1500)
+    for strategy_type, grid in [('breakout', {'channelPeriod': [5, 10, 20, 40], 'multiplier': [0.2, 0.4]}),
+                                ('stochastic', {'k_period': [5, 9, 14], 'smooth_k': [1, 3]})]:
+        table = run_parameter_sweep(strategy_type, data, make_config({}), param_grid=grid, workers=1)
+        for _, row in table.iterrows():
+            # iterrows đổi cột int thành float khi dòng có cả float
+            params = {key: int(row[key]) if float(row[key]).is_integer() else row[key] for key in grid}
+            config = build_strategy_config(make_config({}), strategy_type, params)
+            expected = STRATEGY_MAP[strategy_type](config).run_backtest(data)['performance']
+            assert row['final_capital'] == expected['final_capital'], (strategy_type, params)
+
+@benchmark
+def test_rsi_batch_speed():
+    data = generate_test_data(100000)
+    periods = list(range(5, 55))
+    rsi_batch(data['close'][:100], periods)
+    start = time.perf_counter()
+    rsi_batch(data['close'], periods)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for period in periods[:10]:
+        RSIStrategy(build_strategy_config(make_config({}), 'rsi', {'period': period})).calculate_rsi(data)
+    single_time = (time.perf_counter() - start) / 10
+    print(f"✅ RSI for {len(periods)} periods costs {batch_time / single_time:.1f} single RSIs")
+    assert batch_time < 0.5 * single_time * len(periods)
+
+if __name__ == "__main__":
+    test_rolling_extremes_bit_identical()
+    test_rolling_sums_match_pandas()
+    test_rsi_batch_matches_strategy()
+    test_sweep_prefill_matches_individual_runs()
+    test_rsi_batch_speed()
+    print("\n✅ Batch indicator tests completed successfully!")
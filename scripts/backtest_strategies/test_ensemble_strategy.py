@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script cho EnsembleStrategy: voting/weighting, indicator dùng chung, runner
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add current and parent directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rsi_strategy import RSIStrategy
+from ensemble_strategy import EnsembleStrategy
+from strategy_registry import build_strategy_config
+from backtest_strategies import backtest_runner
+from test_array_backtest import generate_test_data, make_config
+
+def make_ensemble(**parameters) -> EnsembleStrategy:
+    return EnsembleStrategy(build_strategy_config(make_config({}), 'ensemble', parameters))
+
+MEMBERS = [
+    {'type': 'rsi', 'parameters': {'period': 7, 'overbought': 60, 'oversold': 40}},
+    {'type': 'stochastic'},
+    {'type': 'williams_r', 'weight': 2},
+]
+
+def test_vote_and_weighted_combination():
+    # 3 member bỏ phiếu, holdBars=2: signal còn hiệu lực ở bar phát và bar kế tiếp
+    signals = np.array([
+        [1, 0, 0],
+        [0, 1, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+        [-1, -1, 1],
+        [0, 0, 0],
+    ], dtype=np.int8)
+    members = [{'type': 'rsi'}, {'type': 'rsi'}, {'type': 'rsi', 'weight': 2}]
+    vote = make_ensemble(members=members, holdBars=2)
+    assert vote.min_votes == 2
+    score, signal = vote.combine_member_signals(signals)
+    assert score.tolist() == [1, 2, 1, 0, -1, -1]
+    assert signal.tolist() == [0, 1, 0, 0, -1, 0]
+
+    weighted = make_ensemble(members=members, holdBars=2, method='weighted', threshold=0.3)
+    score, signal = weighted.combine_member_signals(signals)
+    assert score.tolist() == [0.25, 0.5, 0.25, 0, 0, 0]
+    assert signal.tolist() == [0, 1, 0, 0, 0, 0]
+
+    # Filter chỉ chặn lệnh vào
+    filtered = make_ensemble(members=members[:2] + [{'type': 'adx', 'role': 'filter'}], holdBars=2)
+    _, signal = filtered.combine_member_signals(signals)
+    assert signal.tolist() == [0, 0, 0, 0, -1, 0]
+
+def test_matches_member_signals():
+    data = generate_test_data(2000)
+    ensemble = make_ensemble(members=MEMBERS, minVotes=1)
+    frame = ensemble.generate_signals(data)
+    member_signals = np.column_stack([member.generate_signals(data)['signal'].to_numpy() for member in ensemble.members])
+    expected = ensemble.combine_member_signals(member_signals)[1]
+    assert np.array_equal(frame['signal'].to_numpy(), expected)
+    assert np.array_equal(ensemble.signal_array(data), expected)
+    assert (expected != 0).sum() > 10
+    # Indicator của member có tiền tố tên member
+    assert np.array_equal(frame['rsi_rsi'].to_numpy(), ensemble.members[0].generate_signals(data)['rsi'].to_numpy(),
+                          equal_nan=True)
+    assert set(ensemble.indicator_columns) <= set(frame.columns)
+
+def test_indicators_computed_once():
+    """Hai member RSI cùng period chỉ tính RSI một lần trên dữ liệu dùng chung"""
+    data = generate_test_data(1000)
+    calls = []
+    original = RSIStrategy.calculate_rsi
+
+    def counting_rsi(self, data):
+        calls.append(self.period)
+        return original(self, data)
+
+    RSIStrategy.calculate_rsi = counting_rsi
+    try:
+        ensemble = make_ensemble(members=[{'type': 'rsi'}, {'type': 'rsi', 'parameters': {'oversold': 35}},
+                                          {'type': 'macd'}])
+        assert ensemble.member_names == ['rsi', 'rsi_2', 'macd']
+        ensemble.run_backtest(data)
+    finally:
+        RSIStrategy.calculate_rsi = original
+    assert calls == [14], calls
+
+def test_warmup_bars():
+    """Signal sau warmup_bars bar giống khi tính trên toàn bộ lịch sử"""
+    data = generate_test_data(2000)
+    ensemble = make_ensemble(members=MEMBERS, minVotes=1, holdBars=5)
+    full = ensemble.generate_signals(data)['signal'].to_numpy()
+    start = 700
+    partial = ensemble.generate_signals(data.iloc[start - ensemble.warmup_bars:])['signal'].to_numpy()
+    assert np.array_equal(partial[ensemble.warmup_bars:], full[start:])
+
+def test_backtest_runner_ensemble():
+    data = generate_test_data(1500)
+    config = make_config({'prioritizeStoploss': True})
+    config['strategy'] = {'type': 'ensemble', 'parameters': {'members': MEMBERS, 'minVotes': 1}}
+    original = backtest_runner.load_data
+    backtest_runner.load_data = lambda *args: data
+    try:
+        results = backtest_runner.compute_backtest(config)
+    finally:
+        backtest_runner.load_data = original
+    expected = EnsembleStrategy(config).run_backtest(data)
+    assert results['performance'] == expected['performance']
+    assert 'rsi_rsi' in results['indicators']['indicators'] and 'ensemble_score' in results['indicators']['indicators']
+
+def test_invalid_config():
+    for parameters in [{'method': 'median'}, {'holdBars': 0}, {'members': [{'type': 'adx', 'role': 'filter'}]},
+                       {'members': [{'type': 'rsi', 'role': 'veto'}]}, {'members': [{'type': 'ensemble'}]}]:
+        try:
+            make_ensemble(**parameters)
+            assert False, parameters
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_vote_and_weighted_combination()
+    test_matches_member_signals()
+    test_indicators_computed_once()
+    test_warmup_bars()
+    test_backtest_runner_ensemble()
+    test_invalid_config()
+    print("\n✅ Ensemble strategy tests completed successfully!")
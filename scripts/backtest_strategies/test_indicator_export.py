@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script cho indicator_columns khai báo trên strategy và export_indicators
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicator_export import export_indicators, decimate_indicators, indicator_columns_of
+from test_array_backtest import ALL_STRATEGIES, generate_test_data, make_config
+
+def test_declared_columns_exist():
+    data = generate_test_data(600)
+    for strategy_class in ALL_STRATEGIES:
+        strategy = strategy_class(make_config({}))
+        signals = strategy.generate_signals(data)
+        assert strategy.indicator_columns, strategy_class.__name__
+        # Mọi cột khai báo phải có trong signal frame (tránh gõ sai tên cột)
+        missing = [col for col in strategy.indicator_columns if col not in signals.columns]
+        assert not missing, (strategy_class.__name__, missing)
+        exported = strategy.export_indicators(signals)
+        assert len(exported['indicators']) == len(strategy.indicator_columns)
+        for col in strategy.indicator_columns:
+            name = strategy.indicator_labels.get(col, col)
+            # Series là view của cột, không copy
+            assert np.shares_memory(exported['indicators'][name], signals[col].to_numpy()), (strategy_class.__name__, col)
+
+def test_decimation():
+    data = generate_test_data(500)
+    strategy = ALL_STRATEGIES[0](make_config({}))
+    signals = strategy.generate_signals(data)
+    full = export_indicators(signals)
+    assert set(full['indicators']) == set(indicator_columns_of(signals))
+    for exported in (export_indicators(signals, decimation=3), decimate_indicators(full, 3)):
+        assert np.array_equal(exported['timestamps'], full['timestamps'][::3])
+        assert np.array_equal(exported['close_prices'], full['close_prices'][::3])
+        for name, values in full['indicators'].items():
+            assert np.array_equal(exported['indicators'][name], values[::3], equal_nan=True)
+    assert decimate_indicators(full, 1) is full
+
+if __name__ == "__main__":
+    test_declared_columns_exist()
+    test_decimation()
+    print("\n✅ Indicator export tests completed successfully!")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Test script cho indicator kernels (Parabolic SAR, ADX/DI)
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicator_kernels import parabolic_sar, _parabolic_sar_jit, adx_di, rolling_mean
+from streaming_indicators import WilderSmoothing
+from test_array_backtest import generate_test_data, benchmark
+
+def reference_parabolic_sar(data, acceleration=0.02, maximum=0.2):
+    """Implementation gốc của ParabolicSARStrategy.calculate_parabolic_sar (truy cập iloc từng bar)"""
+    high = data['high']
+    low = data['low']
+    close = data['close']
+
+    sar = np.zeros(len(data))
+    trend = np.zeros(len(data))
+    af = np.zeros(len(data))
+    ep = np.zeros(len(data))
+
+    sar[0] = low.iloc[0]
+    trend[0] = 1
+    af[0] = acceleration
+    ep[0] = high.iloc[0]
+
+    for i in range(1, len(data)):
+        if trend[i-1] == 1:
+            sar[i] = sar[i-1] + af[i-1] * (ep[i-1] - sar[i-1])
+            if sar[i] > low.iloc[i]:
+                sar[i] = low.iloc[i]
+            if close.iloc[i] < sar[i]:
+                trend[i] = -1
+                sar[i] = ep[i-1]
+                af[i] = acceleration
+                ep[i] = low.iloc[i]
+            else:
+                trend[i] = 1
+                if high.iloc[i] > ep[i-1]:
+                    ep[i] = high.iloc[i]
+                    af[i] = min(af[i-1] + acceleration, maximum)
+                else:
+                    ep[i] = ep[i-1]
+                    af[i] = af[i-1]
+        else:
+            sar[i] = sar[i-1] + af[i-1] * (ep[i-1] - sar[i-1])
+            if sar[i] < high.iloc[i]:
+                sar[i] = high.iloc[i]
+            if close.iloc[i] > sar[i]:
+                trend[i] = 1
+                sar[i] = ep[i-1]
+                af[i] = acceleration
+                ep[i] = high.iloc[i]
+            else:
+                trend[i] = -1
+                if low.iloc[i] < ep[i-1]:
+                    ep[i] = low.iloc[i]
+                    af[i] = min(af[i-1] + acceleration, maximum)
+                else:
+                    ep[i] = ep[i-1]
+                    af[i] = af[i-1]
+
+    return sar, trend
+
+def make_bars(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random walk bars. Close có thể nằm ngoài [low, high]: với dữ liệu OHLC hợp lệ
+    SAR bị kẹp dưới low nên không bao giờ đảo chiều, khi đó nhánh downtrend không chạy.
+    """
+    data = generate_test_data(n)
+    rng = np.random.default_rng(seed)
+    mid = 100 + np.cumsum(rng.normal(0, 1, n))
+    data['close'] = mid + rng.normal(0, 1, n)
+    data['high'] = mid + rng.uniform(0, 1, n)
+    data['low'] = mid - rng.uniform(0, 1, n)
+    return data
+
+def test_parabolic_sar_bit_identical():
+    data = make_bars(5000)
+    for acceleration, maximum in [(0.02, 0.2), (0.01, 0.1), (0.05, 0.5)]:
+        expected_sar, expected_trend = reference_parabolic_sar(data, acceleration, maximum)
+        for use_jit in (True, False):
+            sar, trend = parabolic_sar(data['high'], data['low'], data['close'], acceleration, maximum, use_jit=use_jit)
+            assert np.array_equal(sar, expected_sar) and np.array_equal(trend, expected_trend)
+    assert (np.diff(expected_trend) != 0).sum() > 100
+
+    # NaN trong dữ liệu được xử lý giống implementation gốc
+    data.iloc[100:105, data.columns.get_loc('high')] = np.nan
+    expected_sar, expected_trend = reference_parabolic_sar(data)
+    sar, trend = parabolic_sar(data['high'], data['low'], data['close'], 0.02, 0.2, use_jit=False)
+    assert np.array_equal(sar, expected_sar, equal_nan=True) and np.array_equal(trend, expected_trend)
+
+    empty_sar, empty_trend = parabolic_sar([], [], [], 0.02, 0.2)
+    assert len(empty_sar) == 0 and len(empty_trend) == 0
+
+@benchmark
+def test_parabolic_sar_speed():
+    data = make_bars(20000)
+    # Warm-up (JIT compile lần đầu)
+    parabolic_sar(data['high'][:10], data['low'][:10], data['close'][:10], 0.02, 0.2)
+    start = time.perf_counter()
+    reference_parabolic_sar(data)
+    reference_time = time.perf_counter() - start
+
+    # Cả đường JIT lẫn vòng lặp Python (không có numba) phải nhanh hơn ít nhất 50x
+    for use_jit in (True, False):
+        kernel_time = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            parabolic_sar(data['high'], data['low'], data['close'], 0.02, 0.2, use_jit=use_jit)
+            kernel_time = min(kernel_time, time.perf_counter() - start)
+        speedup = reference_time / kernel_time
+        print(f"✅ Parabolic SAR kernel {speedup:.0f}x faster (jit={'yes' if use_jit and _parabolic_sar_jit else 'no'})")
+        assert speedup >= 50, (use_jit, speedup)
+
+def reference_adx(data, di_period=14, adx_period=14):
+    """Implementation gốc của ADXStrategy.calculate_adx (pandas, SMA smoothing)"""
+    high = data['high']
+    low = data['low']
+    dm_plus = high - high.shift(1)
+    dm_minus = low.shift(1) - low
+    dm_plus = np.where((dm_plus > dm_minus) & (dm_plus > 0), dm_plus, 0)
+    dm_minus = np.where((dm_minus > dm_plus) & (dm_minus > 0), dm_minus, 0)
+    prev_close = data['close'].shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    tr_smooth = tr.rolling(window=di_period).mean()
+    di_plus = 100 * (pd.Series(dm_plus, index=data.index).rolling(window=di_period).mean() / tr_smooth)
+    di_minus = 100 * (pd.Series(dm_minus, index=data.index).rolling(window=di_period).mean() / tr_smooth)
+    dx = 100 * abs(di_plus - di_minus) / (di_plus + di_minus)
+    return dx.rolling(window=adx_period).mean(), di_plus, di_minus
+
+def reference_wilder_adx(data, di_period=14, adx_period=14):
+    """Wilder ADX theo từng bar bằng WilderSmoothing của streaming_indicators"""
+    tr_smooth, plus_smooth, minus_smooth = (WilderSmoothing(di_period) for _ in range(3))
+    adx_smooth = WilderSmoothing(adx_period)
+    rows = [(np.nan, np.nan, np.nan)]
+    bars = list(zip(data['high'], data['low'], data['close']))
+    for (prev_high, prev_low, prev_close), (high, low, close) in zip(bars, bars[1:]):
+        up, down = high - prev_high, prev_low - low
+        dm_plus = up if (up > down and up > 0) else 0.0
+        dm_minus = down if (down > dm_plus and down > 0) else 0.0
+        tr = tr_smooth.update(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+        plus, minus = plus_smooth.update(dm_plus), minus_smooth.update(dm_minus)
+        di_plus = 100 * (plus / tr) if tr == tr else np.nan
+        di_minus = 100 * (minus / tr) if tr == tr else np.nan
+        adx = adx_smooth.update(100 * abs(di_plus - di_minus) / (di_plus + di_minus))
+        rows.append((adx, di_plus, di_minus))
+    return tuple(np.array(column) for column in zip(*rows))
+
+def test_adx_sma_bit_identical():
+    data = make_bars(5000)
+    # Chuỗi giá không đổi: TR = 0 và DI = 0/0
+    data.iloc[1000:1040, [data.columns.get_loc(c) for c in ('high', 'low', 'close')]] = 100.0
+    for di_period, adx_period in [(14, 14), (10, 7), (1, 1), (30, 2)]:
+        expected = reference_adx(data, di_period, adx_period)
+        for use_jit in (True, False):
+            actual = adx_di(data['high'], data['low'], data['close'], di_period, adx_period, use_jit=use_jit)
+            for values, reference in zip(actual, expected):
+                assert np.array_equal(values, reference.to_numpy(), equal_nan=True), (di_period, adx_period, use_jit)
+
+def test_adx_wilder():
+    data = make_bars(3000)
+    expected = reference_wilder_adx(data, 10, 7)
+    for use_jit in (True, False):
+        actual = adx_di(data['high'], data['low'], data['close'], 10, 7, smoothing='wilder', use_jit=use_jit)
+        for values, reference in zip(actual, expected):
+            assert np.array_equal(values, reference, equal_nan=True)
+    # DI có từ bar di_period, ADX từ bar di_period + adx_period - 1
+    assert np.isnan(actual[1][:10]).all() and not np.isnan(actual[1][10:]).any()
+    assert np.isnan(actual[0][:16]).all() and not np.isnan(actual[0][16:]).any()
+
+def test_rolling_mean_matches_pandas():
+    values = np.array([1, -2, np.inf, 3, 3, 3, np.nan, 4, -1, -1, 5.0, 1e-12, 2e15] * 20)
+    for window in (1, 2, 3, 7):
+        expected = pd.Series(values).rolling(window=window).mean().to_numpy()
+        for use_jit in (True, False):
+            assert np.array_equal(rolling_mean(values, window, use_jit), expected, equal_nan=True), (window, use_jit)
+
+@benchmark
+def test_adx_speed():
+    data = make_bars(100000)
+    for smoothing in ('sma', 'wilder'):
+        adx_di(data['high'][:50], data['low'][:50], data['close'][:50], 14, 14, smoothing)
+    start = time.perf_counter()
+    reference_adx(data)
+    reference_time = time.perf_counter() - start
+    for smoothing in ('sma', 'wilder'):
+        start = time.perf_counter()
+        adx_di(data['high'], data['low'], data['close'], 14, 14, smoothing)
+        speedup = reference_time / (time.perf_counter() - start)
+        print(f"✅ ADX kernel ({smoothing}) {speedup:.1f}x faster than pandas")
+    if _parabolic_sar_jit is not None:
+        assert speedup >= 2
+
+    # Không có numba: đường 'sma' mặc định không được chậm hơn implementation pandas
+    start = time.perf_counter()
+    adx_di(data['high'], data['low'], data['close'], 14, 14, use_jit=False)
+    speedup = reference_time / (time.perf_counter() - start)
+    print(f"✅ ADX kernel (sma, no jit) {speedup:.1f}x faster than pandas")
+    assert speedup >= 1
+
+if __name__ == "__main__":
+    test_parabolic_sar_bit_identical()
+    test_parabolic_sar_speed()
+    test_adx_sma_bit_identical()
+    test_adx_wilder()
+    test_rolling_mean_matches_pandas()
+    test_adx_speed()
+    print("\n✅ Indicator kernel tests completed successfully!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script cho indicator store dùng chung
+"""
+
+import sys
+import os
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicator_store import IndicatorStore
+from strategy_registry import STRATEGY_MAP, build_strategy_config
+from parameter_sweep import run_parameter_sweep
+from test_array_backtest import generate_test_data, make_config
+
+def make_strategy(strategy_type, **params):
+    return STRATEGY_MAP[strategy_type](build_strategy_config(make_config({}), strategy_type, params))
+
+def test_primitives_match_pandas():
+    data = generate_test_data(500)
+    store = IndicatorStore(data)
+
+    prev_close = data['close'].shift()
+    expected_tr = pd.concat([data['high'] - data['low'], (data['high'] - prev_close).abs(),
+                             (data['low'] - prev_close).abs()], axis=1).max(axis=1)
+    pd.testing.assert_series_equal(store.true_range(), expected_tr, check_exact=True)
+    pd.testing.assert_series_equal(store.atr(10), expected_tr.rolling(window=10).mean(), check_exact=True)
+    pd.testing.assert_series_equal(store.rolling_max('high', 26), data['high'].rolling(window=26).max(), check_exact=True)
+    pd.testing.assert_series_equal(store.ema('close', 12, adjust=False),
+                                   data['close'].ewm(span=12, adjust=False).mean(), check_exact=True)
+
+def test_shared_store_computes_each_primitive_once():
+    """Nhiều strategy và nhiều bộ tham số trên cùng dữ liệu dùng chung primitive"""
+    data = generate_test_data(1000)
+    store = IndicatorStore(data)
+    strategies = [
+        make_strategy('keltner_channel', atr_period=10),
+        make_strategy('adx', di_period=10),
+        make_strategy('ichimoku'),
+        make_strategy('stochastic', k_period=26),
+        make_strategy('williams_r', period=26),
+        make_strategy('williams_r', period=26, oversold=-90)
+    ]
+    for strategy in strategies:
+        strategy.indicator_store = store
+        shared = strategy.generate_signals(data)
+        strategy.indicator_store = None
+        pd.testing.assert_frame_equal(shared, strategy.generate_signals(data), check_exact=True)
+
+    assert len(store.computed) == len(set(store.computed))
+    # ATR(10) của Keltner chỉ được tính một lần
+    assert store.computed.count(('atr', 10)) == 1
+    assert ('rolling_max', 'high', 26) in store and ('rolling_min', 'low', 26) in store
+    print(f"✅ {len(strategies)} strategies, {len(store)} memoized values")
+
+def test_store_ignores_other_data():
+    data = generate_test_data(300)
+    strategy = make_strategy('bollinger_bands')
+    strategy.indicator_store = IndicatorStore(data)
+    other = data.iloc[100:]
+    assert strategy.indicators(other) is not strategy.indicator_store
+    pd.testing.assert_frame_equal(strategy.generate_signals(other),
+                                  make_strategy('bollinger_bands').generate_signals(other), check_exact=True)
+
+def test_strategy_reused_on_other_data():
+    """Store còn gắn sau lần chạy trên frame A không trả indicator của A cho frame B"""
+    first, second = generate_test_data(800, seed=1), generate_test_data(800, seed=2)
+    for strategy_type in STRATEGY_MAP:
+        strategy = make_strategy(strategy_type)
+        strategy.indicator_store = IndicatorStore(first)
+        strategy.generate_signals(first)
+        pd.testing.assert_frame_equal(strategy.generate_signals(second),
+                                      make_strategy(strategy_type).generate_signals(second), check_exact=True)
+
+def test_sweep_shares_primitives():
+    """SMA của MA crossover chỉ được tính một lần cho mỗi period trong sweep"""
+    data = generate_test_data(500)
+    computed = []
+    original = IndicatorStore.memo
+
+    def recording_memo(self, key, compute):
+        if key not in self:
+            computed.append(key)
+        return original(self, key, compute)
+
+    IndicatorStore.memo = recording_memo
+    try:
+        run_parameter_sweep('ma_crossover', data, make_config({}),
+                            param_grid={'fastPeriod': [5, 10, 20], 'slowPeriod': [20, 50]}, workers=1)
+    finally:
+        IndicatorStore.memo = original
+    assert sorted(computed) == [('sma', 'close', p) for p in (5, 10, 20, 50)], computed
+
+if __name__ == "__main__":
+    test_primitives_match_pandas()
+    test_shared_store_computes_each_primitive_once()
+    test_store_ignores_other_data()
+    test_strategy_reused_on_other_data()
+    test_sweep_shares_primitives()
+    print("\n✅ Indicator store tests completed successfully!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script cho streaming NDJSON output
+"""
+
+import sys
+import os
+import io
+import json
+import numpy as np
+import pandas as pd
+
+# Add current and parent directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ndjson_output import NDJSONWriter
+from serialization import unpack_values
+from backtest_strategies.backtest_runner import write_ndjson_results
+
+def read_records(output: io.StringIO) -> list:
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+def make_results(n: int = 25) -> dict:
+    index = pd.date_range('2023-01-01', periods=n, freq='1h')
+    rsi = np.linspace(20, 80, n)
+    rsi[:3] = np.nan
+    return {
+        'performance': {'total_return': 1.5, 'sharpe_ratio': np.float64('nan')},
+        'cache': {'enabled': False, 'hit': False},
+        'trades': [{'entry_time': index[i], 'exit_time': index[i + 1], 'pnl': float(i)} for i in range(7)],
+        'indicators': {'timestamps': (index.astype(np.int64) // 10**6).tolist(),
+                       'close_prices': np.arange(n, dtype=float), 'indicators': {'rsi': rsi}},
+        'equity_curve': list(np.linspace(10000, 11000, n))
+    }
+
+def test_backtest_runner_ndjson():
+    results = make_results()
+    rsi = results['indicators']['indicators']['rsi']
+    output = io.StringIO()
+    write_ndjson_results(NDJSONWriter(output, chunk_size=10), results, 'exp', equity_points=5)
+    text = output.getvalue()
+    records = read_records(output)
+    assert 'NaN' not in text and 'Infinity' not in text
+    assert [r['type'] for r in records] == ['summary', 'trades', 'indicators', 'indicators', 'indicators',
+                                             'equity_curve', 'end']
+    assert records[0]['performance'] == {'total_return': 1.5, 'sharpe_ratio': None}
+    assert records[1]['trades'][0] == {'entry_time': '2023-01-01T00:00:00', 'exit_time': '2023-01-01T01:00:00', 'pnl': 0.0}
+    blocks = records[2:5]
+    assert [b['offset'] for b in blocks] == [0, 10, 20]
+    assert [v for b in blocks for v in b['indicators']['rsi']] == [None] * 3 + rsi[3:].tolist()
+    assert [t for b in blocks for t in b['timestamps']] == results['indicators']['timestamps']
+    assert len(records[5]['equity']) == 5 and records[5]['timestamps'][0] == results['indicators']['timestamps'][0]
+    assert records[-1] == {'type': 'end', 'records': 7, 'success': True, 'experiment_id': 'exp', 'trades': 7}
+
+def test_binary_chart_blocks():
+    results = make_results()
+    output = io.StringIO()
+    write_ndjson_results(NDJSONWriter(output, chunk_size=10, chart_format='float32'), results, 'exp')
+    blocks = [r for r in read_records(output) if r['type'] == 'indicators']
+    rsi = np.concatenate([unpack_values(b['indicators']['rsi']) for b in blocks])
+    assert rsi.dtype == np.float32 and np.array_equal(rsi, results['indicators']['indicators']['rsi'].astype(np.float32), equal_nan=True)
+    timestamps = np.concatenate([unpack_values(b['timestamps']) for b in blocks])
+    assert timestamps.tolist() == results['indicators']['timestamps']
+
+if __name__ == "__main__":
+    test_backtest_runner_ndjson()
+    test_binary_chart_blocks()
+    print("\n✅ NDJSON output tests completed successfully!")
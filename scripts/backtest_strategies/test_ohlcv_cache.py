@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script cho local OHLCV cache với incremental sync
+"""
+
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ohlcv_cache import OHLCVCache, load_ohlcv
+from ohlcv_loader import OHLCVLoader, RAW_OHLCV_COLUMNS
+from test_ohlcv_loader import PostgrestStandIn, make_table
+from market_data import resample_ohlcv
+from resample_pyramid import PYRAMID_LEVELS
+from test_resample_pyramid import make_minutes
+
+def fetched_ranges(server):
+    """Các filter open_time của những request đã gửi tới stand-in"""
+    return [[value for name, value in params if name == 'open_time'] for params in server.requests
+            if any(name == 'open_time' for name, _ in params)]
+
+def test_incremental_tail_sync():
+    table = make_table('2023-01-01', 10 * 24 * 60)
+    with PostgrestStandIn({'OHLCV_BTC_USDT_1m': table}) as server, tempfile.TemporaryDirectory() as cache_dir:
+        options = {'supabase_url': server.url, 'supabase_key': 'test-key', 'cache_dir': cache_dir, 'workers': 2}
+        first = load_ohlcv('BTCUSDT', '2023-01-01', '2023-01-05', **options)
+        assert len(first) == 4 * 24 * 60 + 1
+        assert np.array_equal(first['close'].to_numpy(), np.array(table['close_price'][:len(first)]))
+
+        # Khoảng dài hơn: chỉ phần đuôi sau open_time cuối cùng được fetch
+        server.requests.clear()
+        second = load_ohlcv('BTCUSDT', '2023-01-01', '2023-01-08', **options)
+        assert len(second) == 7 * 24 * 60 + 1
+        assert np.array_equal(second['close'].to_numpy(), np.array(table['close_price'][:len(second)]))
+        lower_bounds = [pd.Timestamp(f.split('.', 1)[1]) for filters in fetched_ranges(server) for f in filters
+                        if f.startswith(('gte.', 'gt.'))]
+        assert lower_bounds and min(lower_bounds) > pd.Timestamp('2023-01-05', tz='UTC')
+
+        # Khoảng đã có trong cache: không request nào, không cần credentials
+        server.requests.clear()
+        offline = {**options, 'supabase_url': 'http://127.0.0.1:9', 'supabase_key': 'unused'}
+        hourly = load_ohlcv('BTC/USDT', '2023-01-02', '2023-01-03', timeframe='1h', **offline)
+        assert not server.requests and len(hourly) == 25
+
+        # Dữ liệu trước synced_from được ghép vào đầu (generation mới)
+        table_early = make_table('2022-12-31', 11 * 24 * 60, seed=0)
+        server.tables['OHLCV_BTC_USDT_1m'] = table_early
+        cache = OHLCVCache(cache_dir)
+        cache.load('BTCUSDT', '2022-12-31T12:00:00', '2023-01-02', lambda start, end: server_fetch(server, start, end))
+        coverage = cache.coverage('BTCUSDT')
+        assert coverage == (pd.Timestamp('2022-12-31T12:00:00', tz='UTC'), pd.Timestamp('2023-01-08', tz='UTC'))
+        data = cache.read('BTCUSDT')
+        assert data.index.is_monotonic_increasing and not data.index.has_duplicates
+        assert len(data) == (7 * 24 + 12) * 60 + 1
+        bin_files = [name for name in os.listdir(os.path.join(cache_dir, 'OHLCV_BTC_USDT_1m')) if name.endswith('.bin')]
+        assert len(bin_files) == 6
+
+def server_fetch(server, start, end):
+    with OHLCVLoader(server.url, 'test-key') as loader:
+        return loader.fetch('OHLCV_BTC_USDT_1m', list(RAW_OHLCV_COLUMNS), start, end)
+
+def test_zero_copy_reads_and_partial_write():
+    index = pd.date_range('2023-06-01', periods=5000, freq='1min', tz='UTC')
+    values = np.arange(5000, dtype=np.float64)
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        mask = (index >= start) & (index <= end)
+        arrays = {'open_time': index[mask]}
+        for column in ['open_price', 'high_price', 'low_price', 'close_price', 'volume']:
+            arrays[column] = values[mask]
+        return arrays
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = OHLCVCache(cache_dir)
+        cache.load('ETHUSDT', index[0], index[2999], fetch)
+        times, columns = cache.read_arrays('ETHUSDT', index[100], index[199])
+        assert len(times) == 100 and isinstance(columns['close'], np.memmap)
+        assert times[0] == index[100].value and columns['close'][0] == 100.0
+        frame = cache.read('ETHUSDT', index[100], index[199])
+        assert not frame['close'].to_numpy().flags.owndata
+
+        # Dòng ghi dở (không có trong meta) bị bỏ qua và ghi đè ở lần sync sau
+        directory = os.path.join(cache_dir, 'OHLCV_ETH_USDT_1m')
+        with open(os.path.join(directory, 'close.1.bin'), 'ab') as f:
+            f.write(np.full(7, -1.0).tobytes())
+        assert len(cache.read('ETHUSDT')) == 3000
+        calls.clear()
+        data = cache.load('ETHUSDT', index[0], index[-1], fetch)
+        assert len(calls) == 1 and calls[0][0] > index[2999]
+        assert np.array_equal(data['close'].to_numpy(), values)
+        with open(os.path.join(directory, 'meta.json')) as f:
+            assert json.load(f)['rows'] == 5000
+
+def test_pyramid_reads_match_resample():
+    data = make_minutes(20 * 24 * 60, start='2023-02-01 05:03', seed=3)
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        window = data[(data.index >= start) & (data.index <= end)]
+        arrays = {'open_time': window.index}
+        for raw, column in [('open_price', 'open'), ('high_price', 'high'), ('low_price', 'low'),
+                            ('close_price', 'close'), ('volume', 'volume')]:
+            arrays[raw] = window[column].to_numpy()
+        return arrays
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = OHLCVCache(cache_dir)
+        # Đồng bộ theo nhiều bước (tail giữa bucket) rồi thêm head: pyramid cập nhật tăng dần
+        for start, end in [('2023-02-05', '2023-02-08 13:37'), ('2023-02-05', '2023-02-10 02:00'),
+                           ('2023-02-05', '2023-02-15 23:59'), ('2023-02-03 07:30', '2023-02-15 23:59')]:
+            cache.load('BTCUSDT', start, end, fetch)
+        for start, end in [('2023-02-03 07:30', '2023-02-15 23:59'), ('2023-02-06 10:07', '2023-02-12 16:44'),
+                           ('2023-02-07 00:00', '2023-02-09 00:00'), ('2023-02-08 01:02', '2023-02-08 01:09')]:
+            minutes = data[(data.index >= pd.Timestamp(start, tz='UTC')) & (data.index <= pd.Timestamp(end, tz='UTC'))]
+            for timeframe in ['1m', '30m'] + PYRAMID_LEVELS:
+                calls.clear()
+                result = cache.load('BTCUSDT', start, end, fetch, timeframe)
+                assert not calls
+                pd.testing.assert_frame_equal(result, resample_ohlcv(minutes, timeframe), check_freq=False, rtol=1e-12)
+
+        # Bucket đọc từ pyramid (không resample lại dữ liệu 1m)
+        level = cache._read_meta(os.path.join(cache_dir, 'OHLCV_BTC_USDT_1m', '1h'))
+        assert level['base_rows'] == cache._read_meta(os.path.join(cache_dir, 'OHLCV_BTC_USDT_1m'))['rows']
+        assert level['rows'] == len(resample_ohlcv(cache.read('BTCUSDT'), '1h'))
+
+def test_recent_bars_are_not_cached():
+    now = pd.Timestamp.now(tz='UTC').floor('min')
+    index = pd.date_range(now - pd.Timedelta(hours=2), now, freq='1min')
+
+    def fetch(start, end):
+        mask = (index >= start) & (index <= end)
+        arrays = {'open_time': index[mask]}
+        for column in ['open_price', 'high_price', 'low_price', 'close_price', 'volume']:
+            arrays[column] = np.ones(mask.sum())
+        return arrays
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = OHLCVCache(cache_dir, settle_delay=pd.Timedelta(minutes=30))
+        data = cache.load('BTCUSDT', index[0], index[-1], fetch)
+        assert len(data) == len(index)
+        # Chỉ nến cũ hơn settle_delay được lưu
+        # (phút có thể đổi giữa lúc tạo index và lúc sync)
+        synced_until = cache.coverage('BTCUSDT')[1]
+        assert synced_until - (now - pd.Timedelta(minutes=30)) in (pd.Timedelta(0), pd.Timedelta(minutes=1))
+        assert len(cache.read('BTCUSDT')) == int((synced_until - index[0]) / pd.Timedelta(minutes=1)) + 1
+
+if __name__ == "__main__":
+    test_incremental_tail_sync()
+    test_zero_copy_reads_and_partial_write()
+    test_pyramid_reads_match_resample()
+    test_recent_bars_are_not_cached()
+    print("\n✅ OHLCV cache tests completed successfully!")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script cho paginated OHLCV loader, chạy với một PostgREST stand-in cục bộ
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ohlcv_loader import OHLCVLoader, load_ohlcv
+
+class PostgrestStandIn:
+    """
+    Subset of PostgREST used by the loader: select, filter open_time theo
+    gte/gt/lte/lt, order theo open_time và limit bị cắt ở max_rows như Supabase.
+    """
+
+    def __init__(self, tables, max_rows=1000):
+        self.tables = tables
+        self.max_rows = max_rows
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body = stand_in.handle(self.path, self.client_address, self.headers)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path, client_address, headers):
+        parts = urlsplit(path)
+        table = unquote(parts.path.rsplit('/', 1)[-1])
+        params = parse_qsl(parts.query)
+        with self.lock:
+            self.requests.append(params)
+            self.connections.add(client_address)
+        if headers.get('apikey') != 'test-key':
+            return 401, {'message': 'Invalid API key'}
+        if table not in self.tables:
+            return 404, {'message': f'relation "{table}" does not exist'}
+
+        data = self.tables[table]
+        times = data['open_time_ns']
+        lo, hi = 0, len(times)
+        select, limit, descending = None, self.max_rows, False
+        for name, value in params:
+            if name == 'select':
+                select = value.split(',')
+            elif name == 'limit':
+                limit = min(int(value), self.max_rows)
+            elif name == 'order':
+                descending = value.endswith('.desc')
+            elif name == 'open_time':
+                op, operand = value.split('.', 1)
+                ts = pd.Timestamp(operand)
+                ts = ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+                side = 'left' if op in ('gte', 'lt') else 'right'
+                position = int(np.searchsorted(times, ts.value, side=side))
+                if op in ('gte', 'gt'):
+                    lo = max(lo, position)
+                else:
+                    hi = min(hi, position)
+        indices = range(lo, max(lo, hi))
+        indices = list(reversed(indices))[:limit] if descending else list(indices)[:limit]
+        columns = select or [c for c in data if c != 'open_time_ns']
+        return 200, [{c: data[c][i] for c in columns} for i in indices]
+
+def make_table(start: str, periods: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq='1min', tz='UTC')
+    close = 100 + np.cumsum(rng.normal(0, 0.1, periods))
+    return {
+        'open_time_ns': index.asi8,
+        'open_time': [ts.isoformat() for ts in index],
+        'open_price': (close + rng.normal(0, 0.05, periods)).tolist(),
+        'high_price': (close + 0.2).tolist(),
+        'low_price': (close - 0.2).tolist(),
+        'close_price': close.tolist(),
+        'volume': rng.uniform(1, 10, periods).tolist(),
+        # Cột không dùng trong backtest, không được select
+        'quote_volume': rng.uniform(100, 1000, periods).tolist(),
+        'trades_count': rng.integers(1, 100, periods).tolist()
+    }
+
+def test_paginated_fetch_is_complete():
+    table = make_table('2023-01-01', 20000)
+    with PostgrestStandIn({'OHLCV_BTC_USDT_1m': table}, max_rows=1000) as server:
+        # page_size lớn hơn max-rows của server: không được dừng sớm
+        with OHLCVLoader(server.url, 'test-key', page_size=5000, workers=4, chunk=pd.Timedelta(days=2)) as loader:
+            data = loader.load_ohlcv('BTCUSDT', '2023-01-01', '2023-01-12T00:00:00')
+            requests = loader.requests
+
+    expected_index = pd.date_range('2023-01-01', '2023-01-12', freq='1min', tz='UTC')
+    assert len(data) == len(expected_index) and data.index.equals(expected_index)
+    assert not data.index.has_duplicates
+    assert list(data.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert all(dtype == np.float64 for dtype in data.dtypes)
+    assert np.array_equal(data['close'].to_numpy(), np.array(table['close_price'][:len(data)]))
+
+    # Chỉ select các cột cần thiết, keyset theo open_time (không dùng offset)
+    selects = {value for params in server.requests for name, value in params if name == 'select'}
+    assert selects == {'open_time,open_price,high_price,low_price,close_price,volume'}
+    assert not any(name == 'offset' for params in server.requests for name, _ in params)
+    # Kết nối được tái sử dụng: số kết nối TCP không vượt quá số worker
+    assert len(server.connections) <= 4 < requests
+    print(f"✅ {len(data)} bars in {requests} requests over {len(server.connections)} connections")
+
+def test_unbounded_range_and_resample():
+    table = make_table('2023-03-01', 3000)
+    with PostgrestStandIn({'OHLCV_ETH_USDT_1m': table}, max_rows=500) as server:
+        with OHLCVLoader(server.url, 'test-key', workers=2, chunk=pd.Timedelta(hours=12)) as loader:
+            arrays = loader.fetch('OHLCV_ETH_USDT_1m', ['close_price'])
+        assert len(arrays['open_time']) == 3000 and len(arrays['close_price']) == 3000
+
+        hourly = load_ohlcv('ETH', '2023-03-01', '2023-03-02', timeframe='1h',
+                            supabase_url=server.url, supabase_key='test-key', workers=2)
+        assert len(hourly) == 25
+        assert np.isclose(hourly['volume'].iloc[0], sum(table['volume'][:60]))
+
+def test_errors_and_empty_range():
+    with PostgrestStandIn({'OHLCV_BTC_USDT_1m': make_table('2023-01-01', 100)}) as server:
+        with OHLCVLoader(server.url, 'test-key') as loader:
+            assert len(loader.load_ohlcv('BTC', '2024-01-01', '2024-01-02')) == 0
+            try:
+                loader.load_ohlcv('DOGE', '2023-01-01', '2023-01-02')
+                assert False, "missing table must raise"
+            except RuntimeError as e:
+                assert '404' in str(e)
+        with OHLCVLoader(server.url, 'wrong-key') as loader:
+            try:
+                loader.load_ohlcv('BTC', '2023-01-01', '2023-01-02')
+                assert False, "invalid key must raise"
+            except RuntimeError as e:
+                assert '401' in str(e)
+
+def test_year_of_minute_bars():
+    """Một năm nến 1m (525600 dòng) trong vài giây"""
+    periods = 365 * 24 * 60
+    table = make_table('2023-01-01', periods)
+    with PostgrestStandIn({'OHLCV_BTC_USDT_1m': table}, max_rows=1000) as server:
+        start = time.perf_counter()
+        data = load_ohlcv('BTCUSDT', '2023-01-01', '2023-12-31T23:59:00', supabase_url=server.url,
+                          supabase_key='test-key', workers=8)
+        elapsed = time.perf_counter() - start
+    assert len(data) == periods
+    print(f"✅ One year of 1m bars ({periods} rows) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    test_paginated_fetch_is_complete()
+    test_unbounded_range_and_resample()
+    test_errors_and_empty_range()
+    test_year_of_minute_bars()
+    print("\n✅ OHLCV loader tests completed successfully!")
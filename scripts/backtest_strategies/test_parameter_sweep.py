@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script để kiểm tra parameter sweep (grid, random search, cache, process pool)
+"""
+
+import sys
+import os
+import io
+from contextlib import redirect_stderr
+import pandas as pd
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rsi_strategy
+from rsi_strategy import RSIStrategy
+from strategy_registry import build_strategy_config
+from parameter_sweep import run_parameter_sweep, expand_grid, sample_search_space
+from test_array_backtest import generate_test_data
+
+BASE_CONFIG = {
+    'trading': {'symbol': 'BTCUSDT', 'timeframe': '1h', 'initialCapital': 10000, 'positionSize': 1.0},
+    'riskManagement': {'stopLoss': 2.0, 'takeProfit': 4.0, 'prioritizeStoploss': True},
+    'strategy': {'type': 'rsi', 'parameters': {}}
+}
+
+RSI_GRID = {'period': [7, 14], 'overbought': [65, 70, 75], 'oversold': [25, 30]}
+
+def test_expand_grid():
+    combinations = expand_grid(RSI_GRID)
+    assert len(combinations) == 12
+    assert combinations[0] == {'period': 7, 'overbought': 65, 'oversold': 25}
+    print("✅ Grid expanded to 12 combinations")
+
+def test_random_search_is_reproducible():
+    space = {'period': (5, 30), 'overbought': [65, 70, 75]}
+    first = sample_search_space(space, 10, seed=1)
+    second = sample_search_space(space, 10, seed=1)
+    assert first == second
+    assert all(5 <= p['period'] <= 30 and isinstance(p['period'], int) for p in first)
+    print(f"✅ Random search sampled {len(first)} combinations")
+
+def test_sweep_matches_individual_runs():
+    """Kết quả sweep phải giống hệt chạy riêng từng bộ tham số"""
+    data = generate_test_data(1500)
+    table = run_parameter_sweep('rsi', data, BASE_CONFIG, param_grid=RSI_GRID, workers=1)
+
+    assert len(table) == 12
+    assert list(table['rank']) == list(range(1, 13))
+    assert table['total_return'].is_monotonic_decreasing
+
+    for _, row in table.iterrows():
+        params = {k: row[k] for k in RSI_GRID}
+        strategy = RSIStrategy(build_strategy_config(BASE_CONFIG, 'rsi', params))
+        expected = strategy.run_backtest(data)['performance']
+        assert row['final_capital'] == expected['final_capital'], params
+        assert row['total_trades'] == expected['total_trades'], params
+    print("✅ Sweep results match individual backtests")
+
+def test_indicator_cache_shared():
+    """RSI của mọi period được tính một lần, trong một lượt batch"""
+    data = generate_test_data(500)
+    calls, batches = [], []
+    original, original_batch = RSIStrategy.calculate_rsi, rsi_strategy.rsi_batch
+
+    def counting_rsi(self, data):
+        calls.append(self.period)
+        return original(self, data)
+
+    def counting_batch(close, periods):
+        batches.append(list(periods))
+        return original_batch(close, periods)
+
+    RSIStrategy.calculate_rsi, rsi_strategy.rsi_batch = counting_rsi, counting_batch
+    try:
+        run_parameter_sweep('rsi', data, BASE_CONFIG, param_grid=RSI_GRID, workers=1)
+    finally:
+        RSIStrategy.calculate_rsi, rsi_strategy.rsi_batch = original, original_batch
+    assert calls == [] and batches == [[7, 14]], (calls, batches)
+    print("✅ RSI computed once per period")
+
+def test_process_pool_matches_serial():
+    data = generate_test_data(1000)
+    serial = run_parameter_sweep('rsi', data, BASE_CONFIG, param_grid=RSI_GRID, workers=1)
+    parallel = run_parameter_sweep('rsi', data, BASE_CONFIG, param_grid=RSI_GRID, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+    print("✅ Process pool results match serial sweep")
+
+def test_invalid_params_fall_back_with_warning():
+    """Bộ tham số lỗi: grid engine báo lỗi ra stderr, các bộ còn lại vẫn có kết quả"""
+    data = generate_test_data(500)
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+        table = run_parameter_sweep('rsi', data, BASE_CONFIG, param_grid={'period': [14, -1]}, workers=1)
+    assert 'grid engine failed' in stderr.getvalue()
+    errors = dict(zip(table['period'], table['error']))
+    assert errors[14] is None and 'window' in errors[-1]
+    print("✅ Invalid parameters reported after grid fallback")
+
+if __name__ == "__main__":
+    test_expand_grid()
+    test_random_search_is_reproducible()
+    test_sweep_matches_individual_runs()
+    test_indicator_cache_shared()
+    test_process_pool_matches_serial()
+    test_invalid_params_fall_back_with_warning()
+    print("\n✅ Parameter sweep tests completed successfully!")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test script cho patch_backtest_runner.main: load toàn bộ khoảng một lần, cắt patch theo vị trí
+"""
+
+import sys
+import os
+import io
+import json
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import patch_backtest_runner
+from patch_backtest_runner import (
+    generate_patches, slice_patch_data, slice_patch_with_warmup, warmup_start, patch_warmup_bars,
+    build_patch_strategy, run_patch_backtest_with_strategy
+)
+from test_array_backtest import generate_test_data
+from serialization import unpack_values
+
+CONFIG = {
+    'startDate': '2023-01-01T00:00:00',
+    'endDate': '2023-03-20T00:00:00',
+    'patchDays': 7,
+    'initialCapital': 10000,
+    'strategyType': 'macd',
+    'timeframe': '1h',
+    'prioritizeStoploss': True
+}
+
+def run_main(config: dict, data, *extra_args) -> tuple:
+    """
+    Chạy main với load_patch_data giả lập; trả về (output, danh sách các lần load).
+    Output ndjson trả về danh sách record theo từng dòng.
+    """
+    loads = []
+
+    def fake_load(start_date, end_date, *args):
+        loads.append((start_date, end_date))
+        return slice_patch_data(data, start_date, end_date)
+
+    original_load, original_argv = patch_backtest_runner.load_patch_data, sys.argv
+    patch_backtest_runner.load_patch_data = fake_load
+    sys.argv = ['patch_backtest_runner.py', '--experiment_id', 'test', '--config', json.dumps(config), *extra_args]
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            patch_backtest_runner.main()
+    finally:
+        patch_backtest_runner.load_patch_data, sys.argv = original_load, original_argv
+    if 'ndjson' in extra_args:
+        return [json.loads(line) for line in output.getvalue().splitlines()], loads
+    return json.loads(output.getvalue()), loads
+
+def test_full_range_loaded_once():
+    data = generate_test_data(2000)
+    results, loads = run_main(CONFIG, data)
+    assert results['success']
+    warmup = patch_warmup_bars(CONFIG)
+    assert warmup > 0 and loads == [(warmup_start(CONFIG['startDate'], '1h', warmup), CONFIG['endDate'])]
+
+    patches = generate_patches(CONFIG['startDate'], CONFIG['endDate'], CONFIG['patchDays'])
+    assert len(results['patches']) == len(patches)
+
+    # Giống hệt chạy từng patch riêng trên dữ liệu đã cắt (kèm warm-up), capital nối tiếp giữa các patch
+    capital = CONFIG['initialCapital']
+    for patch, result in zip(patches, results['patches']):
+        patch_data, patch_warmup = slice_patch_with_warmup(data, patch['startDate'], patch['endDate'], warmup)
+        expected = run_patch_backtest_with_strategy(patch_data, CONFIG, capital, warmup=patch_warmup)
+        assert result['finalCapital'] == expected['finalCapital'] and result['trades'] == expected['trades']
+        capital = expected['finalCapital']
+    assert results['results']['finalCapital'] == capital
+
+def test_timing_report():
+    results, _ = run_main(CONFIG, generate_test_data(2000))
+    timing = results['timing']
+    assert set(timing) == {'loadMs', 'patchesMs', 'workers', 'totalMs'} and timing['workers'] == 1
+    assert timing['totalMs'] >= timing['loadMs'] + timing['patchesMs'] - 1
+    for patch in results['patches']:
+        assert set(patch['timing']) == {'sliceMs', 'bars', 'warmupBars', 'backtestMs', 'indicatorsMs', 'totalMs'}
+        assert patch['timing']['bars'] == len(patch['indicators']['timestamps'])
+        assert patch['timing']['totalMs'] >= patch['timing']['backtestMs']
+
+def without_timing(results: dict) -> dict:
+    return {**results, 'timing': None, 'patches': [{**patch, 'timing': None} for patch in results['patches']]}
+
+def test_parallel_patches_identical_to_sequential():
+    data = generate_test_data(3000, seed=7)
+    for strategy_type in ['bollinger_bands', 'macd', 'stochastic']:
+        config = {**CONFIG, 'strategyType': strategy_type, 'endDate': '2023-05-01T00:00:00'}
+        sequential, _ = run_main(config, data)
+        parallel, _ = run_main(config, data, '--workers', '3')
+        assert parallel['timing']['workers'] == 3
+        assert sum(patch['totalTrades'] for patch in sequential['patches']) > 0
+        # Kết quả tổng hợp và từng patch giống hệt (bit-for-bit) chế độ tuần tự
+        assert parallel['results'] == sequential['results']
+        assert without_timing(parallel) == without_timing(sequential)
+
+def test_warmup_carries_indicators_across_patches():
+    # Dữ liệu bắt đầu trước startDate: cả patch đầu tiên cũng có warm-up
+    data = generate_test_data(2500)
+    config = {**CONFIG, 'startDate': '2023-01-10T00:00:00', 'endDate': '2023-04-01T00:00:00'}
+    for strategy_type in ['bollinger_bands', 'stochastic', 'williams_r', 'adx', 'vwap', 'macd']:
+        config['strategyType'] = strategy_type
+        results, _ = run_main(config, data)
+        strategy, _ = build_patch_strategy(config, 1.0)
+        full = strategy.generate_signals(data)
+        for patch in results['patches']:
+            assert patch['timing']['warmupBars'] == strategy.warmup_bars
+            times = pd.to_datetime(patch['indicators']['timestamps'], unit='ms')
+            for name, values in patch['indicators']['indicators'].items():
+                values = np.array(values, dtype=float)
+                # Không còn NaN ở đầu patch: indicator nối liền với phần trước ranh giới
+                assert not np.isnan(values).any(), (strategy_type, name)
+                column = {label: col for col, label in strategy.indicator_labels.items()}.get(name, name)
+                expected = full[column].reindex(times).to_numpy()
+                # Rolling: như tính trên toàn bộ lịch sử; EMA chỉ khác phần trọng số đã bị bỏ qua (~e^-10 của giá)
+                atol = 1e-6 * data['close'].max() if strategy_type == 'macd' else 1e-6
+                assert np.allclose(values, expected, rtol=1e-9, atol=atol), (strategy_type, name)
+        trades = [trade for patch in results['patches'] for trade in patch['trades']]
+        if strategy_type != 'macd':
+            # Lệnh vào đúng ở các bar có buy signal của phép tính toàn bộ lịch sử
+            entries = pd.to_datetime([trade['entry_time'] for trade in trades])
+            assert (full['signal'].reindex(entries) == 1).all(), strategy_type
+
+def test_ndjson_output_matches_json():
+    data = generate_test_data(3000, seed=3)
+    config = {**CONFIG, 'strategyType': 'stochastic', 'endDate': '2023-04-20T00:00:00'}
+    document, _ = run_main(config, data)
+    records, _ = run_main(config, data, '--output', 'ndjson', '--chunk_size', '40')
+    
+    # Summary trước, dòng 'end' cuối cùng
+    summary, end = records[0], records[-1]
+    assert summary['type'] == 'summary' and summary['success'] and summary['results'] == document['results']
+    assert end == {'type': 'end', 'records': len(records), 'success': True, 'experiment_id': 'test',
+                   'patches': len(document['patches']), 'trades': len(document['trades'])}
+    assert all(len(record['trades']) <= 40 for record in records if record['type'] == 'trades')
+    assert all(len(record['timestamps']) <= 40 for record in records if record['type'] == 'indicators')
+    
+    # Ghép các khối của từng patch lại giống hệt output json
+    for i, patch in enumerate(document['patches']):
+        assert {**summary['patches'][i], 'timing': None} == {k: v for k, v in without_timing(document)['patches'][i].items()
+                                                             if k not in ('trades', 'indicators')}
+        trades = [record for record in records if record['type'] == 'trades' and record['patch'] == i]
+        assert [record['offset'] for record in trades] == list(range(0, len(patch['trades']), 40))
+        assert [trade for record in trades for trade in record['trades']] == patch['trades']
+        blocks = [record for record in records if record['type'] == 'indicators' and record['patch'] == i]
+        assert [ts for record in blocks for ts in record['timestamps']] == patch['indicators']['timestamps']
+        assert [p for record in blocks for p in record['close_prices']] == patch['indicators']['close_prices']
+        for name, values in patch['indicators']['indicators'].items():
+            assert [v for record in blocks for v in record['indicators'][name]] == values
+    # Patch đầu không có warm-up (dữ liệu bắt đầu từ startDate): NaN được xuất thành null
+    assert document['patches'][0]['indicators']['indicators']['stoch_k'][0] is None
+    assert records[[r['type'] for r in records].index('indicators')]['indicators']['stoch_k'][0] is None
+
+def test_binary_chart_output():
+    data = generate_test_data(2000)
+    document, _ = run_main(CONFIG, data)
+    packed, _ = run_main(CONFIG, data, '--chart_format', 'float32')
+    assert packed['results'] == document['results'] and packed['trades'] == document['trades']
+    chart = packed['indicators']
+    assert unpack_values(chart['timestamps']).tolist() == document['indicators']['timestamps']
+    for name, values in document['indicators']['indicators'].items():
+        expected = np.array(values, dtype=float).astype(np.float32)
+        assert np.array_equal(unpack_values(chart['indicators'][name]), expected, equal_nan=True)
+
+def test_slice_by_position():
+    data = generate_test_data(500)
+    patch = slice_patch_data(data, '2023-01-02T00:00:00', '2023-01-03T00:00:00')
+    expected = data.loc[(data.index >= '2023-01-02') & (data.index <= '2023-01-03')]
+    assert patch.equals(expected) and len(patch) == 25
+
+if __name__ == "__main__":
+    test_full_range_loaded_once()
+    test_timing_report()
+    test_parallel_patches_identical_to_sequential()
+    test_warmup_carries_indicators_across_patches()
+    test_ndjson_output_matches_json()
+    test_binary_chart_output()
+    test_slice_by_position()
+    print("\n✅ Patch runner tests completed successfully!")
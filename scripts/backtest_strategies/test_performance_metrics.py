@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script cho vectorized performance metrics và LTTB downsampling
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import performance_metrics as pm
+from rsi_strategy import RSIStrategy
+from test_array_backtest import generate_test_data, make_config
+
+def random_equity(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 10000 * np.cumprod(1 + rng.normal(0, 0.01, n))
+
+def test_drawdown_matches_loop():
+    equity = random_equity(5000)
+    max_capital, max_drawdown = equity[0], 0
+    for value in equity:
+        max_capital = max(max_capital, value)
+        max_drawdown = max(max_drawdown, (max_capital - value) / max_capital)
+    assert pm.max_drawdown(equity) == max_drawdown
+
+def test_underwater_duration():
+    equity = np.array([100, 110, 105, 104, 111, 111, 90, 95, 112, 100], dtype=float)
+    assert pm.underwater_durations(equity).tolist() == [0, 0, 1, 2, 0, 0, 1, 2, 0, 1]
+    assert pm.max_drawdown_duration(equity) == 2
+    assert pm.max_drawdown_duration(np.array([100.0])) == 0
+
+def test_ratios():
+    equity = random_equity(3000, seed=1)
+    returns = pm.period_returns(equity)
+    expected = pd.Series(equity).pct_change().dropna()
+    assert pm.sharpe_ratio(returns) == np.sqrt(252) * (expected.mean() / expected.std())
+
+    downside = np.sqrt(np.mean(np.minimum(expected, 0) ** 2))
+    assert np.isclose(pm.sortino_ratio(returns), np.sqrt(252) * expected.mean() / downside)
+
+    annual = (equity[-1] / equity[0]) ** (252 / (len(equity) - 1)) - 1
+    assert np.isclose(pm.calmar_ratio(equity), annual / pm.max_drawdown(equity))
+
+    flat = np.full(10, 10000.0)
+    assert pm.sortino_ratio(pm.period_returns(flat)) == 0.0 and pm.calmar_ratio(flat) == 0.0
+    # Không có returns: mọi ratio là float 0.0
+    assert all(type(ratio(np.array([]))) is float for ratio in (pm.sharpe_ratio, pm.sortino_ratio))
+
+def test_lttb():
+    equity = random_equity(200000, seed=2)
+    start = time.perf_counter()
+    indices, values = pm.downsample_equity(equity, 1000)
+    elapsed = time.perf_counter() - start
+    assert len(indices) == 1000 and indices[0] == 0 and indices[-1] == len(equity) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert np.array_equal(values, equity[indices])
+    # Hình dạng đường cong được giữ: đỉnh/đáy toàn cục vẫn còn sau khi giảm điểm
+    assert np.argmax(equity) in indices and np.argmin(equity) in indices
+    short = np.arange(10, dtype=float)
+    assert pm.lttb_indices(short, 50).tolist() == list(range(10))
+    # Ít hơn 3 điểm (--equity_points 1/2): điểm cuối, rồi cả điểm đầu
+    assert pm.downsample_equity(short, 2)[0].tolist() == [0, 9]
+    assert pm.downsample_equity(short, 1)[0].tolist() == [9]
+    assert pm.downsample_equity(short, 0)[0].tolist() == []
+    print(f"✅ LTTB 200000 -> 1000 points in {elapsed * 1000:.1f} ms")
+
+def test_backtest_performance_keys():
+    data = generate_test_data(2000)
+    results = RSIStrategy(make_config({'prioritizeStoploss': True})).run_backtest(data)
+    equity = np.array(results['equity_curve'])
+    assert len(equity) == len(data)
+    performance = results['performance']
+    assert performance['max_drawdown'] == pm.max_drawdown(equity) * 100
+    assert performance['max_drawdown_duration'] == pm.max_drawdown_duration(equity)
+    for key in ['sortino_ratio', 'calmar_ratio']:
+        assert key in performance
+
+if __name__ == "__main__":
+    test_drawdown_matches_loop()
+    test_underwater_duration()
+    test_ratios()
+    test_lttb()
+    test_backtest_performance_keys()
+    print("\n✅ Performance metrics tests completed successfully!")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script cho portfolio backtest nhiều symbol
+"""
+
+import sys
+import os
+import time
+import pandas as pd
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from strategy_registry import STRATEGY_MAP, build_strategy_config
+from portfolio_backtest import align_panel, run_portfolio_backtest
+from market_data import ohlcv_table_name, split_symbol
+from test_array_backtest import generate_test_data, make_config, values_equal, RISK_VARIANTS, benchmark
+
+TRADE_FIELDS = ['entry_time', 'exit_time', 'entry_price', 'exit_price', 'size', 'pnl', 'pnl_pct',
+                'type', 'exit_reason', 'entry_fee', 'exit_fee']
+
+def make_frames(n_symbols: int, n_bars: int = 1500) -> dict:
+    return {f"SYM{k}USDT": generate_test_data(n_bars, seed=100 + k) for k in range(n_symbols)}
+
+def test_table_names():
+    assert ohlcv_table_name('BTCUSDT') == 'OHLCV_BTC_USDT_1m'
+    assert ohlcv_table_name('BTC') == 'OHLCV_BTC_USDT_1m'
+    assert ohlcv_table_name('eth/usdt') == 'OHLCV_ETH_USDT_1m'
+    assert ohlcv_table_name('SOL-USDC') == 'OHLCV_SOL_USDC_1m'
+    assert split_symbol('BNBBUSD') == ('BNB', 'BUSD')
+
+def test_single_symbol_matches_run_backtest():
+    """Portfolio 1 symbol phải cho cùng kết quả với run_backtest"""
+    print("Testing single-symbol portfolio parity...")
+    data = generate_test_data()
+    for strategy_type, strategy_class in STRATEGY_MAP.items():
+        for risk in RISK_VARIANTS:
+            config = build_strategy_config(make_config(risk), strategy_type, {})
+            single = strategy_class(config).run_backtest(data)
+            portfolio = run_portfolio_backtest(strategy_class(config), {'BTCUSDT': data})
+            label = f"{strategy_type} {risk}"
+
+            assert len(single['trades']) == len(portfolio['trades']), f"{label}: trade count differs"
+            for expected, actual in zip(single['trades'], portfolio['trades']):
+                assert actual['symbol'] == 'BTCUSDT'
+                for field in TRADE_FIELDS:
+                    assert values_equal(expected[field], actual[field]), f"{label}: trade field '{field}' differs"
+            assert single['equity_curve'] == portfolio['equity_curve'], f"{label}: equity differs"
+            for key, value in single['performance'].items():
+                assert values_equal(value, portfolio['performance'][key]), f"{label}: '{key}' differs"
+        print(f"  ✅ {strategy_type}")
+
+def test_signal_matrix_matches_per_symbol():
+    """signal_matrix (vector hóa theo cột) khớp với generate_signals của từng symbol"""
+    frames = make_frames(4)
+    panel = align_panel(frames)
+    for strategy_type, strategy_class in STRATEGY_MAP.items():
+        strategy = strategy_class(build_strategy_config(make_config({}), strategy_type, {}))
+        matrix = strategy.signal_matrix(panel)
+        assert matrix.shape == panel['close'].shape
+        for symbol, frame in frames.items():
+            expected = strategy.generate_signals(frame)['signal'].to_numpy()
+            assert (matrix[symbol].to_numpy() == expected).all(), f"{strategy_type} {symbol}: signals differ"
+
+def test_unaligned_symbols():
+    """Symbol thiếu bar: panel là NaN ở các bar đó và không có lệnh tại các bar đó"""
+    frames = make_frames(3, 800)
+    frames['SYM1USDT'] = frames['SYM1USDT'].iloc[100:]
+    frames['SYM2USDT'] = frames['SYM2USDT'].drop(frames['SYM2USDT'].index[300:350])
+    panel = align_panel(frames)
+    assert len(panel['close']) == 800
+    assert panel['close']['SYM1USDT'].iloc[:100].isna().all()
+
+    strategy = STRATEGY_MAP['rsi'](build_strategy_config(make_config({}), 'rsi', {'period': 7, 'overbought': 60, 'oversold': 40}))
+    results = run_portfolio_backtest(strategy, frames)
+    for trade in results['trades']:
+        frame = frames[trade['symbol']]
+        assert trade['entry_time'] in frame.index
+        if trade['exit_reason'] != 'end_of_backtest':
+            assert trade['exit_time'] in frame.index
+
+def test_signal_matrix_unaligned_matches_per_symbol():
+    """Symbol thiếu bar: mọi strategy (vector hóa hay không) tính trên bar hợp lệ của từng symbol"""
+    frames = make_frames(4, 800)
+    frames['SYM1USDT'] = frames['SYM1USDT'].iloc[100:]
+    frames['SYM2USDT'] = frames['SYM2USDT'].drop(frames['SYM2USDT'].index[300:350])
+    frames['SYM3USDT'] = frames['SYM3USDT'].drop(frames['SYM3USDT'].index[300:350])
+    panel = align_panel(frames)
+    for strategy_type, strategy_class in STRATEGY_MAP.items():
+        strategy = strategy_class(build_strategy_config(make_config({}), strategy_type, {}))
+        matrix = strategy.signal_matrix(panel)
+        assert matrix.shape == panel['close'].shape
+        for symbol, frame in frames.items():
+            expected = strategy.generate_signals(frame)['signal'].to_numpy()
+            assert np.array_equal(matrix[symbol].loc[frame.index].to_numpy(), expected), f"{strategy_type} {symbol}"
+            assert (matrix[symbol].drop(frame.index) == 0).all(), f"{strategy_type} {symbol}: signal on missing bar"
+
+def test_max_positions_and_allocation():
+    """Không vượt quá maxPositions và vốn được chia đều cho các slot còn trống"""
+    frames = make_frames(6)
+    config = build_strategy_config(make_config({'maxPositions': 3}), 'rsi', {'period': 7, 'overbought': 60, 'oversold': 40})
+    strategy = STRATEGY_MAP['rsi'](config)
+    results = run_portfolio_backtest(strategy, frames)
+    trades = results['trades']
+    assert len({t['symbol'] for t in trades}) > 1
+
+    # Đếm số lệnh mở tại mỗi thời điểm entry
+    for trade in trades:
+        open_positions = [t for t in trades if t['entry_time'] <= trade['entry_time'] < t['exit_time']]
+        assert len(open_positions) <= 3
+
+    # Lệnh đầu tiên nhận 1/3 vốn ban đầu
+    first = min(trades, key=lambda t: t['entry_time'])
+    assert abs(first['entry_price'] * first['size'] - 10000 / 3) < 1e-6
+    assert sum(s['total_trades'] for s in results['performance']['symbols'].values()) == len(trades)
+
+@benchmark
+def test_portfolio_speed():
+    """50 symbol trong một lần chạy phải nhanh hơn 50 backtest tuần tự"""
+    frames = make_frames(50, 2000)
+    config = build_strategy_config(make_config({'maxPositions': 10}), 'ma_crossover', {})
+
+    start = time.perf_counter()
+    run_portfolio_backtest(STRATEGY_MAP['ma_crossover'](config), frames)
+    portfolio_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames.values():
+        STRATEGY_MAP['ma_crossover'](config).run_backtest(frame)
+    sequential_time = time.perf_counter() - start
+
+    print(f"Portfolio: {portfolio_time:.3f}s, sequential: {sequential_time:.3f}s")
+    assert portfolio_time < sequential_time
+
+if __name__ == "__main__":
+    test_table_names()
+    test_single_symbol_matches_run_backtest()
+    test_signal_matrix_matches_per_symbol()
+    test_unaligned_symbols()
+    test_signal_matrix_unaligned_matches_per_symbol()
+    test_max_positions_and_allocation()
+    test_portfolio_speed()
+    print("\n✅ Portfolio backtest tests completed successfully!")
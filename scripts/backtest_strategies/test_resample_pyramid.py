@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script cho resample pyramid (gộp timeframe theo tầng)
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from market_data import resample_ohlcv
+from resample_pyramid import PYRAMID_LEVELS, resample_levels, aggregate_arrays, timeframe_nanos, nests
+
+def make_minutes(n: int, start: str = '2023-01-01 03:17', seed: int = 0) -> pd.DataFrame:
+    """Nến 1m có khoảng trống và giá trị NaN"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n, freq='1min', tz='UTC')
+    index = index[rng.random(n) > 0.1]
+    close = 100 + np.cumsum(rng.normal(0, 1, len(index)))
+    data = pd.DataFrame({'open': close + rng.normal(0, 0.1, len(index)), 'high': close + 1, 'low': close - 1,
+                         'close': close, 'volume': rng.uniform(0, 10, len(index))}, index=index)
+    data.index.name = 'open_time'
+    data.iloc[5:9, data.columns.get_loc('close')] = np.nan
+    data.iloc[1000:1100] = np.nan
+    return data
+
+def test_nesting():
+    assert nests('5m', '15m') and nests('15m', '1h') and nests('1h', '4h') and nests('4h', '1d')
+    assert nests('1d', '3d') and not nests('15m', '5m') and not nests('4h', '6h')
+    # 'W'/'M' đóng bên phải nên không ghép từ bar ngày
+    assert not nests('1d', '1w') and not nests('1h', '1M')
+    assert timeframe_nanos('1w') is None and timeframe_nanos('4h') == pd.Timedelta(hours=4).value
+
+def test_resample_levels_match_direct_resample():
+    data = make_minutes(200000)
+    timeframes = ['5m', '15m', '30m', '1h', '4h', '1d', '3d', '1w', '1M']
+    levels = resample_levels(data, timeframes)
+    for timeframe in timeframes:
+        # Volume chỉ khác ở sai số làm tròn do thứ tự cộng
+        pd.testing.assert_frame_equal(levels[timeframe], resample_ohlcv(data, timeframe), check_freq=False, rtol=1e-12)
+
+def test_aggregate_arrays_match_direct_resample():
+    data = make_minutes(50000, seed=1)
+    times = data.index.asi8
+    columns = {column: data[column].to_numpy() for column in data.columns}
+    for timeframe in PYRAMID_LEVELS:
+        bucket_times, bucket_columns = aggregate_arrays(times, columns, timeframe_nanos(timeframe))
+        frame = pd.DataFrame(bucket_columns, index=pd.DatetimeIndex(bucket_times, name='open_time').tz_localize('UTC'))
+        pd.testing.assert_frame_equal(frame.dropna(), resample_ohlcv(data, timeframe), check_freq=False, rtol=1e-12)
+    empty_times, empty_columns = aggregate_arrays(times[:0], {c: v[:0] for c, v in columns.items()}, 60)
+    assert len(empty_times) == 0 and len(empty_columns['close']) == 0
+
+if __name__ == "__main__":
+    test_nesting()
+    test_resample_levels_match_direct_resample()
+    test_aggregate_arrays_match_direct_resample()
+    print("\n✅ Resample pyramid tests completed successfully!")
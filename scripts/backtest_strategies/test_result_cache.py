@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script cho result cache của backtest_runner
+"""
+
+import sys
+import os
+import time
+import json
+import tempfile
+import threading
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import ResultCache, cache_key, is_cacheable
+from rsi_strategy import RSIStrategy
+from test_array_backtest import generate_test_data, make_config
+
+def make_backtest_config(**parameters) -> dict:
+    config = make_config({'prioritizeStoploss': True})
+    config['trading'].update({'startDate': '2023-01-01', 'endDate': '2023-03-01'})
+    config['strategy'] = {'type': 'rsi', 'parameters': {'period': 14, **parameters}}
+    return config
+
+def test_cache_key():
+    config = make_backtest_config()
+    reordered = {'strategy': config['strategy'], 'riskManagement': config['riskManagement'], 'trading': config['trading']}
+    assert cache_key(config) == cache_key(reordered)
+    assert cache_key(config) != cache_key(make_backtest_config(period=7))
+
+    changed_fee = make_backtest_config()
+    changed_fee['trading']['taker_fee'] = 0.05
+    assert cache_key(config) != cache_key(changed_fee)
+
+    assert is_cacheable(config)
+    open_range = make_backtest_config()
+    open_range['trading']['endDate'] = '2999-01-01'
+    assert not is_cacheable(open_range)
+
+def test_round_trip_and_counts():
+    """Kết quả backtest (có Timestamp, NaN) đọc lại giống hệt; hit/miss được cộng dồn"""
+    data = generate_test_data(1000)
+    config = make_backtest_config()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return RSIStrategy(config).run_backtest(data)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first, hit = ResultCache(cache_dir).get_or_compute(config, compute)
+        assert not hit
+
+        # Process mới (CLI chạy lại) vẫn thấy entry và bộ đếm
+        start = time.perf_counter()
+        second, hit = ResultCache(cache_dir).get_or_compute(config, compute)
+        elapsed = time.perf_counter() - start
+        assert hit and len(calls) == 1
+        assert second['equity_curve'] == first['equity_curve']
+        assert second['trades'][0]['entry_time'] == first['trades'][0]['entry_time']
+        for key, value in first['performance'].items():
+            assert value == second['performance'][key] or (np.isnan(value) and np.isnan(second['performance'][key]))
+
+        stats = ResultCache(cache_dir).stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+        print(f"✅ Cache hit in {elapsed * 1000:.1f} ms ({stats['bytes']} bytes)")
+
+def test_lru_eviction():
+    """Vượt max_bytes thì entry ít dùng gần đây nhất bị xóa"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(cache_dir, max_bytes=10 ** 9)
+        rng = np.random.default_rng(0)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, {'values': rng.random(2000)})
+            os.utime(cache._path(key), (1000 + i, 1000 + i))
+        entry_size = cache.stats()['bytes'] // 3
+
+        # Dùng 'a' -> 'b' trở thành entry cũ nhất
+        assert cache.get('a') is not None
+        cache.max_bytes = entry_size * 3
+        cache.put('d', {'values': rng.random(2000)})
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('d') is not None
+
+def test_corrupt_entry_is_a_miss():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(cache_dir)
+        with open(cache._path('broken'), 'wb') as f:
+            f.write(b'not a cache entry')
+        assert cache.get('broken') is None
+        assert not os.path.exists(cache._path('broken'))
+
+def test_stats_file_is_replaced_atomically():
+    """Worker đồng thời ghi bộ đếm: reader không bao giờ thấy stats.json ghi dở"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(cache_dir)
+        cache._record(hit=True)
+        done = threading.Event()
+        errors = []
+
+        def writer():
+            for i in range(300):
+                cache._record(hit=i % 2 == 0)
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not done.is_set():
+            try:
+                with open(cache._stats_path()) as f:
+                    json.load(f)
+            except ValueError as error:
+                errors.append(error)
+        thread.join()
+        assert not errors
+        assert cache.stats()['hits'] + cache.stats()['misses'] == 301
+        assert [name for name in os.listdir(cache_dir) if name.endswith('.tmp')] == []
+
+if __name__ == "__main__":
+    test_cache_key()
+    test_round_trip_and_counts()
+    test_lru_eviction()
+    test_corrupt_entry_is_a_miss()
+    test_stats_file_is_replaced_atomically()
+    print("\n✅ Result cache tests completed successfully!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script cho serializer dùng chung (NaN -> null theo cả mảng, epoch ms, chart nhị phân)
+"""
+
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from serialization import (
+    json_values, json_record, to_json_safe, dumps, epoch_millis, pack_values, unpack_values, chart_payload
+)
+
+def test_json_values():
+    assert json_values(np.array([1.5, np.nan, np.inf, -np.inf, 2.0])) == [1.5, None, None, None, 2.0]
+    assert json_values(np.array([3, 4], dtype=np.int64)) == [3, 4]
+    assert json_values([1.0, None, float('nan')]) == [1.0, None, None]
+    assert json_values(pd.Series([np.nan, 7.25])) == [None, 7.25]
+    trade = json_record({'entry_time': pd.Timestamp('2023-01-01 05:00'), 'pnl': np.float64('nan'), 'size': np.int64(2)})
+    assert trade == {'entry_time': '2023-01-01T05:00:00', 'pnl': None, 'size': 2}
+
+def test_to_json_safe_nested():
+    values = np.random.default_rng(0).normal(size=1000)
+    values[::7] = np.nan
+    obj = {
+        'series': values,
+        'list': values.tolist(),
+        'ints': [1, 2, 3],
+        'mixed': [1.0, None, 'x', {'time': pd.Timestamp('2023-01-02', tz='UTC'), 'value': np.float32(0.5)}],
+        'rows': [[1.0, np.nan], [2.0, 3.0]],
+        'flags': [True, False],
+        'dates': pd.DatetimeIndex(['2023-01-01', 'NaT'])
+    }
+    safe = to_json_safe(obj)
+    expected = [None if np.isnan(v) else float(v) for v in values]
+    assert safe['series'] == expected and safe['list'] == expected
+    assert safe['ints'] == [1, 2, 3] and safe['flags'] == [True, False]
+    assert safe['mixed'] == [1.0, None, 'x', {'time': '2023-01-02T00:00:00+00:00', 'value': 0.5}]
+    assert safe['rows'] == [[1.0, None], [2.0, 3.0]]
+    assert safe['dates'] == ['2023-01-01T00:00:00', None]
+    # JSON hợp lệ (không có NaN/Infinity) và đối tượng lạ thành string
+    text = dumps({**obj, 'other': object, 'inf': float('inf')})
+    assert 'NaN' not in text and json.loads(text)['inf'] is None
+
+def test_epoch_millis():
+    naive = pd.date_range('2023-01-01', periods=5, freq='1h')
+    assert epoch_millis(naive).tolist() == (naive.astype(np.int64) // 10**6).tolist()
+    aware = naive.tz_localize('Asia/Ho_Chi_Minh')
+    assert epoch_millis(aware).tolist() == (aware.tz_convert('UTC').tz_localize(None).astype(np.int64) // 10**6).tolist()
+    assert epoch_millis(pd.Series(naive.as_unit('s'))).tolist() == epoch_millis(naive).tolist()
+
+def test_binary_chart_payload():
+    close = np.array([1.5, np.nan, 3.25])
+    packed = pack_values(close)
+    assert packed['dtype'] == 'float32' and packed['length'] == 3
+    assert np.array_equal(unpack_values(packed), close.astype(np.float32), equal_nan=True)
+    indicators = {'timestamps': [1672531200000, 1672534800000, 1672538400000], 'close_prices': close,
+                  'indicators': {'rsi': [None, 40.0, 60.0]}}
+    payload = json.loads(json.dumps(chart_payload(indicators, 'float32')))
+    assert payload['format'] == 'float32'
+    assert unpack_values(payload['timestamps']).tolist() == indicators['timestamps']
+    assert np.isnan(unpack_values(payload['indicators']['rsi'])[0])
+    assert chart_payload(indicators) == {'timestamps': indicators['timestamps'], 'close_prices': [1.5, None, 3.25],
+                                         'indicators': {'rsi': [None, 40.0, 60.0]}}
+
+if __name__ == "__main__":
+    test_json_values()
+    test_to_json_safe_nested()
+    test_epoch_millis()
+    test_binary_chart_payload()
+    print("\n✅ Serialization tests completed successfully!")
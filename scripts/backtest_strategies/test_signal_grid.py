@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script cho signal matrix int8 của grid tham số và batched simulator
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicator_store import IndicatorStore
+from parameter_sweep import expand_grid, run_signal_grid
+from signal_grid import simulate_signals, level_cross_signals
+from strategy_registry import build_strategy_config, get_strategy_class
+from test_array_backtest import ALL_STRATEGIES, RISK_VARIANTS, generate_test_data, make_config, values_equal, benchmark
+
+GRIDS = {
+    'rsi': {'period': [7, 14], 'overbought': [65, 70], 'oversold': [25, 30, 35]},
+    'williams_r': {'period': [10, 14], 'overbought': [-20, -10], 'oversold': [-80, -90]},
+    'breakout': {'channelPeriod': [10, 20, 30], 'multiplier': [0.3, 0.5]},
+    'ma_crossover': {'fastPeriod': [5, 10], 'slowPeriod': [20, 30]},
+    'adx': {'adx_period': [10, 14], 'adx_threshold': [20, 25]},
+}
+
+def assert_same_performance(expected: dict, actual: dict, label):
+    assert list(expected) == list(actual), label
+    for key, value in expected.items():
+        assert values_equal(value, actual[key]), (label, key, value, actual[key])
+
+def test_signal_array_matches_generate_signals():
+    data = generate_test_data(1500)
+    for strategy_class in ALL_STRATEGIES:
+        strategy = strategy_class(make_config({}))
+        signal = strategy.signal_array(data)
+        assert signal.dtype == np.int8, strategy_class.__name__
+        assert np.array_equal(signal, strategy.generate_signals(data)['signal'].to_numpy()), strategy_class.__name__
+
+def test_level_cross_signals():
+    values = np.array([50, 20, 25, 40, 80, 90, 60, np.nan, 10, 75])
+    signals = level_cross_signals(values, [30, 50], [70, 85])
+    assert signals.dtype == np.int8 and signals.flags.f_contiguous
+    assert signals[:, 0].tolist() == [0, 1, 0, 0, -1, 0, 0, 0, 0, -1]
+    assert signals[:, 1].tolist() == [0, 1, 0, 0, 0, -1, 0, 0, 0, 0]
+
+def test_grid_matches_run_backtest():
+    """Mỗi cột của grid cho đúng performance của run_backtest với bộ tham số đó"""
+    data = generate_test_data(2000)
+    for risk in RISK_VARIANTS:
+        base_config = make_config(risk)
+        for strategy_type, grid in GRIDS.items():
+            combinations = expand_grid(grid)
+            signals, performances = run_signal_grid(strategy_type, data, base_config, combinations)
+            assert signals.shape == (len(data), len(combinations)) and signals.dtype == np.int8
+            for j, params in enumerate(combinations):
+                strategy = get_strategy_class(strategy_type)(build_strategy_config(base_config, strategy_type, params))
+                assert np.array_equal(signals[:, j], strategy.generate_signals(data)['signal'].to_numpy()), (strategy_type, params)
+                assert_same_performance(strategy.run_backtest(data)['performance'], performances[j],
+                                        (strategy_type, params, risk))
+
+def test_python_simulator_matches_jit():
+    data = generate_test_data(1500)
+    base_config = make_config(RISK_VARIANTS[2])
+    signals, performances = run_signal_grid('rsi', data, base_config, expand_grid(GRIDS['rsi']))
+    for j, params in enumerate(expand_grid(GRIDS['rsi'])):
+        strategy = get_strategy_class('rsi')(build_strategy_config(base_config, 'rsi', params))
+        python = simulate_signals(data['close'].to_numpy(), signals[:, j], strategy, use_jit=False)
+        assert_same_performance(performances[j], python, params)
+
+@benchmark
+def test_grid_speed():
+    data = generate_test_data(50000)
+    base_config = make_config(RISK_VARIANTS[1])
+    combinations = expand_grid({'period': [7, 14, 21], 'overbought': [65, 70, 75, 80], 'oversold': [20, 25, 30, 35]})
+    run_signal_grid('rsi', data[:500], base_config, combinations[:2])
+
+    start = time.perf_counter()
+    run_signal_grid('rsi', data, base_config, combinations)
+    grid_time = time.perf_counter() - start
+
+    strategy_class = get_strategy_class('rsi')
+    store = IndicatorStore(data)
+    start = time.perf_counter()
+    for params in combinations[:8]:
+        strategy = strategy_class(build_strategy_config(base_config, 'rsi', params))
+        strategy.indicator_store = store
+        strategy.run_backtest(data)
+    single_time = (time.perf_counter() - start) / 8
+    print(f"✅ Grid of {len(combinations)} RSI combinations costs {grid_time / single_time:.1f} single backtests")
+    assert grid_time < 0.5 * single_time * len(combinations)
+
+if __name__ == "__main__":
+    test_signal_array_matches_generate_signals()
+    test_level_cross_signals()
+    test_grid_matches_run_backtest()
+    test_python_simulator_matches_jit()
+    test_grid_speed()
+    print("\n✅ Signal grid tests completed successfully!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script cho kernel signal trên mảng (crosses_above/crosses_below, shift) và signal int8
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from signal_kernels import crosses_above, crosses_below, shift, signal_column
+from test_array_backtest import ALL_STRATEGIES, generate_test_data, make_config
+
+def test_crosses_match_pandas():
+    """Cùng kết quả với chuỗi so sánh Series + shift(1), kể cả NaN và bar đầu"""
+    rng = np.random.default_rng(3)
+    a = pd.Series(rng.normal(size=500).round(1))
+    b = pd.Series(rng.normal(size=500).round(1))
+    a[[10, 11, 200]] = np.nan
+    b[[50, 300]] = np.nan
+
+    above = (a > b) & (a.shift(1) <= b.shift(1))
+    below = (a < b) & (a.shift(1) >= b.shift(1))
+    assert np.array_equal(crosses_above(a, b), above.to_numpy())
+    assert np.array_equal(crosses_below(a, b), below.to_numpy())
+    assert np.array_equal(crosses_above(a, 0.5), ((a > 0.5) & (a.shift(1) <= 0.5)).to_numpy())
+    assert np.array_equal(crosses_below(a, 0.5), ((a < 0.5) & (a.shift(1) >= 0.5)).to_numpy())
+
+    # Frame bars × symbols: mỗi cột độc lập, ngưỡng theo cột broadcast
+    frame = pd.DataFrame({'x': a, 'y': b})
+    expected = (frame > [0.0, 0.2]) & (frame.shift(1) <= [0.0, 0.2])
+    assert np.array_equal(crosses_above(frame, np.array([[0.0, 0.2]])), expected.to_numpy())
+    assert crosses_above(np.array([]), 0.0).shape == (0,)
+
+def test_shift():
+    values = pd.Series([1.0, 2.0, np.nan, 4.0])
+    for periods in [0, 1, 3, 10]:
+        assert np.array_equal(shift(values, periods), values.shift(periods).to_numpy(), equal_nan=True)
+
+def test_signals_are_int8():
+    data = generate_test_data(1500)
+    panel = {field: pd.DataFrame({s: generate_test_data(500, s)[field].to_numpy() for s in range(3)})
+             for field in ['open', 'high', 'low', 'close', 'volume']}
+    assert signal_column(np.array([True, False, True]), np.array([False, False, True])).tolist() == [1, 0, -1]
+    for strategy_class in ALL_STRATEGIES:
+        strategy = strategy_class(make_config({}))
+        assert strategy.generate_signals(data)['signal'].dtype == np.int8, strategy_class.__name__
+        assert (strategy.signal_matrix(panel).dtypes == np.int8).all(), strategy_class.__name__
+
+if __name__ == "__main__":
+    test_crosses_match_pandas()
+    test_shift()
+    test_signals_are_int8()
+    print("\n✅ Signal kernel tests completed successfully!")
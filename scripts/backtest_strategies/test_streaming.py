@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Parity test: update(bar) streaming signals phải khớp với generate_signals (batch)
+trên sample dataset, và các primitive streaming phải khớp với pandas rolling/ewm.
+"""
+
+import sys
+import os
+import time
+import pandas as pd
+import numpy as np
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from strategy_registry import STRATEGY_MAP, build_strategy_config
+from streaming_indicators import RollingSum, RollingMean, RollingStd, RollingMax, RollingMin, EMA, WilderSmoothing, ParabolicSAR
+from parabolic_sar_strategy import ParabolicSARStrategy
+
+SAMPLE_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', '..', 'data', 'sample_datasets', 'crypto_price_data.csv')
+
+# Các bộ tham số bổ sung (ngoài mặc định) để phủ thêm nhánh signal
+PARAMETER_SETS = {
+    'ma_crossover': [{'fastPeriod': 5, 'slowPeriod': 50}],
+    'rsi': [{'period': 7, 'overbought': 65, 'oversold': 35}],
+    'macd': [{'fastEMA': 5, 'slowEMA': 35, 'signalPeriod': 5}],
+    'bollinger_bands': [{'period': 10, 'stdDev': 1.5}],
+    'breakout': [{'channelPeriod': 10, 'multiplier': 0.4}],
+    'stochastic': [{'k_period': 5, 'smooth_k': 1, 'd_period': 3, 'overbought': 70, 'oversold': 30}],
+    'williams_r': [{'period': 7}],
+    'adx': [{'adx_period': 7, 'di_period': 10, 'adx_threshold': 20, 'trend_strength': 20},
+            {'adx_period': 7, 'di_period': 10, 'adx_threshold': 20, 'trend_strength': 20, 'smoothing': 'wilder'}],
+    'ichimoku': [{'tenkan_period': 5, 'kijun_period': 15, 'senkou_span_b_period': 30, 'displacement': 10}],
+    'parabolic_sar': [{'acceleration': 0.05, 'maximum': 0.3}],
+    'keltner_channel': [{'ema_period': 10, 'atr_period': 5, 'multiplier': 1.0}],
+    'vwap': [{'vwap_period': 10, 'std_dev_multiplier': 1.0, 'volume_threshold': 1.2}],
+    'ensemble': [{'method': 'weighted', 'threshold': 0.3, 'holdBars': 5, 'members': [
+        {'type': 'rsi', 'parameters': {'period': 7, 'overbought': 60, 'oversold': 40}},
+        {'type': 'stochastic', 'weight': 2},
+        {'type': 'ichimoku', 'parameters': {'displacement': 10}},
+        {'type': 'adx', 'role': 'filter', 'parameters': {'smoothing': 'wilder'}}]}],
+}
+
+BASE_CONFIG = {
+    'trading': {'symbol': 'BTCUSDT', 'timeframe': '1h', 'initialCapital': 10000, 'positionSize': 1.0},
+    'riskManagement': {},
+    'strategy': {'parameters': {}}
+}
+
+def load_sample_data(n_bars: int = None) -> pd.DataFrame:
+    """Load OHLCV columns of the sample dataset"""
+    df = pd.read_csv(SAMPLE_DATASET, parse_dates=['timestamp']).set_index('timestamp')
+    df = df[['open', 'high', 'low', 'close', 'volume']]
+    return df if n_bars is None else df.iloc[:n_bars]
+
+def assert_same_floats(expected, actual, label: str):
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    same = (expected == actual) | (np.isnan(expected) & np.isnan(actual))
+    assert same.all(), f"{label}: first mismatch at {np.flatnonzero(~same)[:5]}"
+
+def test_streaming_signals_match_batch():
+    """Streaming signals giống hệt cột 'signal' của generate_signals"""
+    print("Testing streaming parity on sample dataset...")
+    full_data = load_sample_data()
+    short_data = full_data.iloc[:4000]
+
+    for strategy_type, strategy_class in STRATEGY_MAP.items():
+        runs = [({}, full_data)] + [(params, short_data) for params in PARAMETER_SETS[strategy_type]]
+        for params, data in runs:
+            strategy = strategy_class(build_strategy_config(BASE_CONFIG, strategy_type, params))
+            batch = strategy.generate_signals(data)['signal'].to_numpy()
+            stream = strategy.stream_signals(data).to_numpy()
+            mismatches = np.flatnonzero(batch != stream)
+            assert len(mismatches) == 0, f"{strategy_type} {params}: mismatch at bars {mismatches[:5]}"
+            print(f"  ✅ {strategy_type} {params}: {int((batch != 0).sum())} signals")
+
+def test_update_is_incremental():
+    """update() từng bar cho cùng signal với stream_signals và reset_stream khởi tạo lại trạng thái"""
+    data = load_sample_data(500)
+    strategy = STRATEGY_MAP['rsi'](build_strategy_config(BASE_CONFIG, 'rsi', {'period': 7, 'overbought': 65, 'oversold': 35}))
+    expected = strategy.stream_signals(data).tolist()
+
+    strategy.reset_stream()
+    signals = [strategy.update(bar) for bar in data.to_dict(orient='records')]
+    assert signals == expected
+
+    start = time.perf_counter()
+    strategy.reset_stream()
+    for bar in data.to_dict(orient='records'):
+        strategy.update(bar)
+    per_bar = (time.perf_counter() - start) / len(data)
+    print(f"✅ update(): {per_bar * 1e6:.1f} µs per bar")
+
+def test_ichimoku_signal_lag():
+    """Ichimoku dùng chikou (nhìn trước), update() trả signal của bar cách displacement bar"""
+    strategy = STRATEGY_MAP['ichimoku'](build_strategy_config(BASE_CONFIG, 'ichimoku', {'displacement': 10}))
+    assert strategy.signal_lag == 10
+    data = load_sample_data(2000)
+    batch = strategy.generate_signals(data)['signal'].to_numpy()
+    strategy.reset_stream()
+    signals = [strategy.update(bar) for bar in data.to_dict(orient='records')]
+    assert signals[:10] == [0] * 10
+    assert signals[10:] == batch[:-10].tolist()
+
+def _primitive_input(n: int = 3000, seed: int = 7) -> np.ndarray:
+    """Random walk có NaN, inf, số âm và các đoạn hằng số"""
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.normal(0, 1, n)) - 5
+    values[100:140] = 3.25
+    values[rng.choice(n, 40, replace=False)] = np.nan
+    values[rng.choice(n, 5, replace=False)] = np.inf
+    values[500:520] = np.nan
+    return values
+
+def test_rolling_primitives_match_pandas():
+    values = _primitive_input()
+    series = pd.Series(values)
+    for window in [1, 2, 5, 20]:
+        cases = [
+            (RollingSum, series.rolling(window).sum()),
+            (RollingMean, series.rolling(window).mean()),
+            (RollingStd, series.rolling(window).std()),
+            (RollingMax, series.rolling(window).max()),
+            (RollingMin, series.rolling(window).min()),
+        ]
+        for primitive_class, expected in cases:
+            primitive = primitive_class(window)
+            actual = [primitive.update(value) for value in values]
+            assert_same_floats(expected, actual, f"{primitive_class.__name__}({window})")
+    print("✅ Rolling primitives match pandas")
+
+def test_ema_matches_pandas():
+    values = _primitive_input()
+    values[np.isinf(values)] = np.nan
+    series = pd.Series(values)
+    for span in [3, 12, 26]:
+        for adjust in [True, False]:
+            ema = EMA(span, adjust=adjust)
+            actual = [ema.update(value) for value in values]
+            assert_same_floats(series.ewm(span=span, adjust=adjust).mean(), actual, f"EMA({span}, {adjust})")
+    print("✅ EMA matches pandas")
+
+def test_wilder_smoothing():
+    values = np.arange(1, 11, dtype=float)
+    smoothing = WilderSmoothing(4)
+    actual = [smoothing.update(value) for value in values]
+    assert np.isnan(actual[:3]).all()
+    expected = 2.5
+    assert actual[3] == expected
+    for value, result in zip(values[4:], actual[4:]):
+        expected = expected + (value - expected) / 4
+        assert result == expected
+
+def test_parabolic_sar_matches_batch():
+    data = load_sample_data(3000)
+    strategy = ParabolicSARStrategy(build_strategy_config(BASE_CONFIG, 'parabolic_sar', {}))
+    sar, trend = strategy.calculate_parabolic_sar(data)
+    recursion = ParabolicSAR(strategy.acceleration, strategy.maximum)
+    actual = [recursion.update(h, l, c) for h, l, c in zip(data['high'], data['low'], data['close'])]
+    assert_same_floats(sar, [s for s, _ in actual], 'sar')
+    assert_same_floats(trend, [t for _, t in actual], 'trend')
+
+if __name__ == "__main__":
+    test_streaming_signals_match_batch()
+    test_update_is_incremental()
+    test_ichimoku_signal_lag()
+    test_rolling_primitives_match_pandas()
+    test_ema_matches_pandas()
+    test_wilder_smoothing()
+    test_parabolic_sar_matches_batch()
+    print("\n✅ Streaming tests completed successfully!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script cho walk-forward optimization
+"""
+
+import sys
+import os
+import pandas as pd
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from walk_forward import build_walk_forward_windows, run_walk_forward
+from parameter_sweep import run_parameter_sweep
+from patch_backtest_runner import generate_patches, slice_patch_data, build_patch_strategy_config
+from test_array_backtest import generate_test_data
+
+CONFIG = {
+    'startDate': '2023-01-01T00:00:00',
+    'endDate': '2023-03-20T00:00:00',
+    'patchDays': 10,
+    'initialCapital': 10000,
+    'strategyType': 'rsi',
+    'prioritizeStoploss': True,
+    'useTakeProfit': False
+}
+
+GRID = {'period': [7, 14], 'oversold': [30, 40], 'overbought': [60, 70]}
+
+def test_windows():
+    patches = generate_patches(CONFIG['startDate'], CONFIG['endDate'], 10)
+    windows = build_walk_forward_windows(CONFIG['startDate'], CONFIG['endDate'], 10, in_sample_patches=3)
+    assert len(windows) == len(patches) - 3
+    assert windows[0]['inSampleStart'] == patches[0]['startDate']
+    assert windows[0]['inSampleEnd'] == patches[2]['endDate']
+    assert windows[0]['outOfSampleStart'] == patches[3]['startDate']
+    assert windows[1]['inSampleStart'] == patches[1]['startDate']
+
+    anchored = build_walk_forward_windows(CONFIG['startDate'], CONFIG['endDate'], 10, in_sample_patches=3, anchored=True)
+    assert all(w['inSampleStart'] == patches[0]['startDate'] for w in anchored)
+
+def test_slice_patch_data():
+    data = generate_test_data(100)
+    patch = slice_patch_data(data, '2023-01-01T10:00:00', '2023-01-02T10:00:00+00:00')
+    assert patch.index[0] == pd.Timestamp('2023-01-01 10:00') and patch.index[-1] == pd.Timestamp('2023-01-02 10:00')
+    utc_data = data.tz_localize('UTC')
+    assert len(slice_patch_data(utc_data, '2023-01-01T10:00:00', '2023-01-02T10:00:00')) == len(patch)
+
+def test_walk_forward_chains_capital():
+    """Vốn cuối patch out-of-sample trước là vốn đầu patch sau; tham số là best in-sample"""
+    data = generate_test_data(2000)
+    results = run_walk_forward(data, CONFIG, param_grid=GRID, in_sample_patches=3, workers=1)
+    patches = results['patches']
+    assert len(patches) > 1
+    assert patches[0]['initialCapital'] == CONFIG['initialCapital']
+    for previous, current in zip(patches, patches[1:]):
+        assert current['initialCapital'] == previous['finalCapital']
+    assert results['results']['finalCapital'] == patches[-1]['finalCapital']
+    assert results['results']['totalTrades'] == len(results['trades'])
+
+    # Bộ tham số của cửa sổ đầu khớp với sweep chạy trực tiếp trên dữ liệu in-sample
+    window = results['windows'][0]
+    in_sample = slice_patch_data(data, window['inSampleStart'], window['inSampleEnd'])
+    base_config = build_patch_strategy_config(CONFIG, CONFIG['initialCapital'])
+    table = run_parameter_sweep('rsi', in_sample, base_config, param_grid=GRID, workers=1)
+    best = table.iloc[0]
+    assert window['params'] == {name: best[name].item() for name in GRID}
+    print(f"✅ Walk-forward: {len(patches)} out-of-sample patches, final capital {patches[-1]['finalCapital']:.2f}")
+
+def test_parallel_matches_serial():
+    data = generate_test_data(2000)
+    serial = run_walk_forward(data, CONFIG, param_grid=GRID, workers=1)
+    parallel = run_walk_forward(data, CONFIG, param_grid=GRID, workers=2)
+    assert [w['params'] for w in serial['windows']] == [w['params'] for w in parallel['windows']]
+    assert serial['results'] == parallel['results']
+
+if __name__ == "__main__":
+    test_windows()
+    test_slice_patch_data()
+    test_walk_forward_chains_capital()
+    test_parallel_matches_serial()
+    print("\n✅ Walk-forward tests completed successfully!")
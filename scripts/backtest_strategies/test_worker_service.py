@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script cho worker_service: output giống hệt chạy CLI, pool giới hạn số job
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+import http.client
+from concurrent.futures import Future
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import patch_backtest_runner
+from patch_backtest_runner import slice_patch_data
+from worker_service import WorkerService, serve, runner_argv
+from test_patch_runner import CONFIG, run_main, without_timing
+from test_array_backtest import generate_test_data
+
+def request(port: int, method: str, path: str, body: dict = None) -> tuple:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    connection.request(method, path, json.dumps(body) if body is not None else None,
+                       {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    result = response.status, dict(response.getheaders()), response.read().decode('utf-8')
+    connection.close()
+    return result
+
+def test_runner_argv():
+    argv = runner_argv({'experiment_id': 'exp', 'config': {'a': 1},
+                        'options': {'output': 'ndjson', 'no_cache': True, 'workers': 2, 'chart_decimation': None}})
+    assert argv == ['--experiment_id', 'exp', '--config', '{"a": 1}', '--output', 'ndjson',
+                    '--no_cache', '--workers', '2']
+
+def test_service_matches_cli():
+    data = generate_test_data(2000)
+    expected, _ = run_main(CONFIG, data)
+    expected_ndjson, _ = run_main(CONFIG, data, '--output', 'ndjson', '--chunk_size', '100')
+
+    # Worker process được fork sau khi load_patch_data đã được thay bằng bản giả lập
+    original_load = patch_backtest_runner.load_patch_data
+    patch_backtest_runner.load_patch_data = lambda start, end, *args: slice_patch_data(data, start, end)
+    try:
+        service = WorkerService(workers=2, max_pending=2).start()
+    finally:
+        patch_backtest_runner.load_patch_data = original_load
+    server = serve(service, port=0)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status, headers, body = request(port, 'POST', '/patch-backtest', {'experiment_id': 'test', 'config': CONFIG})
+        assert status == 200 and headers['X-Exit-Code'] == '0'
+        assert without_timing(json.loads(body)) == without_timing(expected)
+
+        status, headers, body = request(port, 'POST', '/patch-backtest', {
+            'experiment_id': 'test', 'config': CONFIG, 'options': {'output': 'ndjson', 'chunk_size': 100}})
+        assert status == 200 and headers['Content-Type'] == 'application/x-ndjson'
+        records = [json.loads(line) for line in body.splitlines()]
+        assert [r['type'] for r in records] == [r['type'] for r in expected_ndjson]
+        assert records[-1] == expected_ndjson[-1]
+
+        # Lỗi của runner: cùng JSON lỗi như CLI, exit code 1
+        status, headers, body = request(port, 'POST', '/patch-backtest', {'experiment_id': 'bad', 'config': '{'})
+        assert status == 500 and headers['X-Exit-Code'] == '1' and json.loads(body)['success'] is False
+
+        assert request(port, 'POST', '/unknown', {'experiment_id': 'x', 'config': {}})[0] == 404
+        assert request(port, 'POST', '/backtest', {'config': {}})[0] == 400
+        status, _, body = request(port, 'GET', '/health')
+        assert status == 200 and json.loads(body)['completed'] == 3 and json.loads(body)['pending'] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+def test_bounded_pending():
+    release = threading.Event()
+
+    class BlockingExecutor:
+        # Executor giả: job chỉ xong khi release được set
+        def submit(self, *args):
+            future = Future()
+            threading.Thread(target=lambda: (release.wait(10), future.set_result((0, '')))).start()
+            return future
+
+    service = WorkerService(workers=1, max_pending=1)
+    service._executor = BlockingExecutor()
+    first = threading.Thread(target=service.run, args=('backtest', {'experiment_id': 'a', 'config': {}}))
+    first.start()
+    while service.stats()['pending'] == 0:
+        time.sleep(0.01)
+    try:
+        service.run('backtest', {'experiment_id': 'b', 'config': {}})
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+    release.set()
+    first.join()
+    assert service.stats()['pending'] == 0 and service.stats()['completed'] == 1
+    assert service.run('backtest', {'experiment_id': 'c', 'config': {}}) == (0, '')
+
+if __name__ == "__main__":
+    test_runner_argv()
+    test_service_matches_cli()
+    test_bounded_pending()
+    print("\n✅ Worker service tests completed successfully!")
@@ -1,8 +1,13 @@
+import math
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import NaN, RollingMean, RollingSum, divide
+from signal_kernels import signal_column, as_array, shift
 
 class VWAPStrategy(BaseStrategy):
+    indicator_columns = ['vwap', 'vwap_upper', 'vwap_lower', 'vwap_std']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -12,20 +17,28 @@ class VWAPStrategy(BaseStrategy):
         self.confirmation_periods = int(self.strategy_config.get('confirmation_periods', 2))
         self.volume_threshold = float(self.strategy_config.get('volume_threshold', 1.5))
     
+    @property
+    def warmup_bars(self) -> int:
+        # Variance là rolling sum của độ lệch so với VWAP rolling: hai window nối tiếp
+        return max(2 * (self.vwap_period - 1), 1)
+
     def calculate_vwap(self, data):
         """Calculate VWAP and standard deviation bands"""
+        store = self.indicators(data)
+        volume_sum = store.rolling_sum('volume', self.vwap_period)
+        
         # Calculate VWAP
-        typical_price = (data['high'] + data['low'] + data['close']) / 3
+        typical_price = store.typical_price()
         volume_price = typical_price * data['volume']
         
         # Rolling VWAP
-        vwap = volume_price.rolling(window=self.vwap_period).sum() / data['volume'].rolling(window=self.vwap_period).sum()
+        vwap = volume_price.rolling(window=self.vwap_period).sum() / volume_sum
         
         # Calculate standard deviation
         price_diff = typical_price - vwap
         squared_diff = price_diff ** 2
         weighted_squared_diff = squared_diff * data['volume']
-        variance = weighted_squared_diff.rolling(window=self.vwap_period).sum() / data['volume'].rolling(window=self.vwap_period).sum()
+        variance = weighted_squared_diff.rolling(window=self.vwap_period).sum() / volume_sum
         std_dev = np.sqrt(variance)
         
         # Calculate bands
@@ -39,37 +52,91 @@ class VWAPStrategy(BaseStrategy):
         signals = data.copy()
         
         # Calculate VWAP
-        vwap, upper_band, lower_band, std_dev = self.calculate_vwap(data)
+        vwap, upper_band, lower_band, std_dev = self.cached_indicator(
+            data, ('vwap', self.vwap_period, self.std_dev_multiplier),
+            lambda: self.calculate_vwap(data)
+        )
         signals['vwap'] = vwap
         signals['vwap_upper'] = upper_band
         signals['vwap_lower'] = lower_band
         signals['vwap_std'] = std_dev
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(data['close'], data['volume'], vwap, upper_band, lower_band))
         
+        return signals
+    
+    def signal_array(self, data):
+        vwap, upper_band, lower_band, _ = self.cached_indicator(
+            data, ('vwap', self.vwap_period, self.std_dev_multiplier),
+            lambda: self.calculate_vwap(data)
+        )
+        return signal_column(*self.signal_rules(data['close'], data['volume'], vwap, upper_band, lower_band))
+    
+    def signal_rules(self, close, volume, vwap, upper_band, lower_band):
+        """Buy/sell masks; close/volume là Series hoặc frame bars × symbols"""
         # Calculate volume ratio (current volume vs average volume)
-        avg_volume = data['volume'].rolling(window=self.vwap_period).mean()
-        volume_ratio = data['volume'] / avg_volume
+        avg_volume = volume.rolling(window=self.vwap_period).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_ratio = as_array(volume) / as_array(avg_volume)
+        close, vwap = as_array(close), as_array(vwap)
+        upper_band, lower_band = as_array(upper_band), as_array(lower_band)
+        prev_close = shift(close)
         
         # Generate buy signals
         # Buy when price is below VWAP, near lower band, with high volume
         buy_condition = (
-            (data['close'] < vwap) & 
-            (data['close'] >= lower_band) & 
+            (close < vwap) & 
+            (close >= lower_band) & 
             (volume_ratio > self.volume_threshold) &
-            (data['close'] > data['close'].shift(1))
+            (close > prev_close)
         )
-        signals.loc[buy_condition, 'signal'] = 1
         
         # Generate sell signals
         # Sell when price is above VWAP, near upper band, with high volume
         sell_condition = (
-            (data['close'] > vwap) & 
-            (data['close'] <= upper_band) & 
+            (close > vwap) & 
+            (close <= upper_band) & 
             (volume_ratio > self.volume_threshold) &
-            (data['close'] < data['close'].shift(1))
+            (close < prev_close)
         )
-        signals.loc[sell_condition, 'signal'] = -1
+        return buy_condition, sell_condition
+    
+    def panel_signals(self, panel):
+        """Vectorized VWAP signals for a bars × symbols panel"""
+        vwap, upper_band, lower_band, _ = self.calculate_vwap(panel)
+        return self.combine_signals(panel['close'], *self.signal_rules(panel['close'], panel['volume'], vwap, upper_band, lower_band))
+    
+    def _init_stream(self):
+        self._volume_price_sum = RollingSum(self.vwap_period)
+        self._volume_sum = RollingSum(self.vwap_period)
+        self._weighted_squared_diff_sum = RollingSum(self.vwap_period)
+        self._avg_volume = RollingMean(self.vwap_period)
+        self._prev_close = NaN
+    
+    def _on_bar(self, bar):
+        """Incremental VWAP signal for one bar"""
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        volume = float(bar['volume'])
         
-        return signals
+        typical_price = (high + low + close) / 3
+        volume_sum = self._volume_sum.update(volume)
+        vwap = divide(self._volume_price_sum.update(typical_price * volume), volume_sum)
+        
+        price_diff = typical_price - vwap
+        variance = divide(self._weighted_squared_diff_sum.update(price_diff * price_diff * volume), volume_sum)
+        std_dev = math.sqrt(variance) if variance >= 0 else NaN
+        upper_band = vwap + (self.std_dev_multiplier * std_dev)
+        lower_band = vwap - (self.std_dev_multiplier * std_dev)
+        
+        volume_ratio = divide(volume, self._avg_volume.update(volume))
+        prev_close, self._prev_close = self._prev_close, close
+        
+        signal = 0
+        if (close < vwap and close >= lower_band and volume_ratio > self.volume_threshold
+                and close > prev_close):
+            signal = 1
+        if (close > vwap and close <= upper_band and volume_ratio > self.volume_threshold
+                and close < prev_close):
+            signal = -1
+        return signal
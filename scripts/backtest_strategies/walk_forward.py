@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Walk-Forward Optimization dựa trên các patch của patch_backtest_runner.
+Mỗi cửa sổ in-sample (k patch liên tiếp) chạy parameter sweep để chọn bộ tham
+số tốt nhất, sau đó bộ tham số đó được đánh giá trên patch out-of-sample kế tiếp.
+Các lần tối ưu in-sample độc lập nhau nên chạy song song; phần out-of-sample
+chạy tuần tự vì vốn cuối patch trước là vốn đầu patch sau.
+"""
+
+import pandas as pd
+import json
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from parameter_sweep import run_parameter_sweep
+from patch_backtest_runner import (
+    generate_patches, slice_patch_data, slice_patch_with_warmup, load_patch_data, build_patch_strategy_config,
+    patch_warmup_bars, run_patch_backtest_with_strategy, aggregate_patch_results
+)
+from serialization import to_json_safe
+
+def build_walk_forward_windows(start_date: str, end_date: str, patch_days: int,
+                               in_sample_patches: int = 3, anchored: bool = False) -> List[Dict[str, str]]:
+    """
+    Build (in-sample, out-of-sample) windows from generate_patches.
+    anchored=True giữ điểm bắt đầu in-sample cố định (cửa sổ mở rộng dần).
+    """
+    if in_sample_patches < 1:
+        raise ValueError("in_sample_patches must be at least 1")
+    patches = generate_patches(start_date, end_date, patch_days)
+    windows = []
+    for t in range(in_sample_patches, len(patches)):
+        first = 0 if anchored else t - in_sample_patches
+        windows.append({
+            'inSampleStart': patches[first]['startDate'],
+            'inSampleEnd': patches[t - 1]['endDate'],
+            'outOfSampleStart': patches[t]['startDate'],
+            'outOfSampleEnd': patches[t]['endDate']
+        })
+    return windows
+
+def _optimize_window(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Chạy parameter sweep trên dữ liệu in-sample của một cửa sổ"""
+    table = run_parameter_sweep(
+        job['strategy_type'], job['data'], job['base_config'],
+        param_grid=job['param_grid'],
+        search_space=job['search_space'],
+        n_iter=job['n_iter'],
+        seed=job['seed'],
+        workers=1,
+        rank_by=job['rank_by']
+    )
+    valid = table[table['error'].isna()] if 'error' in table.columns else table
+    if valid.empty:
+        return {'params': None, 'in_sample': {}}
+    best = valid.iloc[0]
+    params = {name: _to_python(best[name]) for name in job['param_names']}
+    in_sample = {key: _to_python(best[key]) for key in ['total_return', 'sharpe_ratio', 'max_drawdown', 'total_trades']
+                 if key in best.index}
+    return {'params': params, 'in_sample': in_sample}
+
+def _to_python(value):
+    return value.item() if hasattr(value, 'item') else value
+
+def run_walk_forward(data: pd.DataFrame, config: Dict[str, Any],
+                     param_grid: Optional[Dict[str, List[Any]]] = None,
+                     search_space: Optional[Dict[str, Any]] = None,
+                     n_iter: int = 50, seed: Optional[int] = None,
+                     in_sample_patches: int = 3, anchored: bool = False,
+                     workers: Optional[int] = None, rank_by: str = 'total_return') -> Dict[str, Any]:
+    """
+    Run walk-forward optimization on data covering config startDate..endDate.
+    config là config dạng phẳng của patch runner (strategyType, patchDays, initialCapital, ...).
+    """
+    if param_grid is None and search_space is None:
+        raise ValueError("Either param_grid or search_space is required")
+
+    initial_capital = float(config.get('initialCapital', 10000))
+    base_config = build_patch_strategy_config(config, initial_capital)
+    strategy_type = base_config['strategy']['type']
+    param_names = list((param_grid or search_space).keys())
+
+    windows = build_walk_forward_windows(
+        config.get('startDate'), config.get('endDate'), config.get('patchDays', 30),
+        in_sample_patches, anchored
+    )
+
+    jobs = [{
+        'data': slice_patch_data(data, window['inSampleStart'], window['inSampleEnd']),
+        'base_config': base_config,
+        'strategy_type': strategy_type,
+        'param_grid': param_grid,
+        'search_space': search_space,
+        'n_iter': n_iter,
+        'seed': seed,
+        'rank_by': rank_by,
+        'param_names': param_names
+    } for window in windows]
+
+    # Các cửa sổ in-sample không phụ thuộc nhau -> tối ưu song song
+    workers = min(workers or os.cpu_count() or 1, max(1, len(jobs)))
+    if workers == 1:
+        optimizations = [_optimize_window(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            optimizations = list(executor.map(_optimize_window, jobs))
+
+    # Out-of-sample: chạy tuần tự, vốn cuối patch trước là vốn đầu patch sau
+    current_capital = initial_capital
+    window_results = []
+    patch_results = []
+    all_trades = []
+    for window, optimization in zip(windows, optimizations):
+        # Out-of-sample được tính kèm warm-up lookback của bộ tham số tối ưu, lấy từ
+        # các bar in-sample ngay trước nó
+        warmup = patch_warmup_bars(config, optimization['params']) if optimization['params'] is not None else 0
+        oos_data, warmup = slice_patch_with_warmup(data, window['outOfSampleStart'], window['outOfSampleEnd'], warmup)
+        if optimization['params'] is None or len(oos_data) == warmup:
+            window_results.append({**window, 'params': optimization['params'], 'inSample': optimization['in_sample'],
+                                   'outOfSample': None})
+            continue
+
+        patch_result = run_patch_backtest_with_strategy(oos_data, config, current_capital,
+                                                        parameters=optimization['params'], warmup=warmup)
+        patch_results.append(patch_result)
+        all_trades.extend(patch_result.get('trades', []))
+        window_results.append({**window, 'params': optimization['params'], 'inSample': optimization['in_sample'],
+                               'outOfSample': {k: v for k, v in patch_result.items() if k not in ('trades', 'indicators')}})
+
+        # Rebalance: update capital for next patch
+        current_capital = patch_result['finalCapital']
+
+    return {
+        'results': aggregate_patch_results(patch_results, initial_capital),
+        'windows': window_results,
+        'patches': patch_results,
+        'trades': all_trades
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-Forward Optimization Runner')
+    parser.add_argument('--experiment_id', required=True, help='Experiment ID')
+    parser.add_argument('--config', required=True, help='Configuration JSON (giống patch_backtest_runner)')
+    parser.add_argument('--grid', required=False, help='Parameter grid JSON: {"period": [7, 14, 21], ...}')
+    parser.add_argument('--search_space', required=False,
+                        help='Random search JSON: {"choices": {"period": [7, 14]}, "ranges": {"overbought": [65, 80]}}')
+    parser.add_argument('--n_iter', type=int, default=50, help='Number of random search samples')
+    parser.add_argument('--seed', type=int, default=None, help='Random search seed')
+    parser.add_argument('--in_sample_patches', type=int, default=3, help='Number of patches in each in-sample window')
+    parser.add_argument('--anchored', action='store_true', help='Anchored (expanding) in-sample windows')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--rank_by', default='total_return', help='Performance metric used for ranking')
+    parser.add_argument('--supabase_url', required=False, help='Supabase URL')
+    parser.add_argument('--supabase_key', required=False, help='Supabase Service Role Key')
+    args = parser.parse_args()
+
+    try:
+        config = json.loads(args.config)
+
+        search_space = None
+        if args.search_space:
+            raw_space = json.loads(args.search_space)
+            search_space = dict(raw_space.get('choices', {}))
+            search_space.update({k: tuple(v) for k, v in raw_space.get('ranges', {}).items()})
+
+        # Load toàn bộ khoảng thời gian một lần, các cửa sổ chỉ cắt từ dữ liệu này
+        data = load_patch_data(
+            config.get('startDate'),
+            config.get('endDate'),
+            config.get('symbol', 'BTC'),
+            config.get('timeframe', '1h'),
+            args.supabase_url,
+            args.supabase_key
+        )
+        if data is None or len(data) == 0:
+            raise ValueError("No data loaded for walk-forward period")
+
+        results = run_walk_forward(
+            data, config,
+            param_grid=json.loads(args.grid) if args.grid else None,
+            search_space=search_space,
+            n_iter=args.n_iter,
+            seed=args.seed,
+            in_sample_patches=args.in_sample_patches,
+            anchored=args.anchored,
+            workers=args.workers,
+            rank_by=args.rank_by
+        )
+        results = {'success': True, **results, 'experiment_id': args.experiment_id}
+        print(json.dumps(to_json_safe(results), allow_nan=False, default=str))
+    except Exception as e:
+        error_result = {
+            'success': False,
+            'error': str(e),
+            'experiment_id': args.experiment_id
+        }
+        print(json.dumps(to_json_safe(error_result), allow_nan=False, default=str))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
 from base_strategy import BaseStrategy
+from streaming_indicators import NaN, RollingMax, RollingMin, divide
+from signal_grid import level_signal_grid
+from signal_kernels import signal_column, crosses_above, crosses_below
 
 class WilliamsRStrategy(BaseStrategy):
+    indicator_columns = ['williams_r']
+    
     def __init__(self, config):
         super().__init__(config)
         
@@ -12,39 +17,85 @@ class WilliamsRStrategy(BaseStrategy):
         self.oversold = float(self.strategy_config.get('oversold', -80))
         self.confirmation_periods = int(self.strategy_config.get('confirmation_periods', 2))
     
+    @property
+    def warmup_bars(self) -> int:
+        # Rolling max/min period cộng shift(1)
+        return self.period
+
     def calculate_williams_r(self, data):
         """Calculate Williams %R"""
-        highest_high = data['high'].rolling(window=self.period).max()
-        lowest_low = data['low'].rolling(window=self.period).min()
+        store = self.indicators(data)
+        highest_high = store.rolling_max('high', self.period)
+        lowest_low = store.rolling_min('low', self.period)
         
         williams_r = -100 * ((highest_high - data['close']) / (highest_high - lowest_low))
         return williams_r
     
+    @classmethod
+    def prefill_indicators(cls, store, strategies):
+        """Rolling max của high / min của low cho mọi period trong sweep (sparse table)"""
+        periods = [s.period for s in strategies]
+        store.prefill('rolling_max', 'high', periods)
+        store.prefill('rolling_min', 'low', periods)
+    
     def generate_signals(self, data):
         """Generate trading signals based on Williams %R"""
         signals = data.copy()
         
         # Calculate Williams %R
-        williams_r = self.calculate_williams_r(data)
+        williams_r = self.williams_r(data)
         signals['williams_r'] = williams_r
         
-        # Initialize signals
-        signals['signal'] = 0
+        # Generate signals
+        signals['signal'] = signal_column(*self.signal_rules(williams_r))
         
+        return signals
+    
+    def williams_r(self, data):
+        return self.cached_indicator(data, ('williams_r', self.period), lambda: self.calculate_williams_r(data))
+    
+    def signal_array(self, data):
+        return signal_column(*self.signal_rules(self.williams_r(data)))
+    
+    @classmethod
+    def signal_grid(cls, store, strategies):
+        """Một cột %R cho mỗi period; mọi cặp ngưỡng của period đó được so sánh cùng lúc"""
+        cls.prefill_indicators(store, strategies)
+        for strategy in strategies:
+            strategy.indicator_store = store
+        return level_signal_grid(len(store.data), strategies, lambda s: s.period, lambda s: s.williams_r(store.data))
+    
+    def signal_rules(self, williams_r):
+        """Buy/sell masks; williams_r là Series/mảng hoặc frame bars × symbols"""
         # Generate buy signals
-        # Buy when Williams %R moves above oversold level
-        buy_condition = (
-            (williams_r < self.oversold) & 
-            (williams_r.shift(1) >= self.oversold)
-        )
-        signals.loc[buy_condition, 'signal'] = 1
+        # Buy when Williams %R crosses below oversold level
+        buy_condition = crosses_below(williams_r, self.oversold)
         
         # Generate sell signals
-        # Sell when Williams %R moves below overbought level
-        sell_condition = (
-            (williams_r > self.overbought) & 
-            (williams_r.shift(1) <= self.overbought)
-        )
-        signals.loc[sell_condition, 'signal'] = -1
+        # Sell when Williams %R crosses above overbought level
+        sell_condition = crosses_above(williams_r, self.overbought)
+        return buy_condition, sell_condition
+    
+    def panel_signals(self, panel):
+        """Vectorized Williams %R signals for a bars × symbols panel"""
+        return self.combine_signals(panel['close'], *self.signal_rules(self.calculate_williams_r(panel)))
+    
+    def _init_stream(self):
+        self._highest_high = RollingMax(self.period)
+        self._lowest_low = RollingMin(self.period)
+        self._prev_williams_r = NaN
+    
+    def _on_bar(self, bar):
+        """Incremental Williams %R signal for one bar"""
+        close = float(bar['close'])
+        highest_high = self._highest_high.update(bar['high'])
+        lowest_low = self._lowest_low.update(bar['low'])
+        williams_r = -100 * divide(highest_high - close, highest_high - lowest_low)
+        prev_williams_r, self._prev_williams_r = self._prev_williams_r, williams_r
         
-        return signals
+        signal = 0
+        if williams_r < self.oversold and prev_williams_r >= self.oversold:
+            signal = 1
+        if williams_r > self.overbought and prev_williams_r <= self.overbought:
+            signal = -1
+        return signal
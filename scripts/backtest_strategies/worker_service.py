@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Worker service - chạy backtest_runner / patch_backtest_runner trong các process
+sống lâu thay vì spawn một process Python mới cho mỗi lần chạy.
+
+Mỗi worker của process pool import sẵn các runner (pandas, NumPy, strategies) và
+chạy thử mọi strategy trên một ít dữ liệu giả một lần (JIT kernel, lazy import
+của pandas), nên job chỉ còn tốn thời gian của chính backtest. OHLCV cache và
+result cache trên đĩa vẫn dùng chung như khi chạy CLI.
+
+HTTP (stdlib, chỉ nên bind vào localhost):
+    POST /backtest        body {"experiment_id": ..., "config": {...}, "options": {...}}
+    POST /patch-backtest  options là các flag CLI của runner, ví dụ
+                          {"output": "ndjson", "chart_format": "float32", "no_cache": true}
+    GET  /health
+
+Response body giống hệt stdout của runner khi chạy CLI (cùng parser phía Node);
+exit code của runner nằm ở header X-Exit-Code. Khi số job đang chờ/chạy đạt
+max_pending, request bị từ chối ngay với 503 thay vì xếp hàng vô hạn.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import argparse
+import threading
+import importlib
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add current and parent directory to Python path (như khi chạy các runner trực tiếp)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Endpoint -> module runner (mỗi module có main(argv))
+RUNNERS = {
+    'backtest': 'backtest_runner',
+    'patch-backtest': 'patch_backtest_runner'
+}
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_PENDING = 32
+
+def runner_argv(request: Dict[str, Any]) -> List[str]:
+    """
+    Request body -> argv của runner. options: True -> '--flag', False/None -> bỏ qua,
+    giá trị khác -> '--key value'.
+    """
+    if 'experiment_id' not in request or 'config' not in request:
+        raise ValueError("Request must contain 'experiment_id' and 'config'")
+    config = request['config']
+    argv = ['--experiment_id', str(request['experiment_id']),
+            '--config', config if isinstance(config, str) else json.dumps(config)]
+    for key, value in (request.get('options') or {}).items():
+        if value is True:
+            argv.append(f'--{key}')
+        elif value is not None and value is not False:
+            argv.extend([f'--{key}', str(value)])
+    return argv
+
+def _warm_frame(n: int = 300) -> pd.DataFrame:
+    """Dữ liệu OHLCV giả (random walk cố định) chỉ để chạy thử strategy lúc khởi động"""
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = close * 0.005
+    return pd.DataFrame({
+        'open': close, 'high': close + spread, 'low': close - spread, 'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    }, index=pd.date_range('2023-01-01', periods=n, freq='1h'))
+
+def _init_worker():
+    """Initializer của mỗi worker: import runner và chạy thử mọi strategy một lần"""
+    for module in RUNNERS.values():
+        importlib.import_module(module)
+    from strategy_registry import STRATEGY_MAP
+
+    data = _warm_frame()
+    config = {
+        'trading': {'symbol': 'BTCUSDT', 'timeframe': '1h', 'initialCapital': 10000, 'positionSize': 1.0},
+        'riskManagement': {'stopLoss': 2.0, 'takeProfit': 4.0},
+        'strategy': {'parameters': {}}
+    }
+    for strategy_class in STRATEGY_MAP.values():
+        strategy = strategy_class(config)
+        strategy.export_indicators(strategy.generate_signals(data))
+        strategy.run_backtest(data)
+
+def _ping() -> int:
+    return os.getpid()
+
+def run_job(runner: str, argv: List[str]) -> Tuple[int, str]:
+    """Chạy main(argv) của runner trong worker; trả về (exit code, stdout)"""
+    module = importlib.import_module(RUNNERS[runner])
+    output = io.StringIO()
+    code = 0
+    try:
+        with redirect_stdout(output):
+            module.main(argv)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return code, output.getvalue()
+
+class WorkerService:
+    """Process pool đã warm-up cùng giới hạn số job đang chờ/chạy"""
+
+    def __init__(self, workers: int = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max(self.workers, max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.completed = 0
+
+    def start(self) -> 'WorkerService':
+        """Khởi động pool và chờ mọi worker warm-up xong trước khi nhận job"""
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return self
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'WorkerService':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def run(self, runner: str, request: Dict[str, Any]) -> Tuple[int, str]:
+        """
+        Chạy một job trên pool và chờ kết quả (exit code, stdout). Raise KeyError nếu
+        runner không tồn tại, ValueError nếu request sai, RuntimeError nếu đã đủ max_pending job.
+        """
+        if runner not in RUNNERS:
+            raise KeyError(runner)
+        argv = runner_argv(request)
+        if not self._slots.acquire(blocking=False):
+            raise RuntimeError(f"Worker service busy ({self.max_pending} jobs pending)")
+        with self._lock:
+            self.pending += 1
+        try:
+            return self._executor.submit(run_job, runner, argv).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'workers': self.workers, 'maxPending': self.max_pending,
+                    'pending': self.pending, 'completed': self.completed}
+
+def make_handler(service: WorkerService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: str, content_type: str = 'application/json', headers: Dict[str, Any] = None):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str):
+            self._send(status, json.dumps({'success': False, 'error': message}))
+
+        def do_GET(self):
+            if self.path != '/health':
+                return self._error(404, f'Unknown path {self.path}')
+            self._send(200, json.dumps({'status': 'healthy', **service.stats()}))
+
+        def do_POST(self):
+            runner = self.path.strip('/')
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                started = time.perf_counter()
+                code, output = service.run(runner, request)
+            except KeyError:
+                return self._error(404, f'Unknown runner {self.path}')
+            except (ValueError, TypeError, AttributeError) as e:
+                return self._error(400, f'Invalid request: {e}')
+            except RuntimeError as e:
+                # Đủ max_pending job, hoặc worker chết (BrokenProcessPool): cần khởi động lại service
+                return self._error(503, str(e))
+            ndjson = (request.get('options') or {}).get('output') == 'ndjson'
+            self._send(200 if code == 0 else 500, output,
+                       'application/x-ndjson' if ndjson else 'application/json',
+                       {'X-Exit-Code': code, 'X-Job-Ms': round((time.perf_counter() - started) * 1000, 3)})
+
+        def log_message(self, format, *args):
+            # Log ra stderr như mặc định, nhưng không log health check
+            if not self.path.startswith('/health'):
+                super().log_message(format, *args)
+
+    return Handler
+
+def serve(service: WorkerService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """HTTP server cho service đã start(); gọi serve_forever() để chạy"""
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent backtest worker service')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Bind address (mặc định chỉ localhost)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (mặc định số CPU)')
+    parser.add_argument('--max_pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='Số job tối đa đang chờ/chạy; vượt quá thì trả về 503')
+    args = parser.parse_args()
+
+    with WorkerService(args.workers, args.max_pending) as service:
+        server = serve(service, args.host, args.port)
+        print(f"Worker service listening on http://{args.host}:{server.server_address[1]} "
+              f"({service.workers} workers)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -6,23 +6,25 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 import plotly.graph_objects as go
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
 
+# Add backtest_strategies to Python path (shared OHLCV loader)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backtest_strategies'))
+from ohlcv_loader import OHLCVLoader, RAW_OHLCV_COLUMNS
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    os.getenv('NEXT_PUBLIC_SUPABASE_URL'),
-    os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-)
+# Biến được tính từ dữ liệu, không phải cột trong bảng
+DERIVED_VARIABLES = ['returns', 'volatility']
 
-def fetch_market_data(start_date: str, end_date: str) -> pd.DataFrame:
-    """Fetch market data from Supabase"""
-    response = supabase.table('OHLCV_BTC_USDT_1m').select('*').gte('open_time', start_date).lte('open_time', end_date).execute()
-    return pd.DataFrame(response.data)
+def fetch_market_data(start_date: str, end_date: str, columns: list = None) -> pd.DataFrame:
+    """Fetch market data from Supabase (các cột OHLCV và columns, đọc theo trang)"""
+    columns = list(dict.fromkeys(list(RAW_OHLCV_COLUMNS) + (columns or [])))
+    with OHLCVLoader.from_env() as loader:
+        arrays = loader.fetch('OHLCV_BTC_USDT_1m', columns, start_date, end_date)
+    return pd.DataFrame(arrays)
 
 def calculate_returns(data: pd.DataFrame) -> pd.Series:
     """Calculate returns from OHLCV data"""
@@ -188,7 +190,8 @@ def main():
         # Fetch market data
         data = fetch_market_data(
             config.get('startDate', '2024-01-01'),
-            config.get('endDate', '2024-03-20')
+            config.get('endDate', '2024-03-20'),
+            [v['name'] for v in variables if v['name'] not in DERIVED_VARIABLES]
         )
         
         # Calculate derived variables
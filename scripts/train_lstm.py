@@ -12,7 +12,10 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
-from supabase import create_client, Client
+
+# Add backtest_strategies to Python path (shared OHLCV loader)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backtest_strategies'))
+from ohlcv_loader import OHLCVLoader
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -139,19 +142,17 @@ try:
         if not supabase_url or not supabase_key:
             raise ValueError("Missing Supabase URL or Key. Ensure NEXT_PUBLIC_SUPABASE_URL and NEXT_PUBLIC_SUPABASE_ANON_KEY are set in .env")
 
-        print("[Python Script] Connecting to Supabase...", file=sys.stderr)
-        supabase: Client = create_client(supabase_url, supabase_key)
-        
+        # Chỉ fetch các cột feature/target, đọc theo trang song song
+        fetch_cols = list(dict.fromkeys([args.target_column] + args.feature_columns))
         print(f"[Python Script] Fetching data from OHLCV_BTC_USDT_1m...", file=sys.stderr)
-        response = supabase.table("OHLCV_BTC_USDT_1m").select("*").order("open_time", desc=False).execute()
-        print(f"[Python Script] Fetched {len(response.data)} records.", file=sys.stderr)
+        with OHLCVLoader(supabase_url, supabase_key) as loader:
+            arrays = loader.fetch("OHLCV_BTC_USDT_1m", fetch_cols)
+        print(f"[Python Script] Fetched {len(arrays['open_time'])} records.", file=sys.stderr)
 
-        if not response.data:
+        if len(arrays['open_time']) == 0:
             raise ValueError("No data fetched from OHLCV_BTC_USDT_1m table.")
 
-        df = pd.DataFrame(response.data)
-        df['open_time'] = pd.to_datetime(df['open_time'])
-        df = df.sort_values('open_time').set_index('open_time')
+        df = pd.DataFrame(arrays).set_index('open_time')
 
     # Select features and target
     if args.target_column not in args.feature_columns: